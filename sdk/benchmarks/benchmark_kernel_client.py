@@ -0,0 +1,124 @@
+"""
+NeuroFlow Python SDK - Kernel Memory Client Throughput Benchmarks
+
+在进程内的 grpc.aio 桩服务器上测量 store / retrieve 吞吐量 (1/64/512 个并发调用方):
+- executor: 同步通道 + run_in_executor (旧实现，每个进行中的调用占用一个线程池线程)
+- aio: grpc.aio 原生异步通道
+
+用法:
+    python benchmarks/benchmark_kernel_client.py
+    python benchmarks/benchmark_kernel_client.py --ops 5000 --concurrency 1 64 512 --channels 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import grpc
+
+from neuroflow.memory import KernelClientConfig, KernelMemoryClient
+from neuroflow.memory.kernel_client import _to_value
+from neuroflow.proto import memory_pb2, memory_pb2_grpc
+
+
+class StubMemoryService(memory_pb2_grpc.MemoryServiceServicer):
+    """以字典保存记忆的桩服务"""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def Store(self, request, context):
+        self.entries[(request.entry.agent_id, request.entry.key)] = request.entry
+        return memory_pb2.StoreResponse(success=True, memory_id=request.entry.key)
+
+    async def Retrieve(self, request, context):
+        entry = self.entries.get((request.agent_id, request.key))
+        if entry is None:
+            return memory_pb2.RetrieveResponse(found=False)
+        return memory_pb2.RetrieveResponse(found=True, entry=entry)
+
+
+async def start_stub_server():
+    """启动桩服务器，返回 (server, endpoint)"""
+    server = grpc.aio.server()
+    memory_pb2_grpc.add_MemoryServiceServicer_to_server(StubMemoryService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+class ExecutorClient:
+    """旧实现：同步通道，每次调用交给默认线程池"""
+
+    def __init__(self, endpoint: str):
+        self.channel = grpc.insecure_channel(endpoint)
+        self.stub = memory_pb2_grpc.MemoryServiceStub(self.channel)
+
+    async def store(self, agent_id, key, value):
+        request = memory_pb2.StoreRequest(
+            entry=memory_pb2.MemoryEntry(agent_id=agent_id, key=key, value=_to_value(value))
+        )
+        return await asyncio.get_event_loop().run_in_executor(None, lambda: self.stub.Store(request))
+
+    async def retrieve(self, agent_id, key):
+        request = memory_pb2.RetrieveRequest(agent_id=agent_id, key=key)
+        return await asyncio.get_event_loop().run_in_executor(None, lambda: self.stub.Retrieve(request))
+
+    async def aclose(self):
+        self.channel.close()
+
+
+async def measure(op, ops: int, concurrency: int) -> float:
+    """concurrency 个调用方共执行 ops 次操作，返回每秒操作数"""
+    per_caller = max(1, ops // concurrency)
+
+    async def caller(c: int):
+        for i in range(per_caller):
+            await op(f"key-{c}-{i % 16}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(c) for c in range(concurrency)))
+    return per_caller * concurrency / (time.perf_counter() - started)
+
+
+async def run_throughput_benchmarks(ops: int, concurrency_levels, channels: int):
+    """运行吞吐量基准测试"""
+    print("=" * 60)
+    print(f"Kernel Memory Client Throughput (stub server, {ops} ops per run)")
+    print("=" * 60)
+
+    server, endpoint = await start_stub_server()
+    clients = {
+        "executor": ExecutorClient(endpoint),
+        "aio": KernelMemoryClient(endpoint, KernelClientConfig(num_channels=channels)),
+    }
+    value = {"theme": "dark", "lang": "zh"}
+    try:
+        for concurrency in concurrency_levels:
+            print(f"\nconcurrency={concurrency}")
+            for name, client in clients.items():
+                store = await measure(lambda key: client.store("agent", key, value), ops, concurrency)
+                retrieve = await measure(lambda key: client.retrieve("agent", key), ops, concurrency)
+                print(f"  {name:>8}: store={store:9.0f} ops/s  retrieve={retrieve:9.0f} ops/s")
+    finally:
+        for client in clients.values():
+            await client.aclose()
+        await server.stop(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kernel memory client throughput benchmark")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 64, 512])
+    parser.add_argument("--channels", type=int, default=1, help="aio 客户端的通道数")
+    args = parser.parse_args()
+
+    asyncio.run(run_throughput_benchmarks(args.ops, args.concurrency, args.channels))
+
+
+if __name__ == "__main__":
+    main()
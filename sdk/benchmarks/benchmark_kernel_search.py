@@ -0,0 +1,167 @@
+"""
+NeuroFlow Python SDK - Kernel Memory Search Latency Benchmarks
+
+在进程内的 grpc.aio 桩服务器上测量返回 10k 条结果的 search 延迟:
+- eager: 每条结果的 value 都解码为 Python 对象
+- lazy: 返回 LazyMemoryEntry，只读取 key (不解码 value)
+- lazy+value: 返回 LazyMemoryEntry，并访问全部 value
+- projection: fields=["key", "tags"]，服务端不发送 value
+- protobuf / msgpack: value 以 encoded_value 传输
+
+另外单独测量 10k 个值的解码耗时 (不含网络): json_format vs 手写转换 vs 二进制编码
+
+用法:
+    python benchmarks/benchmark_kernel_search.py
+    python benchmarks/benchmark_kernel_search.py --entries 10000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import grpc
+from google.protobuf import json_format, struct_pb2
+
+from neuroflow.memory import KernelMemoryClient
+from neuroflow.memory import kernel_client
+from neuroflow.proto import memory_pb2, memory_pb2_grpc
+
+
+def make_value(i: int):
+    """一条典型的记忆值"""
+    return {
+        "summary": f"user prefers concise answers #{i}",
+        "langs": ["zh", "en"],
+        "score": i * 0.5,
+        "profile": {"theme": "dark", "timezone": "Asia/Shanghai", "recent": list(range(8))},
+    }
+
+
+class StubMemoryService(memory_pb2_grpc.MemoryServiceServicer):
+    """按请求的投影与值编码返回预先生成的条目"""
+
+    def __init__(self, count: int):
+        self.values = [make_value(i) for i in range(count)]
+        self.responses = {}
+
+    def _response(self, with_value: bool, encoding: int) -> memory_pb2.SearchResponse:
+        key = (with_value, encoding)
+        if key not in self.responses:
+            entries = []
+            for i, value in enumerate(self.values):
+                entry = memory_pb2.MemoryEntry(
+                    id=f"id-{i}", agent_id="agent", key=f"key-{i}",
+                    tags=["preference", "profile"], importance=0.5, memory_type="long_term",
+                )
+                if with_value:
+                    if encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_MSGPACK and kernel_client.msgpack is None:
+                        encoding = memory_pb2.ValueEncoding.VALUE_ENCODING_UNSPECIFIED
+                    kernel_client._set_entry_value(entry, value, encoding)
+                entries.append(entry)
+            self.responses[key] = memory_pb2.SearchResponse(entries=entries, total_count=len(entries))
+        return self.responses[key]
+
+    async def Search(self, request, context):
+        fields = request.query.fields
+        return self._response(not fields or "value" in fields, request.query.accept_encoding)
+
+
+async def start_stub_server(count: int):
+    """启动桩服务器，返回 (server, endpoint)"""
+    server = grpc.aio.server(options=[("grpc.max_send_message_length", 256 * 1024 * 1024)])
+    memory_pb2_grpc.add_MemoryServiceServicer_to_server(StubMemoryService(count), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+async def measure(search, consume, rounds: int) -> float:
+    """返回 search + consume 的最小耗时 (毫秒)"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        consume(await search())
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def run_search_benchmarks(count: int, rounds: int):
+    """运行端到端 search 延迟基准测试"""
+    print("=" * 60)
+    print(f"Kernel Memory Search Latency ({count} results, best of {rounds})")
+    print("=" * 60)
+
+    server, endpoint = await start_stub_server(count)
+    client = KernelMemoryClient(endpoint)
+
+    def keys(results):
+        return [m["key"] for m in results]
+
+    def values(results):
+        return [m["value"] for m in results]
+
+    cases = [
+        ("eager", lambda: client.search("agent", limit=count), values),
+        ("lazy", lambda: client.search("agent", limit=count, lazy=True), keys),
+        ("lazy+value", lambda: client.search("agent", limit=count, lazy=True), values),
+        ("projection", lambda: client.search("agent", limit=count, fields=["key", "tags"]), keys),
+        ("protobuf", lambda: client.search("agent", limit=count, value_encoding="protobuf"), values),
+    ]
+    if kernel_client.msgpack is not None:
+        cases.append(("msgpack", lambda: client.search("agent", limit=count, value_encoding="msgpack"), values))
+    else:
+        print("  (msgpack not installed, skipping msgpack case)")
+
+    try:
+        for name, search, consume in cases:
+            elapsed = await measure(search, consume, rounds)
+            print(f"  {name:>12}: {elapsed:8.1f} ms")
+    finally:
+        await client.aclose()
+        await server.stop(None)
+
+
+def run_decode_benchmarks(count: int, rounds: int):
+    """只测量值的解码耗时"""
+    print("\n" + "=" * 60)
+    print(f"Value Decoding Only ({count} values, best of {rounds})")
+    print("=" * 60)
+
+    values = [make_value(i) for i in range(count)]
+    messages = [json_format.ParseDict(v, struct_pb2.Value()) for v in values]
+    serialized = [m.SerializeToString() for m in messages]
+
+    cases = [
+        ("json_format", lambda: [json_format.MessageToDict(m) for m in messages]),
+        ("_from_value", lambda: [kernel_client._from_value(m) for m in messages]),
+        ("protobuf bytes", lambda: [kernel_client._from_value(struct_pb2.Value.FromString(b)) for b in serialized]),
+    ]
+    if kernel_client.msgpack is not None:
+        packed = [kernel_client.msgpack.packb(v, use_bin_type=True) for v in values]
+        cases.append(("msgpack", lambda: [kernel_client.msgpack.unpackb(b, raw=False) for b in packed]))
+
+    for name, decode in cases:
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            decode()
+            best = min(best, time.perf_counter() - started)
+        print(f"  {name:>14}: {best * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kernel memory search latency benchmark")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(run_search_benchmarks(args.entries, args.rounds))
+    run_decode_benchmarks(args.entries, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
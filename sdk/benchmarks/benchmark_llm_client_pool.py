@@ -0,0 +1,98 @@
+"""
+NeuroFlow Python SDK - LLM Client Connection Pool Benchmarks
+
+在本地桩服务器 (模拟 Ollama /api/chat) 上测量 LLMClient 单次调用延迟:
+- per-call: 每次调用新建 aiohttp.ClientSession (旧实现，每轮重新建立连接)
+- pooled: LLMClient 复用长连接池
+
+本地回环没有 TLS 握手和网络往返，远程 HTTPS 提供商上差距会更大。
+
+用法:
+    python benchmarks/benchmark_llm_client_pool.py
+    python benchmarks/benchmark_llm_client_pool.py --calls 500 --delay-ms 1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import aiohttp
+from aiohttp import web
+
+from benchmark import Benchmark
+from neuroflow.orchestrator import LLMClient, LLMConfig, LLMProvider, Message
+
+
+async def start_stub_server(delay_ms: float):
+    """启动模拟 Ollama 的桩服务器，返回 (runner, url)"""
+    async def chat(request):
+        await request.json()
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        return web.json_response({"message": {"role": "assistant", "content": "pong"}})
+
+    app = web.Application()
+    app.router.add_post("/api/chat", chat)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/api/chat"
+
+
+async def per_call_session(url: str, messages):
+    """旧实现：每次调用新建会话"""
+    payload = {"model": "stub", "messages": [m.to_dict() for m in messages], "stream": False}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=payload) as response:
+            return await response.json()
+
+
+async def run_pool_benchmarks(calls: int, delay_ms: float):
+    """运行连接池基准测试"""
+    print("=" * 60)
+    print(f"LLM Client Per-call Latency (stub server, delay={delay_ms}ms)")
+    print("=" * 60)
+
+    runner, url = await start_stub_server(delay_ms)
+    messages = [Message.user("ping")]
+    client = LLMClient(LLMConfig(provider=LLMProvider.OLLAMA, model="stub", base_url=url))
+    try:
+        async def run_per_call():
+            await per_call_session(url, messages)
+
+        async def run_pooled():
+            await client.chat(messages)
+
+        results = {}
+        for name, func in (("per-call", run_per_call), ("pooled", run_pooled)):
+            benchmark = Benchmark(f"llm_client_{name}", warmup_iterations=5)
+            results[name] = await benchmark.run(func, iterations=calls)
+            result = results[name]
+            print(
+                f"{name:>9}: avg={result.avg_time_ms:7.3f}ms  "
+                f"p95={result.p95_time_ms:7.3f}ms  p99={result.p99_time_ms:7.3f}ms"
+            )
+
+        speedup = results["per-call"].avg_time_ms / max(results["pooled"].avg_time_ms, 1e-9)
+        print(f"speedup: {speedup:.2f}x")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM client connection pool benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="桩服务器每次响应前的等待时间")
+    args = parser.parse_args()
+
+    asyncio.run(run_pool_benchmarks(args.calls, args.delay_ms))
+
+
+if __name__ == "__main__":
+    main()
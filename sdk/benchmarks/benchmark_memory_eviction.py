@@ -0,0 +1,91 @@
+"""
+NeuroFlow Python SDK - Memory Eviction Benchmarks
+
+测量 VectorMemoryStore 在容量已满时的持续写入吞吐:
+- heap: 当前基于 EvictionQueue 的淘汰
+- rescan: 旧实现 (每次淘汰全量打分并排序) 作为对照
+
+用法:
+    python benchmarks/benchmark_memory_eviction.py
+    python benchmarks/benchmark_memory_eviction.py --capacities 1000 10000 --inserts 20000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from neuroflow.memory import VectorMemoryStore
+
+
+class RescanEvictionStore(VectorMemoryStore):
+    """旧的淘汰实现：全量打分 + 排序"""
+
+    async def _evict_memories(self) -> None:
+        current_time = time.time()
+        scores = sorted(
+            (self._eviction_score(entry, current_time), entry.id)
+            for entry in self._memories.values()
+        )
+        to_delete = max(1, int(len(scores) * 0.1))
+        for _, entry_id in scores[:to_delete]:
+            entry = self._memories.get(entry_id)
+            if entry:
+                await self.delete(entry.key)
+
+
+async def measure_throughput(store_cls, capacity: int, inserts: int) -> float:
+    """填满容量后持续写入，返回每秒写入次数"""
+    rng = random.Random(42)
+    store = store_cls(max_memories=capacity, use_vector_index=False)
+
+    for i in range(capacity):
+        await store.store(
+            key=f"warm-{i}",
+            value=i,
+            tags=[f"tag-{i % 50}"],
+            importance=rng.random(),
+        )
+
+    start = time.perf_counter()
+    for i in range(inserts):
+        await store.store(
+            key=f"key-{i}",
+            value=i,
+            tags=[f"tag-{i % 50}"],
+            importance=rng.random(),
+        )
+    elapsed = time.perf_counter() - start
+    return inserts / elapsed
+
+
+async def run_eviction_benchmarks(capacities, inserts: int):
+    """运行淘汰吞吐基准测试"""
+    print("=" * 60)
+    print(f"Sustained Insert Throughput at Capacity ({inserts} inserts)")
+    print("=" * 60)
+
+    for capacity in capacities:
+        heap = await measure_throughput(VectorMemoryStore, capacity, inserts)
+        rescan = await measure_throughput(RescanEvictionStore, capacity, inserts)
+        print(
+            f"capacity={capacity:>7}: heap={heap:10.0f} ops/s  "
+            f"rescan={rescan:10.0f} ops/s  speedup={heap / rescan:6.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VectorMemoryStore eviction benchmark")
+    parser.add_argument("--capacities", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--inserts", type=int, default=50000)
+    args = parser.parse_args()
+
+    asyncio.run(run_eviction_benchmarks(args.capacities, args.inserts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+NeuroFlow Python SDK - Memory Footprint Benchmarks
+
+测量每条记忆占用的内存 (tracemalloc):
+- compact: 当前的 __slots__ + array('f') MemoryEntry
+- dataclass: 旧实现 (普通 dataclass + List[float] 嵌入) 作为对照
+
+用法:
+    python benchmarks/benchmark_memory_footprint.py
+    python benchmarks/benchmark_memory_footprint.py --counts 10000 100000 --dim 384
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from neuroflow.memory import MemoryEntry, MemoryType
+
+
+@dataclass
+class DataclassMemoryEntry:
+    """旧的记忆条目实现"""
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    key: str = ""
+    value: Any = None
+    memory_type: MemoryType = MemoryType.SHORT_TERM
+    tags: List[str] = field(default_factory=list)
+    importance: float = 0.5
+    embedding: Optional[List[float]] = None
+    created_at: float = field(default_factory=time.time)
+    accessed_at: float = field(default_factory=time.time)
+    access_count: int = 0
+    ttl_seconds: Optional[int] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def measure(entry_cls, count: int, dim: int) -> float:
+    """创建 count 条记忆，返回每条的平均字节数"""
+    rng = random.Random(42)
+    # 嵌入函数每次返回新的浮点数列表，标签文本也是新构造的字符串
+    vectors = [[rng.uniform(-1.0, 1.0) for _ in range(dim)] for _ in range(64)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    entries = [
+        entry_cls(
+            key=f"memory-{i}",
+            value=f"memory-{i}",
+            tags=["tag-%d" % (i % 20), "user"],
+            embedding=[v * 1.0 for v in vectors[i % 64]],
+        )
+        for i in range(count)
+    ]
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return (after - before) / count
+
+
+def run_footprint_benchmarks(counts, dim: int):
+    """运行内存占用基准测试"""
+    print("=" * 60)
+    print(f"MemoryEntry Footprint (dim={dim}, raw embedding={dim * 4} bytes)")
+    print("=" * 60)
+
+    for count in counts:
+        compact = measure(MemoryEntry, count, dim)
+        legacy = measure(DataclassMemoryEntry, count, dim)
+        print(
+            f"N={count:>7}: compact={compact:8.0f} B/entry  "
+            f"dataclass={legacy:8.0f} B/entry  ratio={legacy / compact:5.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MemoryEntry memory footprint benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    run_footprint_benchmarks(args.counts, args.dim)
+
+
+if __name__ == "__main__":
+    main()
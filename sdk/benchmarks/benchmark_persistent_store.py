@@ -0,0 +1,98 @@
+"""
+NeuroFlow Python SDK - Persistent Store Benchmarks
+
+测量 PersistentMemoryBackend 的冷启动开销:
+- open: 打开已有存储并创建 VectorMemoryStore（不加载任何条目）
+- first_retrieve: 打开后第一次按键检索（惰性加载单个条目）
+- search: 对内存映射向量文件的语义检索
+
+用法:
+    python benchmarks/benchmark_persistent_store.py
+    python benchmarks/benchmark_persistent_store.py --sizes 10000 1000000 --dim 64
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from neuroflow.memory import MemoryEntry, PersistentMemoryBackend, VectorMemoryStore
+
+
+def populate(path: str, size: int, dim: int) -> None:
+    """在一个事务中写入 size 条记忆"""
+    rng = np.random.default_rng(42)
+    backend = PersistentMemoryBackend(path)
+    with backend.batch():
+        for i in range(size):
+            backend.put(MemoryEntry(
+                key=f"memory-{i}",
+                value=f"memory-{i}",
+                tags=[f"tag-{i % 100}"],
+                embedding=rng.standard_normal(dim).tolist(),
+            ))
+    backend.close()
+
+
+async def run_persistent_store_benchmarks(sizes, dim: int):
+    """运行持久化存储基准测试"""
+    query = np.random.default_rng(7).standard_normal(dim).tolist()
+
+    async def embedding_fn(text: str):
+        return query
+
+    print("=" * 60)
+    print(f"Persistent Store Benchmark (dim={dim})")
+    print("=" * 60)
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            start = time.perf_counter()
+            populate(path, size, dim)
+            populate_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store = VectorMemoryStore(
+                embedding_fn=embedding_fn,
+                backend=PersistentMemoryBackend(path),
+            )
+            open_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            await store.retrieve(f"memory-{size // 2}")
+            retrieve_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            await store.semantic_search("query", top_k=5, min_similarity=-1.0)
+            first_search_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            await store.semantic_search("query", top_k=5, min_similarity=-1.0)
+            search_ms = (time.perf_counter() - start) * 1000
+
+            store.backend.close()
+
+        print(
+            f"N={size:>8}: populate={populate_s:6.1f}s  open={open_ms:6.2f}ms  "
+            f"first_retrieve={retrieve_ms:6.2f}ms  "
+            f"search(cold/warm)={first_search_ms:8.1f}/{search_ms:7.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PersistentMemoryBackend cold start benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    asyncio.run(run_persistent_store_benchmarks(args.sizes, args.dim))
+
+
+if __name__ == "__main__":
+    main()
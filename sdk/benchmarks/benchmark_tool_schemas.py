@@ -0,0 +1,104 @@
+"""
+NeuroFlow Python SDK - Tool Schema Rendering Benchmarks
+
+测量 LLMOrchestrator 每轮对话准备工具信息的开销 (系统提示词 + 工具 Schema 列表):
+- uncached: 每轮重新生成所有 to_llm_schema() 并 json.dumps (旧实现)
+- cached: UnifiedToolRegistry 缓存的 Schema 列表和提示词片段
+
+用法:
+    python benchmarks/benchmark_tool_schemas.py
+    python benchmarks/benchmark_tool_schemas.py --tool-counts 10 100 500 --turns 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark import Benchmark
+from neuroflow.orchestrator import LLMOrchestrator
+from neuroflow.tools import ToolDefinition, ToolParameter, ToolSource, UnifiedToolRegistry
+
+
+def build_registry(count: int) -> UnifiedToolRegistry:
+    """构建包含 count 个工具的注册表，每个工具 3 个参数"""
+    registry = UnifiedToolRegistry()
+    for i in range(count):
+        registry.register_tool(ToolDefinition(
+            id=f"tool-{i}",
+            name=f"tool_{i}",
+            description=f"MCP tool number {i} that does something useful",
+            source=ToolSource.MCP_SERVER,
+            parameters=[
+                ToolParameter(
+                    name=f"arg_{j}",
+                    parameter_type="string",
+                    description=f"argument {j}",
+                    required=j == 0,
+                )
+                for j in range(3)
+            ],
+        ))
+    return registry
+
+
+def uncached_turn(orchestrator: LLMOrchestrator, registry: UnifiedToolRegistry):
+    """旧实现：每轮重新生成 Schema 和提示词"""
+    tools = registry.list_tools()
+    lines = []
+    for tool in tools:
+        params_desc = ", ".join(f"{p.name} ({p.parameter_type})" for p in tool.parameters)
+        lines.append(f"- {tool.name}({params_desc}): {tool.description}")
+    prompt = orchestrator.system_prompts["auto"].format(
+        tools_description="\n".join(lines),
+        tools_schema=json.dumps([t.to_llm_schema() for t in tools], indent=2),
+    )
+    schemas = [t.to_llm_schema() for t in tools]
+    return prompt, schemas
+
+
+def cached_turn(orchestrator: LLMOrchestrator, registry: UnifiedToolRegistry):
+    """当前实现：复用缓存"""
+    messages = orchestrator._build_messages("hello", None, None)
+    return messages, registry.get_all_llm_schemas()
+
+
+async def run_tool_schema_benchmarks(tool_counts, turns: int):
+    """运行工具 Schema 渲染基准测试"""
+    print("=" * 60)
+    print("Per-turn Tool Schema Overhead")
+    print("=" * 60)
+
+    for count in tool_counts:
+        registry = build_registry(count)
+        orchestrator = LLMOrchestrator(llm_client=None, tool_registry=registry)
+        row = {}
+
+        for path, turn in (("uncached", uncached_turn), ("cached", cached_turn)):
+            async def run_turn():
+                turn(orchestrator, registry)
+
+            benchmark = Benchmark(f"tool_schemas_{path}_{count}", warmup_iterations=1)
+            row[path] = await benchmark.run(run_turn, iterations=turns)
+
+        speedup = row["uncached"].avg_time_ms / max(row["cached"].avg_time_ms, 1e-9)
+        print(
+            f"tools={count:>5}: uncached={row['uncached'].avg_time_ms:8.3f}ms  "
+            f"cached={row['cached'].avg_time_ms:7.4f}ms  speedup={speedup:7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool schema rendering benchmark")
+    parser.add_argument("--tool-counts", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(run_tool_schema_benchmarks(args.tool_counts, args.turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+NeuroFlow Python SDK - Vector Search Benchmarks
+
+对比 VectorMemoryStore 语义检索的两条路径:
+- python: 逐条计算余弦相似度
+- matrix: FlatVectorIndex 矩阵检索 (NumPy)
+
+用法:
+    python benchmarks/benchmark_vector_search.py
+    python benchmarks/benchmark_vector_search.py --sizes 1000 10000 --dim 128
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark import Benchmark
+from neuroflow.memory import VectorMemoryStore
+
+
+def make_vectors(count: int, dim: int, seed: int = 42):
+    """生成随机嵌入向量"""
+    rng = random.Random(seed)
+    return [[rng.uniform(-1.0, 1.0) for _ in range(dim)] for _ in range(count)]
+
+
+async def build_store(vectors, lookup, use_vector_index: bool) -> VectorMemoryStore:
+    """构建并填充记忆存储，lookup 为 文本 -> 向量 映射"""
+    async def embedding_fn(text: str):
+        return lookup[text]
+
+    store = VectorMemoryStore(
+        max_memories=len(vectors) + 1,
+        embedding_fn=embedding_fn,
+        use_vector_index=use_vector_index,
+    )
+    for i, vector in enumerate(vectors):
+        text = f"memory-{i}"
+        lookup[text] = vector
+        await store.store(key=text, value=text)
+
+    return store
+
+
+async def run_vector_search_benchmarks(sizes, dim: int, queries: int, top_k: int):
+    """运行语义检索基准测试"""
+    query_vectors = make_vectors(queries, dim, seed=7)
+
+    print("=" * 60)
+    print(f"Vector Search Benchmark (dim={dim}, top_k={top_k})")
+    print("=" * 60)
+
+    for size in sizes:
+        vectors = make_vectors(size, dim)
+        lookup = {f"query-{i}": vector for i, vector in enumerate(query_vectors)}
+        row = {}
+
+        for path, use_index in (("python", False), ("matrix", True)):
+            store = await build_store(vectors, lookup, use_index)
+
+            counter = {"i": 0}
+
+            async def search():
+                i = counter["i"] % queries
+                counter["i"] += 1
+                await store.semantic_search(f"query-{i}", top_k=top_k, min_similarity=-1.0)
+
+            benchmark = Benchmark(f"semantic_search_{path}_{size}", warmup_iterations=1)
+            row[path] = await benchmark.run(search, iterations=queries)
+
+        speedup = row["python"].avg_time_ms / max(row["matrix"].avg_time_ms, 1e-9)
+        print(
+            f"N={size:>7}: python={row['python'].avg_time_ms:9.2f}ms  "
+            f"matrix={row['matrix'].avg_time_ms:7.3f}ms  speedup={speedup:7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VectorMemoryStore semantic search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(run_vector_search_benchmarks(args.sizes, args.dim, args.queries, args.top_k))
+
+
+if __name__ == "__main__":
+    main()
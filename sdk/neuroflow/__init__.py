@@ -33,6 +33,11 @@ from .agent.ai_native_agent import (
     AINativeAgentConfig,
     create_agent,
 )
+from .agent.history import (
+    HistoryConfig,
+    ConversationHistory,
+)
+from .agent.sessions import SessionStore
 
 # LLM 相关
 from .orchestrator.llm_client import (
@@ -40,13 +45,30 @@ from .orchestrator.llm_client import (
     LLMConfig,
     Message,
     LLMResponse,
+    LLMStreamChunk,
     LLMClient,
 )
 
+from .orchestrator.response_cache import (
+    ResponseCache,
+)
+
+from .orchestrator.scheduler import (
+    ProviderLimits,
+    SchedulerConfig,
+    LLMScheduler,
+)
+
+from .orchestrator.tool_graph import (
+    ToolGraph,
+    ToolGraphExecutor,
+)
+
 from .orchestrator.llm_orchestrator import (
     OrchestratorMode,
     OrchestratorConfig,
     TurnResult,
+    StreamEvent,
     LLMOrchestrator,
 )
 
@@ -123,16 +145,27 @@ __all__ = [
     "AINativeAgent",
     "AINativeAgentConfig",
     "create_agent",
+    "HistoryConfig",
+    "ConversationHistory",
+    "SessionStore",
     
     # LLM
     "LLMProvider",
     "LLMConfig",
     "Message",
     "LLMResponse",
+    "LLMStreamChunk",
     "LLMClient",
+    "ResponseCache",
+    "ProviderLimits",
+    "SchedulerConfig",
+    "LLMScheduler",
+    "ToolGraph",
+    "ToolGraphExecutor",
     "OrchestratorMode",
     "OrchestratorConfig",
     "TurnResult",
+    "StreamEvent",
     "LLMOrchestrator",
     
     # Tools
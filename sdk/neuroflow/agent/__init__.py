@@ -9,10 +9,26 @@ from .ai_native_agent import (
     AINativeAgentConfig,
     create_agent,
 )
+from .history import (
+    count_message_tokens,
+    HistoryConfig,
+    ConversationHistory,
+)
+from .sessions import (
+    DEFAULT_SESSION_ID,
+    AgentSession,
+    SessionStore,
+)
 
 
 __all__ = [
     "AINativeAgent",
     "AINativeAgentConfig",
     "create_agent",
+    "count_message_tokens",
+    "HistoryConfig",
+    "ConversationHistory",
+    "DEFAULT_SESSION_ID",
+    "AgentSession",
+    "SessionStore",
 ]
@@ -5,10 +5,11 @@ NeuroFlow Python SDK - AI Native Agent
 1. 自主工具使用 - LLM 自主决定使用 MCP/Skills/Tools
 2. 记忆管理 - 长短期记忆支持
 3. 工具装饰器 - 简单的工具注册方式
+4. 多会话 - 同一个 Agent 按 session_id 隔离各会话的对话历史和记忆
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import asyncio
 import logging
 import inspect
@@ -17,6 +18,7 @@ import functools
 from ..orchestrator import (
     LLMClient,
     LLMConfig,
+    LLMScheduler,
     Message,
     LLMOrchestrator,
     OrchestratorConfig,
@@ -26,6 +28,7 @@ from ..tools import (
     UnifiedToolRegistry,
     ToolDefinition,
     ToolParameter,
+    ToolResult,
     ToolSource,
     ToolExecutionMode,
     LocalFunctionExecutor,
@@ -33,6 +36,9 @@ from ..tools import (
     SkillExecutor,
 )
 
+from .history import ConversationHistory, HistoryConfig
+from .sessions import DEFAULT_SESSION_ID, AgentSession, SessionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,11 +48,15 @@ class AINativeAgentConfig:
     name: str
     description: str = ""
     llm_config: Optional[LLMConfig] = None
+    llm_scheduler: Optional[LLMScheduler] = None  # 多个 Agent 共享时统一限速和排队
+    history_config: Optional[HistoryConfig] = None  # 对话历史的 token 预算和压缩策略
     orchestrator_config: Optional[OrchestratorConfig] = None
     kernel_endpoint: str = "http://localhost:8080"
     mcp_endpoint: str = "http://localhost:8081"
     enable_memory: bool = True
     max_memory_items: int = 100
+    max_sessions: int = 10000  # 会话存储容量，超出时淘汰最久未活跃的会话
+    session_idle_seconds: Optional[float] = None  # 空闲超时后清理会话，None 表示不超时
 
 
 class AINativeAgent:
@@ -57,6 +67,8 @@ class AINativeAgent:
     1. 自主工具使用 - LLM 自主决定使用工具
     2. 统一工具接口 - 支持 Local/MCP/Skills
     3. 记忆管理 - 简单的键值记忆
+    4. 多会话 - 工具注册表、执行器和 LLM 客户端在会话间共享，
+       每个会话有独立的对话历史和记忆 (不传 session_id 时使用 ID 为 "default" 的默认会话)
     
     用法:
         agent = AINativeAgent(
@@ -71,13 +83,17 @@ class AINativeAgent:
         
         result = await agent.handle("帮我问候张三")
         print(result["response"])
+        
+        # 为多个用户服务
+        await agent.handle("你好", session_id="user-42")
+        agent.get_session_stats()  # {"live_sessions": 1, ...}
     """
     
     def __init__(self, config: AINativeAgentConfig):
         self.config = config
         
         # 初始化 LLM 客户端
-        self.llm = LLMClient(config.llm_config or LLMConfig())
+        self.llm = LLMClient(config.llm_config or LLMConfig(), scheduler=config.llm_scheduler)
         
         # 初始化工具注册表和执行器
         self.tool_registry = UnifiedToolRegistry()
@@ -90,11 +106,29 @@ class AINativeAgent:
             config=config.orchestrator_config,
         )
         
-        # 记忆存储
-        self._memory: Dict[str, Any] = {}
+        # 会话存储 (每个会话的对话历史和记忆)
+        self._sessions = SessionStore(config.max_sessions, config.session_idle_seconds)
         
-        # 对话历史
-        self._conversation_history: List[Message] = []
+        # 默认会话，不传 session_id 时使用；以 DEFAULT_SESSION_ID 常驻在会话存储中
+        self._default_session = self._create_session(DEFAULT_SESSION_ID)
+        self._sessions.pin(self._default_session)
+        self._history = self._default_session.history
+        self._memory = self._default_session.memory
+    
+    def _create_session(self, session_id: str) -> AgentSession:
+        """创建会话 (对话历史超出 token 预算时压缩)"""
+        return AgentSession(
+            session_id,
+            ConversationHistory(self.config.history_config, llm=self.llm),
+        )
+    
+    def _session(self, session_id: Optional[str]) -> AgentSession:
+        """获取会话，不存在时创建"""
+        return self._sessions.get_or_create(session_id or DEFAULT_SESSION_ID, self._create_session)
+    
+    def _find_session(self, session_id: Optional[str]) -> Optional[AgentSession]:
+        """获取已有会话，不创建"""
+        return self._sessions.get(session_id or DEFAULT_SESSION_ID)
     
     def _setup_tool_executors(self):
         """设置工具执行器"""
@@ -121,14 +155,30 @@ class AINativeAgent:
     
     # ========== 装饰器方法 ==========
     
-    def tool(self, name: Optional[str] = None, description: str = ""):
+    def tool(
+        self,
+        name: Optional[str] = None,
+        description: str = "",
+        cacheable: bool = False,
+        cache_ttl_seconds: Optional[float] = None,
+    ):
         """
         工具装饰器
         
+        Args:
+            name: 工具名，默认使用函数名
+            description: 工具描述
+            cacheable: 幂等、只读的工具，相同参数的调用复用结果
+            cache_ttl_seconds: 结果缓存时间，None 表示不过期
+        
         用法:
             @agent.tool(name="calculate", description="数学计算器")
             async def calculate(self, expression: str) -> float:
                 return eval(expression)
+            
+            @agent.tool(name="lookup", description="查询用户信息", cacheable=True, cache_ttl_seconds=60)
+            async def lookup(self, user_id: str) -> dict:
+                ...
         """
         def decorator(func):
             tool_name = name or func.__name__
@@ -172,6 +222,8 @@ class AINativeAgent:
                 description=description,
                 source=ToolSource.LOCAL_FUNCTION,
                 parameters=parameters,
+                cacheable=cacheable,
+                cache_ttl_seconds=cache_ttl_seconds,
             )
             
             # 注册工具
@@ -193,57 +245,135 @@ class AINativeAgent:
     
     # ========== 核心处理方法 ==========
     
-    async def handle(self, user_message: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def handle(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         处理用户请求 - 主入口
         
         Args:
             user_message: 用户消息
             context: 上下文信息
+            session_id: 会话 ID，不同会话的对话历史互不影响；同一会话的请求串行处理
             
         Returns:
             响应字典
         """
-        # 添加到对话历史
-        self._conversation_history.append(Message.user(user_message))
-        
-        try:
-            # 使用 LLM 编排器处理
-            result = await self.orchestrator.execute(
-                user_message=user_message,
-                conversation_history=self._conversation_history[:-1],
-            )
-            
-            # 记录回复
-            self._conversation_history.append(Message.assistant(result.final_response))
-            
-            return {
-                "response": result.final_response,
-                "tool_results": [
-                    {
-                        "tool": r.call_id, 
-                        "result": r.result, 
-                        "success": r.success,
-                        "error": r.error,
-                    }
-                    for r in result.tool_results
-                ],
-                "turns_taken": result.turns_taken,
-                "success": True,
-            }
-        except Exception as e:
-            logger.exception(f"Error handling message: {e}")
-            return {
-                "response": f"Error: {str(e)}",
-                "tool_results": [],
-                "turns_taken": 0,
-                "success": False,
-                "error": str(e),
-            }
+        session = self._session(session_id)
+        async with session.lock:
+            try:
+                # 使用 LLM 编排器处理
+                result = await self.orchestrator.execute(
+                    user_message=user_message,
+                    conversation_history=await self._prepare_history(session.history, user_message),
+                )
+                
+                # 记录回复
+                session.history.append(Message.assistant(result.final_response))
+                
+                return self._result_payload(result)
+            except Exception as e:
+                logger.exception(f"Error handling message: {e}")
+                return self._error_payload(e)
+            finally:
+                session.touch()
+    
+    async def handle_stream(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式处理用户请求
+        
+        依次产出事件字典:
+        - {"type": "token", "content": 文本增量}
+        - {"type": "tool_call", "tool": 工具名, "call_id": ..., "arguments": {...}}
+        - {"type": "tool_result", "tool": call_id, "result": ..., "success": ..., "error": ...}
+        - {"type": "done", ...}，其余字段与 handle() 的返回值相同
+        
+        用法:
+            async for event in agent.handle_stream("帮我查一下天气"):
+                if event["type"] == "token":
+                    print(event["content"], end="", flush=True)
+        """
+        session = self._session(session_id)
+        async with session.lock:
+            try:
+                async for event in self.orchestrator.execute_stream(
+                    user_message=user_message,
+                    conversation_history=await self._prepare_history(session.history, user_message),
+                ):
+                    if event.type == "token":
+                        yield {"type": "token", "content": event.content}
+                    elif event.type == "tool_call":
+                        yield {
+                            "type": "tool_call",
+                            "tool": event.tool_call.tool_name,
+                            "call_id": event.tool_call.call_id,
+                            "arguments": event.tool_call.arguments,
+                        }
+                    elif event.type == "tool_result":
+                        yield {"type": "tool_result", **self._tool_result_payload(event.tool_result)}
+                    elif event.type == "done":
+                        session.history.append(Message.assistant(event.result.final_response))
+                        yield {"type": "done", **self._result_payload(event.result)}
+            except Exception as e:
+                logger.exception(f"Error handling message: {e}")
+                yield {"type": "done", **self._error_payload(e)}
+            finally:
+                session.touch()
+    
+    @staticmethod
+    async def _prepare_history(history: ConversationHistory, user_message: str) -> List[Message]:
+        """记录用户消息，按预算压缩历史，返回回放给 LLM 的历史 (不含本条用户消息)"""
+        history.append(Message.user(user_message))
+        await history.compact()
+        return history.messages()[:-1]
+    
+    @staticmethod
+    def _tool_result_payload(r: ToolResult) -> Dict[str, Any]:
+        """工具结果转换为响应字典项"""
+        return {
+            "tool": r.call_id, 
+            "result": r.result, 
+            "success": r.success,
+            "error": r.error,
+        }
+    
+    def _result_payload(self, result: TurnResult) -> Dict[str, Any]:
+        """执行结果转换为响应字典"""
+        return {
+            "response": result.final_response,
+            "tool_results": [self._tool_result_payload(r) for r in result.tool_results],
+            "turns_taken": result.turns_taken,
+            "success": True,
+        }
+    
+    @staticmethod
+    def _error_payload(e: Exception) -> Dict[str, Any]:
+        """异常转换为响应字典"""
+        return {
+            "response": f"Error: {str(e)}",
+            "tool_results": [],
+            "turns_taken": 0,
+            "success": False,
+            "error": str(e),
+        }
     
     # ========== 记忆管理方法 ==========
     
-    def store_memory(self, key: str, value: Any, tags: Optional[List[str]] = None) -> None:
+    def store_memory(
+        self,
+        key: str,
+        value: Any,
+        tags: Optional[List[str]] = None,
+        session_id: Optional[str] = None,
+    ) -> None:
         """
         存储记忆
         
@@ -251,29 +381,33 @@ class AINativeAgent:
             key: 记忆键
             value: 记忆值
             tags: 标签列表
+            session_id: 会话 ID，None 表示默认会话
         """
         if not self.config.enable_memory:
             return
         
+        memory = self._session(session_id).memory
+        
         # 检查记忆数量限制
-        if len(self._memory) >= self.config.max_memory_items:
+        if len(memory) >= self.config.max_memory_items:
             # 移除最旧的记忆
-            oldest_key = next(iter(self._memory))
-            del self._memory[oldest_key]
+            oldest_key = next(iter(memory))
+            del memory[oldest_key]
         
-        self._memory[key] = {
+        memory[key] = {
             "value": value,
             "tags": tags or [],
         }
         
         logger.debug(f"Stored memory: {key}")
     
-    def retrieve_memory(self, key: str) -> Optional[Any]:
+    def retrieve_memory(self, key: str, session_id: Optional[str] = None) -> Optional[Any]:
         """
         检索记忆
         
         Args:
             key: 记忆键
+            session_id: 会话 ID，None 表示默认会话
             
         Returns:
             记忆值
@@ -281,15 +415,19 @@ class AINativeAgent:
         if not self.config.enable_memory:
             return None
         
-        entry = self._memory.get(key)
+        session = self._find_session(session_id)
+        if session is None or not session.has_memory:
+            return None
+        entry = session.memory.get(key)
         return entry["value"] if entry else None
     
-    def search_memories(self, tags: List[str]) -> List[Any]:
+    def search_memories(self, tags: List[str], session_id: Optional[str] = None) -> List[Any]:
         """
         根据标签搜索记忆
         
         Args:
             tags: 标签列表
+            session_id: 会话 ID，None 表示默认会话
             
         Returns:
             记忆值列表
@@ -297,15 +435,21 @@ class AINativeAgent:
         if not self.config.enable_memory:
             return []
         
+        session = self._find_session(session_id)
+        if session is None or not session.has_memory:
+            return []
+        
         results = []
-        for entry in self._memory.values():
+        for entry in session.memory.values():
             if any(tag in entry.get("tags", []) for tag in tags):
                 results.append(entry["value"])
         return results
     
-    def clear_memory(self) -> None:
+    def clear_memory(self, session_id: Optional[str] = None) -> None:
         """清空记忆"""
-        self._memory.clear()
+        session = self._find_session(session_id)
+        if session is not None and session.has_memory:
+            session.memory.clear()
     
     # ========== 工具管理方法 ==========
     
@@ -332,28 +476,66 @@ class AINativeAgent:
     
     # ========== 对话历史管理 ==========
     
-    def get_conversation_history(self) -> List[Dict[str, Any]]:
+    def get_conversation_history(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """获取对话历史"""
-        return [m.to_dict() for m in self._conversation_history]
+        session = self._find_session(session_id)
+        if session is None:
+            return []
+        return [m.to_dict() for m in session.history.messages()]
+    
+    def get_history_stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """获取对话历史的 token 用量和压缩统计"""
+        session = self._find_session(session_id)
+        if session is None:
+            return {}
+        return session.history.get_stats()
     
-    def clear_conversation_history(self) -> None:
+    def clear_conversation_history(self, session_id: Optional[str] = None) -> None:
         """清空对话历史"""
-        self._conversation_history.clear()
+        session = self._find_session(session_id)
+        if session is not None:
+            session.history.clear()
     
-    def set_system_prompt(self, prompt: str) -> None:
+    def set_system_prompt(self, prompt: str, session_id: Optional[str] = None) -> None:
         """
         设置系统提示词
         
         这会替换当前的系统提示词
         """
+        history = self._session(session_id).history
+        
         # 移除旧的系统消息
-        self._conversation_history = [
-            m for m in self._conversation_history 
-            if m.role != "system"
-        ]
+        history.remove_role("system")
         
         # 添加新的系统消息
-        self._conversation_history.insert(0, Message.system(prompt))
+        history.insert(0, Message.system(prompt))
+    
+    # ========== 会话管理 ==========
+    
+    def end_session(self, session_id: str) -> bool:
+        """
+        结束会话，释放其对话历史和记忆 (默认会话只清空，不移除)
+        
+        Returns:
+            会话是否存在
+        """
+        if session_id == DEFAULT_SESSION_ID:
+            self._default_session.history.clear()
+            self.clear_memory()
+            return True
+        return self._sessions.remove(session_id)
+    
+    def list_sessions(self) -> List[str]:
+        """列出存活的会话 ID (按活跃时间从旧到新)"""
+        return [s.session_id for s in self._sessions]
+    
+    def get_session_stats(self) -> Dict[str, Any]:
+        """获取会话统计 (存活会话数、处理中会话数、淘汰/超时清理数、历史 token 总量)"""
+        return self._sessions.get_stats()
+    
+    async def aclose(self) -> None:
+        """释放 LLM 客户端的连接池"""
+        await self.llm.aclose()
 
 
 # ========== 便捷创建函数 ==========
@@ -0,0 +1,224 @@
+"""
+NeuroFlow Python SDK - Conversation History
+
+对话历史管理 - 按 token 预算压缩历史：保留最近的消息窗口，更早的消息总结为摘要
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+
+from ..orchestrator import LLMClient, Message
+from ..tools.protocol import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 每条消息的固定开销 (角色、分隔符等)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_SUMMARY_PREFIX = "以下是更早对话的摘要：\n"
+
+_SUMMARY_PROMPT = """请将下面的对话内容总结为简洁的摘要，保留用户的目标、偏好、已确认的事实和尚未完成的事项，
+不要编造对话中没有的信息。摘要不超过 {max_tokens} 个 token。"""
+
+
+def count_message_tokens(message: Message) -> int:
+    """估算单条消息的 token 数 (内容 + 工具调用 + 固定开销)"""
+    tokens = _MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.content or "")
+    if message.tool_calls:
+        tokens += estimate_tokens(json.dumps(message.tool_calls, default=str))
+    return tokens
+
+
+@dataclass
+class HistoryConfig:
+    """对话历史管理配置"""
+    max_tokens: Optional[int] = None     # 回放给 LLM 的历史 token 预算，None 表示不压缩
+    target_ratio: float = 0.6            # 压缩后历史占预算的比例，留出余量避免每轮都压缩
+    keep_recent_messages: int = 4        # 无论预算如何都保留的最近消息数
+    summarize: bool = True               # 滑出窗口的消息是否总结为摘要 (否则直接丢弃)
+    summary_max_tokens: int = 300        # 摘要的最大 token 数
+    pinned_roles: Tuple[str, ...] = ("system", "tool")  # 这些角色的消息始终保留，不参与压缩
+    token_counter: Callable[[Message], int] = field(default=count_message_tokens)
+
+
+class ConversationHistory:
+    """
+    按 token 预算管理的对话历史
+
+    - 每条消息写入时计算一次 token 数
+    - 总量超过 max_tokens 时，从最新的消息往前保留窗口，直到达到 max_tokens * target_ratio
+      (至少保留 keep_recent_messages 条)；更早的消息通过 LLMClient 合并进滚动摘要
+    - pinned_roles 中角色的消息 (默认 system/tool，固定 tool 时也固定对应的工具调用消息)
+      和 append(..., pinned=True) 的消息始终保留
+    - 窗口从用户消息开始，不会从工具结果或其所属的工具调用中间切开
+
+    用法:
+        history = ConversationHistory(HistoryConfig(max_tokens=4000), llm=client)
+        history.append(Message.user("你好"))
+        await history.compact()
+        messages = history.messages()
+    """
+
+    def __init__(self, config: Optional[HistoryConfig] = None, llm: Optional[LLMClient] = None):
+        """
+        Args:
+            config: 历史管理配置
+            llm: 用于生成摘要的 LLM 客户端，不设置时滑出窗口的消息直接丢弃
+        """
+        self.config = config or HistoryConfig()
+        self.llm = llm
+
+        # (消息, token 数, 是否固定)
+        self._entries: List[Tuple[Message, int, bool]] = []
+        self._summary: Optional[Message] = None
+        self._summary_tokens = 0
+
+        # 统计
+        self._compactions = 0
+        self._messages_compacted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_tokens(self) -> int:
+        """当前历史 (含摘要) 的 token 数"""
+        return self._summary_tokens + sum(tokens for _, tokens, _ in self._entries)
+
+    @property
+    def summary(self) -> Optional[str]:
+        """当前摘要文本"""
+        return self._summary.content[len(_SUMMARY_PREFIX):] if self._summary else None
+
+    def append(self, message: Message, pinned: bool = False) -> None:
+        """追加消息，pinned=True 时该消息不会被压缩"""
+        pinned = pinned or self._is_pinned(message)
+        self._entries.append((message, self.config.token_counter(message), pinned))
+
+    def _is_pinned(self, message: Message) -> bool:
+        """固定角色的消息；固定工具结果时，发起工具调用的助手消息也一并固定"""
+        roles = self.config.pinned_roles
+        return message.role in roles or bool(message.tool_calls and "tool" in roles)
+
+    def messages(self) -> List[Message]:
+        """
+        发送给 LLM 的消息：摘要并入开头的系统消息，之后是其余保留的消息
+
+        摘要不单独作为一条系统消息，否则只保留最后一条系统消息的提供商 (Anthropic)
+        会用摘要替换掉系统提示词
+        """
+        result = [message for message, _, _ in self._entries]
+        if self._summary is not None:
+            leading = 0
+            while leading < len(result) and result[leading].role == "system":
+                leading += 1
+            if leading:
+                prompt = result[leading - 1]
+                result[leading - 1] = Message.system(f"{prompt.content}\n\n{self._summary.content}")
+            else:
+                result.insert(0, self._summary)
+        return result
+
+    def remove_role(self, role: str) -> None:
+        """删除某个角色的所有消息"""
+        self._entries = [entry for entry in self._entries if entry[0].role != role]
+
+    def insert(self, index: int, message: Message, pinned: bool = False) -> None:
+        """在指定位置插入消息"""
+        pinned = pinned or self._is_pinned(message)
+        self._entries.insert(index, (message, self.config.token_counter(message), pinned))
+
+    def clear(self) -> None:
+        """清空历史和摘要"""
+        self._entries.clear()
+        self._summary = None
+        self._summary_tokens = 0
+
+    async def compact(self) -> int:
+        """
+        超出预算时压缩历史
+
+        Returns:
+            被移出窗口的消息数
+        """
+        budget = self.config.max_tokens
+        if budget is None or self.total_tokens <= budget:
+            return 0
+
+        target = int(budget * self.config.target_ratio)
+        used = self._summary_tokens + sum(tokens for _, tokens, pinned in self._entries if pinned)
+
+        # 从最新的消息往前确定窗口的起点
+        start = len(self._entries)
+        kept = 0
+        while start > 0:
+            message, tokens, pinned = self._entries[start - 1]
+            if not pinned:
+                if kept >= self.config.keep_recent_messages and used + tokens > target:
+                    break
+                used += tokens
+                kept += 1
+            start -= 1
+
+        # 窗口从用户消息开始：以工具结果开头会缺少对应的工具调用，
+        # 以助手消息开头会被 Anthropic 拒绝 (第一条消息必须来自用户)
+        while start < len(self._entries) and self._entries[start][0].role != "user":
+            start += 1
+
+        evicted = [message for message, _, pinned in self._entries[:start] if not pinned]
+        if not evicted:
+            return 0
+
+        if self.config.summarize and self.llm is not None:
+            await self._summarize(evicted)
+
+        self._entries = [
+            entry for i, entry in enumerate(self._entries) if i >= start or entry[2]
+        ]
+        self._compactions += 1
+        self._messages_compacted += len(evicted)
+        logger.debug(f"Compacted {len(evicted)} messages, history now {self.total_tokens} tokens")
+        return len(evicted)
+
+    async def _summarize(self, evicted: List[Message]) -> None:
+        """把移出窗口的消息合并进滚动摘要，失败时保留旧摘要"""
+        lines = []
+        if self._summary is not None:
+            lines.append(f"[已有摘要] {self.summary}")
+        for message in evicted:
+            if message.content:
+                lines.append(f"[{message.role}] {message.content}")
+
+        try:
+            response = await self.llm.chat(
+                messages=[
+                    Message.system(_SUMMARY_PROMPT.format(max_tokens=self.config.summary_max_tokens)),
+                    Message.user("\n".join(lines)),
+                ],
+                max_tokens=self.config.summary_max_tokens,
+            )
+        except Exception as e:
+            logger.warning(f"History summarization failed, dropping old messages: {e}")
+            return
+
+        self._summary = Message.system(_SUMMARY_PREFIX + response.content)
+        self._summary_tokens = self.config.token_counter(self._summary)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "messages": len(self._entries),
+            "total_tokens": self.total_tokens,
+            "summary_tokens": self._summary_tokens,
+            "compactions": self._compactions,
+            "messages_compacted": self._messages_compacted,
+        }
+
+
+__all__ = [
+    "count_message_tokens",
+    "HistoryConfig",
+    "ConversationHistory",
+]
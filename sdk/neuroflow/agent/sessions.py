@@ -0,0 +1,181 @@
+"""
+NeuroFlow Python SDK - Agent Sessions
+
+会话存储 - 一个 Agent 同时服务多个会话，工具注册表、执行器和 LLM 客户端在会话间共享，
+每个会话只保存自己的对话历史和记忆
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+import asyncio
+import logging
+import time
+
+from .history import ConversationHistory
+
+logger = logging.getLogger(__name__)
+
+# 不传 session_id 时使用的会话
+DEFAULT_SESSION_ID = "default"
+
+
+class AgentSession:
+    """
+    单个会话的状态
+
+    使用 __slots__，记忆字典在首次写入时才创建，空闲会话只占用很少内存。
+    同一会话的请求通过 lock 串行处理，避免对话历史交错。
+    """
+
+    __slots__ = ("session_id", "history", "_memory", "lock", "created_at", "last_active")
+
+    def __init__(self, session_id: str, history: ConversationHistory):
+        self.session_id = session_id
+        self.history = history
+        self._memory: Optional[Dict[str, Any]] = None
+        self.lock = asyncio.Lock()
+        self.created_at = time.time()
+        self.last_active = self.created_at
+
+    @property
+    def memory(self) -> Dict[str, Any]:
+        """会话记忆 (首次访问时创建)"""
+        if self._memory is None:
+            self._memory = {}
+        return self._memory
+
+    @property
+    def has_memory(self) -> bool:
+        """是否已有记忆"""
+        return bool(self._memory)
+
+    def touch(self) -> None:
+        """更新最近活跃时间"""
+        self.last_active = time.time()
+
+
+class SessionStore:
+    """
+    LRU 会话存储
+
+    - 超过 max_sessions 时淘汰最久未活跃的会话
+    - 设置 idle_ttl_seconds 后，空闲超时的会话在下次访问存储时清理
+    - 正在处理请求 (lock 被持有) 的会话不会被淘汰
+    - pin() 注册的会话 (如 Agent 的默认会话) 常驻，不计入容量，不会被淘汰、超时清理或移除
+
+    用法:
+        store = SessionStore(max_sessions=10000, idle_ttl_seconds=1800)
+        session = store.get_or_create("user-42", lambda sid: AgentSession(sid, ConversationHistory()))
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_seconds: Optional[float] = None):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions: "OrderedDict[str, AgentSession]" = OrderedDict()
+        self._pinned: Set[str] = set()
+
+        # 统计
+        self._created = 0
+        self._evicted = 0
+        self._expired = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[AgentSession]:
+        return iter(list(self._sessions.values()))
+
+    def get(self, session_id: str) -> Optional[AgentSession]:
+        """获取会话并标记为最近活跃"""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(
+        self,
+        session_id: str,
+        factory: Callable[[str], AgentSession],
+    ) -> AgentSession:
+        """获取会话，不存在时用 factory(session_id) 创建"""
+        session = self.get(session_id)
+        if session is not None:
+            return session
+
+        session = factory(session_id)
+        self._sessions[session_id] = session
+        self._created += 1
+        self._evict()
+        return session
+
+    def pin(self, session: AgentSession) -> None:
+        """注册常驻会话"""
+        self._sessions[session.session_id] = session
+        self._pinned.add(session.session_id)
+
+    def remove(self, session_id: str) -> bool:
+        """结束会话 (常驻会话不会被移除)"""
+        if session_id in self._pinned:
+            return False
+        return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self) -> None:
+        """清理空闲超时的会话 (按活跃时间从旧到新，遇到未超时的即停止)"""
+        if self.idle_ttl_seconds is None:
+            return
+        deadline = time.time() - self.idle_ttl_seconds
+        for session_id, session in list(self._sessions.items()):
+            if session.last_active > deadline:
+                break
+            if session.lock.locked() or session_id in self._pinned:
+                continue
+            del self._sessions[session_id]
+            self._expired += 1
+
+    def _evict(self) -> None:
+        """超出容量时淘汰最久未活跃且空闲的会话"""
+        excess = len(self._sessions) - len(self._pinned) - self.max_sessions
+        if excess <= 0:
+            return
+        for session_id, session in list(self._sessions.items()):
+            if excess <= 0:
+                break
+            if session.lock.locked() or session_id in self._pinned:
+                continue
+            del self._sessions[session_id]
+            self._evicted += 1
+            excess -= 1
+        if excess > 0:
+            logger.warning(f"Session store over capacity: {len(self._sessions)} busy sessions")
+
+    def clear(self) -> None:
+        """清空所有会话 (常驻会话除外)"""
+        for session_id in list(self._sessions):
+            if session_id not in self._pinned:
+                del self._sessions[session_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        sessions = list(self._sessions.values())
+        return {
+            "live_sessions": len(sessions),
+            "active_sessions": sum(1 for s in sessions if s.lock.locked()),
+            "max_sessions": self.max_sessions,
+            "created": self._created,
+            "evicted": self._evicted,
+            "expired": self._expired,
+            "history_tokens": sum(s.history.total_tokens for s in sessions),
+            "sessions_with_memory": sum(1 for s in sessions if s.has_memory),
+        }
+
+
+__all__ = [
+    "DEFAULT_SESSION_ID",
+    "AgentSession",
+    "SessionStore",
+]
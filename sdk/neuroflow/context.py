@@ -2,9 +2,12 @@ from typing import Optional, Dict, Any, List
 from contextvars import ContextVar
 import uuid
 import json
+import time
 from datetime import datetime
 from enum import Enum
 
+from .memory.expiry import TimingWheel, ExpirySweeper
+
 class MemoryType(Enum):
     SHORT_TERM = "short_term"
     LONG_TERM = "long_term"
@@ -45,16 +48,24 @@ class MemoryEntry:
 
 class MemoryManager:
     """记忆管理器"""
-    def __init__(self):
+    def __init__(self, sweep_interval: float = 1.0):
         self._memory_store: Dict[str, MemoryEntry] = {}
         self._recent_access: List[str] = []  # 最近访问的记忆键
         self._max_recent_items = 100
+        
+        # 过期时间轮和后台清理任务
+        self._expiry_wheel = TimingWheel()
+        self._sweeper = ExpirySweeper(self._expiry_wheel, self._reclaim_expired, interval=sweep_interval)
     
     def store(self, key: str, value: Any, memory_type: MemoryType = MemoryType.SHORT_TERM, 
               tags: List[str] = None, importance: float = 0.5, ttl_seconds: Optional[int] = None):
         """存储记忆"""
         entry = MemoryEntry(key, value, memory_type, tags, importance, ttl_seconds)
         self._memory_store[key] = entry
+        if ttl_seconds is None:
+            self._expiry_wheel.cancel(key)
+        else:
+            self._expiry_wheel.schedule(key, time.time() + ttl_seconds)
         
         # 添加到最近访问列表
         self._recent_access.append(key)
@@ -66,7 +77,7 @@ class MemoryManager:
         if key in self._memory_store:
             entry = self._memory_store[key]
             if entry.is_expired():
-                del self._memory_store[key]
+                self.delete(key)
                 return None
             
             entry.access_count += 1
@@ -108,6 +119,7 @@ class MemoryManager:
         """删除记忆"""
         if key in self._memory_store:
             del self._memory_store[key]
+            self._expiry_wheel.cancel(key)
             if key in self._recent_access:
                 self._recent_access.remove(key)
             return True
@@ -121,9 +133,34 @@ class MemoryManager:
                 expired_keys.append(key)
         
         for key in expired_keys:
-            del self._memory_store[key]
-            if key in self._recent_access:
-                self._recent_access.remove(key)
+            self.delete(key)
+    
+    def _reclaim_expired(self, keys: List[str]) -> int:
+        """删除时间轮报告到期的记忆"""
+        reclaimed = 0
+        for key in keys:
+            entry = self._memory_store.get(key)
+            if entry is None:
+                continue
+            if entry.is_expired():
+                self.delete(key)
+                reclaimed += 1
+            else:
+                elapsed = (datetime.utcnow() - entry.created_at).total_seconds()
+                self._expiry_wheel.schedule(key, time.time() + entry.ttl_seconds - elapsed)
+        return reclaimed
+    
+    def start_expiry_sweeper(self):
+        """启动后台过期清理任务（需要在事件循环中调用）"""
+        self._sweeper.start()
+    
+    async def stop_expiry_sweeper(self):
+        """停止后台过期清理任务"""
+        await self._sweeper.stop()
+    
+    def get_expiry_stats(self) -> Dict[str, Any]:
+        """获取过期清理统计"""
+        return self._sweeper.get_stats()
 
 class Context:
     """增强的请求上下文对象，支持记忆管理"""
@@ -10,20 +10,72 @@ NeuroFlow Python SDK - Memory Module
 from .vector_store import (
     MemoryType,
     MemoryEntry,
+    MemoryFilter,
     VectorMemoryStore,
 )
-from .kernel_client import (
-    KernelMemoryClient,
-    ConversationMemoryManager,
-    ConversationContext,
+from .vector_index import (
+    VectorIndex,
+    FlatVectorIndex,
+    IVFFlatIndex,
 )
+from .bm25 import (
+    BM25Index,
+)
+from .embedding_batcher import (
+    EmbeddingBatcher,
+)
+from .embedding_cache import (
+    EmbeddingCache,
+)
+from .expiry import (
+    TimingWheel,
+    ExpirySweeper,
+)
+from .persistent_store import (
+    PersistentMemoryBackend,
+)
+from .read_cache import (
+    MemoryReadCache,
+)
+
+# kernel_client 依赖 grpc 和生成的 protobuf 存根，首次访问时才导入，
+# 只用到本地记忆 (如 bm25、expiry) 的模块不因此引入这些依赖
+_KERNEL_CLIENT_NAMES = (
+    "KernelClientConfig",
+    "KernelMemoryClient",
+    "StoreBatchError",
+    "LazyMemoryEntry",
+    "ConversationMemoryManager",
+    "ConversationContext",
+)
+
+
+def __getattr__(name):
+    if name in _KERNEL_CLIENT_NAMES:
+        from . import kernel_client
+        return getattr(kernel_client, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "MemoryType",
     "MemoryEntry",
+    "MemoryFilter",
     "VectorMemoryStore",
+    "VectorIndex",
+    "FlatVectorIndex",
+    "IVFFlatIndex",
+    "BM25Index",
+    "EmbeddingBatcher",
+    "EmbeddingCache",
+    "TimingWheel",
+    "ExpirySweeper",
+    "PersistentMemoryBackend",
+    "MemoryReadCache",
+    "KernelClientConfig",
     "KernelMemoryClient",
+    "StoreBatchError",
+    "LazyMemoryEntry",
     "ConversationMemoryManager",
     "ConversationContext",
 ]
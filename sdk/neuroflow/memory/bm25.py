@@ -0,0 +1,158 @@
+"""
+NeuroFlow Python SDK - BM25 Index
+
+BM25 全文索引 - 增量维护的倒排索引，支持中英文混合文本
+"""
+
+from typing import Collection, Dict, List, Optional, Tuple
+import heapq
+import math
+import re
+
+# 中日韩字符范围：假名、CJK 统一表意文字 (含扩展 A)、谚文、兼容表意文字
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+# 连续的中日韩字符，或其它语言的单词 (下划线视为分隔符，便于匹配 user_preference 这类键)
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词
+
+    - 拉丁文本按单词切分并转为小写
+    - 中日韩文本没有空格分隔，连续字符切分为单字和相邻双字 (bigram)，
+      无需词典即可匹配任意长度的查询词
+
+        tokenize("用户喜欢 Python")  # ["用", "户", "喜", "欢", "用户", "户喜", "喜欢", "python"]
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        run = match.group()
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    BM25 倒排索引
+
+    - add(): 写入或替换文档 O(文档词数)
+    - remove(): 删除文档 O(文档词数)
+    - search(): 只遍历查询词的倒排列表，不扫描全部文档
+
+    文档频率与平均长度随增删实时更新，无需重建。
+
+    用法:
+        index = BM25Index()
+        index.add("id-1", "用户喜欢简洁的回答")
+        index.add("id-2", "the user prefers short answers")
+        index.search("简洁回答", top_k=5)  # [("id-1", 2.31)]
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {id: tf}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # id -> {term: tf}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id: str, text: str) -> None:
+        """写入文档，已存在时替换"""
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._doc_terms[doc_id] = counts
+        self._doc_lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str) -> bool:
+        """删除文档"""
+        counts = self._doc_terms.pop(doc_id, None)
+        if counts is None:
+            return False
+
+        for term in counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        candidate_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        检索
+
+        Args:
+            query: 查询文本
+            top_k: 返回数量
+            candidate_ids: 只对这些文档打分，None 表示全部
+
+        Returns:
+            按 BM25 分数降序排列的 (文档 ID，分数) 列表
+        """
+        if not self._doc_lengths or top_k <= 0:
+            return []
+
+        n_docs = len(self._doc_lengths)
+        avg_length = self._total_length / n_docs or 1.0
+        k1, b = self.k1, self.b
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                if candidate_ids is not None and doc_id not in candidate_ids:
+                    continue
+                norm = k1 * (1.0 - b + b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_lengths.clear()
+        self._total_length = 0
+
+
+__all__ = [
+    "tokenize",
+    "BM25Index",
+]
@@ -0,0 +1,134 @@
+"""
+NeuroFlow Python SDK - Embedding Batcher
+
+嵌入批处理器 - 将短时间窗口内的并发嵌入请求合并为一次批量调用
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    嵌入微批处理器
+
+    并发的 embed() 调用会被收集起来，在以下任一条件满足时合并为一次
+    batch_embedding_fn(texts) 调用:
+    1. 待处理文本数达到 max_batch_size
+    2. 第一个文本入队后等待超过 max_wait_ms
+
+    batch_embedding_fn 的签名与 MCPClient.get_embeddings 一致:
+        async def batch_embedding_fn(texts: List[str]) -> List[List[float]]
+
+    用法:
+        batcher = EmbeddingBatcher(client.get_embeddings, max_batch_size=64)
+        embedding = await batcher.embed("你好")
+        embeddings = await batcher.embed_many(["a", "b", "c"])
+    """
+
+    def __init__(
+        self,
+        batch_embedding_fn: Callable,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.batch_embedding_fn = batch_embedding_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # 统计
+        self._batches = 0
+        self._texts = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """嵌入单个文本（与其他并发请求合并）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """批量嵌入文本，按 max_batch_size 分块直接调用"""
+        results: List[List[float]] = []
+        for start in range(0, len(texts), self.max_batch_size):
+            chunk = texts[start:start + self.max_batch_size]
+            results.extend(await self._call_batch(chunk))
+        return results
+
+    async def flush(self) -> None:
+        """立即发送所有待处理请求并等待完成"""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _dispatch(self) -> None:
+        """将当前待处理请求作为一个批次发送"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """执行一个批次并分发结果"""
+        # 同一批次内相同文本只嵌入一次
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            embeddings = await self._call_batch(unique_texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    async def _call_batch(self, texts: List[str]) -> List[List[float]]:
+        """调用批量嵌入函数"""
+        embeddings = await self.batch_embedding_fn(texts)
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Batch embedding returned {len(embeddings)} vectors for {len(texts)} texts"
+            )
+
+        self._batches += 1
+        self._texts += len(texts)
+        logger.debug(f"Embedded batch of {len(texts)} texts")
+        return list(embeddings)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "batches": self._batches,
+            "texts": self._texts,
+            "avg_batch_size": self._texts / self._batches if self._batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+
+__all__ = [
+    "EmbeddingBatcher",
+]
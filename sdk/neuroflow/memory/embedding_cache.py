@@ -0,0 +1,137 @@
+"""
+NeuroFlow Python SDK - Embedding Cache
+
+嵌入缓存 - 以文本内容哈希为键的 LRU 缓存，可选持久化到磁盘
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    内容寻址的嵌入缓存
+
+    - 键为文本的 SHA-256 哈希，不保存原文
+    - 超过 max_entries 时淘汰最久未使用的条目
+    - 向量保存为 array('f')，每维 4 字节，与 MemoryEntry.embedding 一致，写入索引时无需再转换
+    - 设置 persist_path 后，创建时自动加载，调用 save() 写回磁盘
+
+    用法:
+        cache = EmbeddingCache(max_entries=50000, persist_path="~/.neuroflow/embeddings.json")
+        store = VectorMemoryStore(embedding_fn=embed, embedding_cache=cache)
+        ...
+        cache.save()
+    """
+
+    def __init__(self, max_entries: int = 10000, persist_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.persist_path = os.path.expanduser(persist_path) if persist_path else None
+
+        self._entries: "OrderedDict[str, array]" = OrderedDict()
+
+        # 统计
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.persist_path and os.path.exists(self.persist_path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """计算文本哈希"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[array]:
+        """查找缓存的嵌入向量"""
+        digest = self.hash_text(text)
+        embedding = self._entries.get(digest)
+        if embedding is None:
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self._hits += 1
+        return embedding
+
+    def put(self, text: str, embedding: Sequence[float]) -> None:
+        """写入嵌入向量 (复制为 array('f'))"""
+        digest = self.hash_text(text)
+        self._entries[digest] = array("f", embedding)
+        self._entries.move_to_end(digest)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def load(self) -> int:
+        """
+        从 persist_path 加载缓存
+
+        Returns:
+            加载的条目数
+        """
+        if not self.persist_path:
+            return 0
+
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load embedding cache: {e}")
+            return 0
+
+        # 文件按 LRU 顺序保存（最旧在前），只保留最近的 max_entries 条
+        for digest, embedding in list(data.items())[-self.max_entries:]:
+            self._entries[digest] = array("f", embedding)
+
+        logger.info(f"Loaded {len(self._entries)} cached embeddings")
+        return len(self._entries)
+
+    def save(self) -> None:
+        """原子地写入 persist_path"""
+        if not self.persist_path:
+            return
+
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({digest: embedding.tolist() for digest, embedding in self._entries.items()}, f)
+        os.replace(tmp_path, self.persist_path)
+
+        logger.debug(f"Saved {len(self._entries)} cached embeddings")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "evictions": self._evictions,
+        }
+
+
+__all__ = [
+    "EmbeddingCache",
+]
@@ -0,0 +1,87 @@
+"""
+NeuroFlow Python SDK - Eviction Queue
+
+淘汰队列 - 基于最小堆的记忆淘汰优先级结构
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+
+
+class EvictionQueue:
+    """
+    带惰性失效的最小堆
+
+    - push(): 写入或更新条目的分数 O(log n)，旧的堆节点不立即删除
+    - remove(): 标记条目失效 O(1)
+    - pop(): 弹出分数最低的有效条目，跳过失效节点，均摊 O(log n)
+
+    失效节点超过有效条目数量时自动压缩堆，保证空间为 O(n)。
+
+    用法:
+        queue = EvictionQueue()
+        queue.push("id-1", 0.8)
+        queue.push("id-2", 0.3)
+        queue.pop()  # "id-2"
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._versions: Dict[str, int] = {}  # id -> 当前有效的版本号
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._versions
+
+    def push(self, entry_id: str, score: float) -> None:
+        """写入或更新条目分数"""
+        self._counter += 1
+        self._versions[entry_id] = self._counter
+        heapq.heappush(self._heap, (score, self._counter, entry_id))
+        self._maybe_compact()
+
+    def remove(self, entry_id: str) -> bool:
+        """移除条目（惰性失效）"""
+        return self._versions.pop(entry_id, None) is not None
+
+    def pop(self) -> Optional[str]:
+        """弹出分数最低的条目，队列为空时返回 None"""
+        while self._heap:
+            _, version, entry_id = heapq.heappop(self._heap)
+            if self._versions.get(entry_id) == version:
+                del self._versions[entry_id]
+                return entry_id
+        return None
+
+    def rebuild(self, scores: Iterable[Tuple[str, float]]) -> None:
+        """用一组新分数重建堆 O(n)"""
+        self._heap = []
+        self._versions = {}
+        for entry_id, score in scores:
+            self._counter += 1
+            self._versions[entry_id] = self._counter
+            self._heap.append((score, self._counter, entry_id))
+        heapq.heapify(self._heap)
+
+    def clear(self) -> None:
+        """清空队列"""
+        self._heap.clear()
+        self._versions.clear()
+
+    def _maybe_compact(self) -> None:
+        """失效节点过多时压缩堆"""
+        if len(self._heap) <= 2 * len(self._versions) + 64:
+            return
+        self._heap = [
+            node for node in self._heap
+            if self._versions.get(node[2]) == node[1]
+        ]
+        heapq.heapify(self._heap)
+
+
+__all__ = [
+    "EvictionQueue",
+]
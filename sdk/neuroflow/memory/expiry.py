@@ -0,0 +1,216 @@
+"""
+NeuroFlow Python SDK - Memory Expiry
+
+过期管理 - 时间轮 + 后台清理任务
+- TimingWheel: 哈希时间轮，O(1) 调度/取消，到期检查均摊 O(1)
+- ExpirySweeper: 周期性推进时间轮并回收到期条目的后台任务
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """
+    哈希时间轮
+
+    时间被划分为 tick_seconds 长度的刻度，条目按到期刻度放入
+    num_slots 个槽位之一 (tick % num_slots)。推进时只检查经过的槽位，
+    到期时间超过一圈的条目会在之后的轮次中再次被检查。
+
+    用法:
+        wheel = TimingWheel(tick_seconds=1.0)
+        wheel.schedule("id-1", time.time() + 60)
+        expired = wheel.advance(time.time())  # 到期的键列表
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        num_slots: int = 512,
+        start_time: Optional[float] = None,
+    ):
+        self.tick_seconds = tick_seconds
+        self.num_slots = max(1, num_slots)
+
+        self._slots: List[Dict[Hashable, float]] = [{} for _ in range(self.num_slots)]
+        self._locations: Dict[Hashable, int] = {}  # key -> slot
+        self._current_tick = self._tick_of(time.time() if start_time is None else start_time)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations
+
+    def _tick_of(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """调度（或重新调度）键在 deadline 时到期"""
+        self.cancel(key)
+        tick = max(self._tick_of(deadline), self._current_tick)
+        slot = tick % self.num_slots
+        self._slots[slot][key] = deadline
+        self._locations[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """取消调度"""
+        slot = self._locations.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def _elapsed_slots(self, now: float) -> List[Dict[Hashable, float]]:
+        """从当前刻度到 now 经过的槽位 (超过一圈时每个槽位只出现一次)"""
+        target_tick = self._tick_of(now)
+        if target_tick < self._current_tick:
+            return []
+        ticks = min(target_tick - self._current_tick + 1, self.num_slots)
+        return [
+            self._slots[tick % self.num_slots]
+            for tick in range(self._current_tick, self._current_tick + ticks)
+        ]
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """
+        推进时间轮到 now，返回所有已到期的键
+
+        经过的刻度超过一圈时，每个槽位只检查一次。
+        """
+        now = time.time() if now is None else now
+        expired: List[Hashable] = []
+        for slot in self._elapsed_slots(now):
+            if not slot:
+                continue
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self._locations[key]
+            expired.extend(due)
+
+        self._current_tick = max(self._current_tick, self._tick_of(now))
+        return expired
+
+    def count_due(self, now: Optional[float] = None) -> int:
+        """
+        统计已到期但尚未回收的键数量
+
+        与 advance() 一样只检查上次推进以来经过的槽位，不遍历全部已调度的键；
+        后台清理按时推进时只需检查一两个槽位。
+        """
+        now = time.time() if now is None else now
+        return sum(
+            1 for slot in self._elapsed_slots(now)
+            for deadline in slot.values()
+            if deadline <= now
+        )
+
+    def clear(self) -> None:
+        """清空时间轮"""
+        for slot in self._slots:
+            slot.clear()
+        self._locations.clear()
+
+
+class ExpirySweeper:
+    """
+    后台过期清理任务
+
+    每隔 interval 秒推进一次时间轮，并将到期的键交给 on_expire 回调
+    (同步或异步函数均可，返回实际回收的条目数)。
+
+    用法:
+        sweeper = ExpirySweeper(wheel, on_expire=store._reclaim_expired)
+        sweeper.start()
+        ...
+        await sweeper.stop()
+    """
+
+    def __init__(
+        self,
+        wheel: TimingWheel,
+        on_expire: Callable[[List[Hashable]], Any],
+        interval: float = 1.0,
+    ):
+        self.wheel = wheel
+        self.on_expire = on_expire
+        self.interval = interval
+
+        self._task: Optional[asyncio.Task] = None
+
+        # 统计
+        self._sweeps = 0
+        self._reclaimed = 0
+        self._last_sweep_at: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        """后台任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动后台任务（需要在事件循环中调用）"""
+        if self.is_running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.debug("Expiry sweeper started")
+
+    async def stop(self) -> None:
+        """停止后台任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.debug("Expiry sweeper stopped")
+
+    async def sweep_once(self, now: Optional[float] = None) -> int:
+        """执行一次清理，返回回收的条目数"""
+        expired = self.wheel.advance(now)
+        reclaimed = 0
+        if expired:
+            result = self.on_expire(expired)
+            if inspect.isawaitable(result):
+                result = await result
+            reclaimed = result if isinstance(result, int) else len(expired)
+
+        self._sweeps += 1
+        self._reclaimed += reclaimed
+        self._last_sweep_at = time.time()
+        return reclaimed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                reclaimed = await self.sweep_once()
+                if reclaimed:
+                    logger.debug(f"Reclaimed {reclaimed} expired entries")
+            except Exception as e:
+                logger.error(f"Expiry sweep error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "running": self.is_running,
+            "scheduled": len(self.wheel),
+            "sweeps": self._sweeps,
+            "reclaimed": self._reclaimed,
+            "last_sweep_at": self._last_sweep_at,
+        }
+
+
+__all__ = [
+    "TimingWheel",
+    "ExpirySweeper",
+]
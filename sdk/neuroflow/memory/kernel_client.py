@@ -26,29 +26,449 @@ Usage:
         tags=["conversation"],
         limit=10,
     )
+    
+    await client.aclose()
 """
 
 import asyncio
-import json
-from typing import Any, Dict, List, Optional
+import itertools
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 import logging
 
 import grpc
+from google.protobuf import json_format, struct_pb2
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from ..proto import memory_pb2, memory_pb2_grpc
+from .read_cache import MemoryReadCache
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class KernelClientConfig:
+    """Kernel Memory 客户端配置"""
+    timeout: Optional[float] = 10.0              # 每次调用的默认截止时间 (秒)，None 表示不限
+    num_channels: int = 1                        # 连接数，调用按轮询分配；高并发时单个 HTTP/2 连接的流数会成为瓶颈
+    keepalive_time_ms: int = 30000               # 空闲连接的 keepalive ping 间隔
+    keepalive_timeout_ms: int = 10000            # keepalive ping 的应答超时
+    keepalive_permit_without_calls: bool = True  # 没有进行中的调用时也发送 keepalive
+    max_message_bytes: int = 64 * 1024 * 1024    # 收发消息的大小上限
+    options: List[Tuple[str, Any]] = field(default_factory=list)  # 额外的 gRPC 通道参数
+    batch_writes: bool = False                   # store() 先进入写缓冲，并发写入合并为 StoreBatch
+    max_batch_size: int = 100                    # 每个 StoreBatch 请求的最大条目数
+    max_batch_delay_ms: float = 5.0              # 写缓冲中的条目最多等待多久发送
+    value_encoding: Optional[str] = None         # 值的二进制编码: None / "protobuf" / "msgpack"，可按调用覆盖
+
+
+def _to_value(value: Any) -> struct_pb2.Value:
+    """Python 值转换为 google.protobuf.Value"""
+    message = struct_pb2.Value()
+    if value is None:
+        message.null_value = struct_pb2.NULL_VALUE
+    elif isinstance(value, bool):
+        message.bool_value = value
+    elif isinstance(value, (int, float)):
+        message.number_value = value
+    elif isinstance(value, str):
+        message.string_value = value
+    elif isinstance(value, dict):
+        message.struct_value.SetInParent()
+        message.struct_value.update(value)
+    elif isinstance(value, (list, tuple)):
+        message.list_value.SetInParent()
+        message.list_value.extend(value)
+    else:
+        # 其余类型交给 json_format，保持原有的报错
+        json_format.ParseDict(value, message)
+    return message
+
+
+def _from_value(value: struct_pb2.Value) -> Any:
+    """google.protobuf.Value 转换为 Python 值 (数字均为 float，与 json_format 一致)"""
+    kind = value.WhichOneof("kind")
+    if kind == "struct_value":
+        return {k: _from_value(v) for k, v in value.struct_value.fields.items()}
+    if kind == "list_value":
+        return [_from_value(v) for v in value.list_value.values]
+    if kind is None or kind == "null_value":
+        return None
+    return getattr(value, kind)
+
+
+_VALUE_ENCODINGS = {
+    None: memory_pb2.ValueEncoding.VALUE_ENCODING_UNSPECIFIED,
+    "protobuf": memory_pb2.ValueEncoding.VALUE_ENCODING_PROTOBUF,
+    "msgpack": memory_pb2.ValueEncoding.VALUE_ENCODING_MSGPACK,
+}
+
+
+def _value_encoding(name: Optional[str]) -> int:
+    """编码名转换为 ValueEncoding"""
+    if name not in _VALUE_ENCODINGS:
+        raise ValueError(f"Unknown value encoding: {name!r}")
+    if name == "msgpack" and msgpack is None:
+        raise ImportError("msgpack value encoding requires msgpack: pip install msgpack")
+    return _VALUE_ENCODINGS[name]
+
+
+def _set_entry_value(
+    entry: memory_pb2.MemoryEntry, value: Any, encoding: int, fallback: bool = False,
+) -> None:
+    """按编码写入条目的值；fallback=True 时同时填写 value，供不认识 encoded_value 的服务端使用"""
+    if encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_PROTOBUF:
+        message = _to_value(value)
+        entry.encoded_value = message.SerializeToString()
+        if fallback:
+            entry.value.CopyFrom(message)
+    elif encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_MSGPACK:
+        entry.encoded_value = msgpack.packb(value, use_bin_type=True)
+        if fallback:
+            entry.value.CopyFrom(_to_value(value))
+    else:
+        entry.value.CopyFrom(_to_value(value))
+        return
+    entry.value_encoding = encoding
+
+
+def _entry_value(entry: memory_pb2.MemoryEntry) -> Any:
+    """按条目的编码解码值"""
+    encoding = entry.value_encoding
+    if encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_PROTOBUF:
+        return _from_value(struct_pb2.Value.FromString(entry.encoded_value))
+    if encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_MSGPACK:
+        if msgpack is None:
+            raise ImportError("msgpack value encoding requires msgpack: pip install msgpack")
+        return msgpack.unpackb(entry.encoded_value, raw=False)
+    return _from_value(entry.value)
+
+
+def _build_entry(
+    agent_id: str,
+    key: str,
+    value: Any,
+    tags: Optional[List[str]] = None,
+    importance: float = 0.5,
+    expiry: Optional[datetime] = None,
+    memory_type: str = "general",
+    value_encoding: int = memory_pb2.ValueEncoding.VALUE_ENCODING_UNSPECIFIED,
+    fallback_value: bool = False,
+) -> memory_pb2.MemoryEntry:
+    """构造 MemoryEntry"""
+    entry = memory_pb2.MemoryEntry(
+        agent_id=agent_id,
+        key=key,
+        tags=tags or [],
+        importance=importance,
+        memory_type=memory_type,
+    )
+    _set_entry_value(entry, value, value_encoding, fallback_value)
+    if expiry:
+        # 转换为 protobuf timestamp
+        from google.protobuf.timestamp_pb2 import Timestamp
+        ts = Timestamp()
+        ts.FromDatetime(expiry)
+        entry.expiry.CopyFrom(ts)
+    return entry
+
+
+def _batch_outcomes(
+    response: memory_pb2.StoreBatchResponse, count: int,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    StoreBatchResponse 按位置映射为每个条目的 (记忆 ID, 错误)
+
+    errors[i] 非空表示第 i 个条目失败；没有 ID 也没有错误时，
+    按 success 标志判定为整批失败或服务端未返回 ID
+    """
+    outcomes = []
+    for i in range(count):
+        memory_id = response.memory_ids[i] if i < len(response.memory_ids) else ""
+        error = response.errors[i] if i < len(response.errors) else ""
+        if not memory_id and not error:
+            error = "no memory id returned" if response.success else "batch store failed"
+        outcomes.append((None, error) if error else (memory_id, None))
+    return outcomes
+
+
+class StoreBatchError(Exception):
+    """批量存储中部分条目失败，memory_ids 按位置对应输入，失败的位置为 None"""
+
+    def __init__(self, memory_ids: List[Optional[str]], errors: Dict[int, str]):
+        self.memory_ids = memory_ids
+        self.errors = errors
+        first = min(errors)
+        super().__init__(
+            f"Failed to store {len(errors)} of {len(memory_ids)} memories "
+            f"(item {first}: {errors[first]})"
+        )
+
+
+_SORT_BY = {
+    "timestamp_asc": memory_pb2.MemorySortBy.TIMESTAMP_ASC,
+    "timestamp_desc": memory_pb2.MemorySortBy.TIMESTAMP_DESC,
+    "importance_asc": memory_pb2.MemorySortBy.IMPORTANCE_ASC,
+    "importance_desc": memory_pb2.MemorySortBy.IMPORTANCE_DESC,
+}
+
+
+def _build_query(
+    agent_id: str,
+    key_pattern: Optional[str],
+    tags: Optional[List[str]],
+    min_importance: float,
+    limit: int,
+    sort_by: str,
+    fields: Optional[List[str]] = None,
+    accept_encoding: int = memory_pb2.ValueEncoding.VALUE_ENCODING_UNSPECIFIED,
+) -> memory_pb2.MemoryQuery:
+    """构造 MemoryQuery"""
+    return memory_pb2.MemoryQuery(
+        agent_id=agent_id,
+        key_pattern=key_pattern or "",
+        tags=tags or [],
+        min_importance=min_importance,
+        limit=limit,
+        sort_by=_SORT_BY.get(sort_by, memory_pb2.MemorySortBy.TIMESTAMP_DESC),
+        fields=fields or [],
+        accept_encoding=accept_encoding,
+    )
+
+
+def _turn_to_dict(turn: memory_pb2.ConversationTurn) -> Dict[str, Any]:
+    """ConversationTurn 转换为字典"""
+    return {
+        "role": turn.role,
+        "content": turn.content,
+        "timestamp": turn.timestamp.ToJsonString() if turn.HasField("timestamp") else None,
+        "metadata": dict(turn.metadata),
+    }
+
+
+# 返回给调用方的字段 -> 从 MemoryEntry 读取的方式
+_ENTRY_FIELDS = {
+    "id": lambda entry: entry.id,
+    "key": lambda entry: entry.key,
+    "value": _entry_value,
+    "tags": lambda entry: list(entry.tags),
+    "importance": lambda entry: entry.importance,
+    "memory_type": lambda entry: entry.memory_type,
+}
+
+
+def _check_fields(fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """校验投影字段"""
+    if fields is None:
+        return None
+    unknown = [name for name in fields if name not in _ENTRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown memory fields: {unknown}")
+    return tuple(fields)
+
+
+def _entry_to_dict(entry: memory_pb2.MemoryEntry, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """MemoryEntry 转换为字典，fields 为 None 时包含全部字段"""
+    return {name: _ENTRY_FIELDS[name](entry) for name in (fields or _ENTRY_FIELDS)}
+
+
+def _decode_entries(
+    entries: Any, fields: Optional[Tuple[str, ...]], lazy: bool,
+) -> List[Dict[str, Any]]:
+    """把一组 MemoryEntry 转换为字典或惰性视图"""
+    if lazy:
+        return [LazyMemoryEntry(entry, fields) for entry in entries]
+    return [_entry_to_dict(entry, fields) for entry in entries]
+
+
+_UNDECODED = object()
+
+
+class LazyMemoryEntry(Mapping):
+    """
+    记忆条目的只读惰性视图
+
+    字段访问方式与 search() 返回的字典相同，value 在首次访问时才解码并缓存；
+    只需要键、标签或重要性的调用方不承担解码开销。需要可修改的字典时调用 to_dict()。
+    """
+
+    __slots__ = ("_entry", "_fields", "_value")
+
+    def __init__(self, entry: memory_pb2.MemoryEntry, fields: Optional[Tuple[str, ...]] = None):
+        self._entry = entry
+        self._fields = fields or tuple(_ENTRY_FIELDS)
+        self._value = _UNDECODED
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._fields:
+            raise KeyError(name)
+        if name == "value":
+            if self._value is _UNDECODED:
+                self._value = _entry_value(self._entry)
+            return self._value
+        return _ENTRY_FIELDS[name](self._entry)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @property
+    def decoded(self) -> bool:
+        """value 是否已解码"""
+        return self._value is not _UNDECODED
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典"""
+        return {name: self[name] for name in self._fields}
+
+    def __repr__(self) -> str:
+        return f"LazyMemoryEntry(key={self._entry.key!r}, fields={list(self._fields)})"
+
+
 class KernelMemoryClient:
-    """Kernel Memory 模块的 gRPC 客户端"""
+    """
+    Kernel Memory 模块的 gRPC 客户端
+    
+    基于 grpc.aio，调用直接在事件循环中进行，不占用线程池线程。
+    通道在首次调用时创建并绑定当前事件循环；每个方法的 timeout 参数覆盖配置中的默认截止时间。
     
-    def __init__(self, endpoint: str = "localhost:50051"):
+    config.batch_writes 开启时，store() 进入写缓冲：凑满 max_batch_size 条或等待
+    max_batch_delay_ms 后合并为一个 StoreBatch 请求，每个调用方仍得到自己条目的结果；
+    aclose() 会先发送缓冲中的写入。
+    
+    设置 read_cache 后，retrieve() 先查本地缓存 (包括不存在的键)，store() / delete()
+    成功后写穿缓存。缓存只反映本客户端的写入，其他客户端的修改在 TTL 内不可见。
+    
+    search() 可用 fields 只取部分字段，或用 lazy=True 推迟 value 的解码；
+    config.value_encoding 设置后，值以 encoded_value 二进制传输 (protobuf，或已安装时的 msgpack)。
+    读取时以 accept_encoding 协商；服务端以该编码返回过结果 (即确认支持) 之前，写入同时
+    填写 value，不认识 encoded_value 的 Kernel 仍能保存完整的值。
+    
+    用法:
+        async with KernelMemoryClient(
+            "localhost:50051",
+            KernelClientConfig(timeout=5.0, num_channels=4),
+            read_cache=MemoryReadCache(ttl_seconds=60),
+        ) as client:
+            await client.store("agent-1", "k", {"v": 1})
+    """
+    
+    def __init__(
+        self,
+        endpoint: str = "localhost:50051",
+        config: Optional[KernelClientConfig] = None,
+        read_cache: Optional[MemoryReadCache] = None,
+    ):
+        """
+        Args:
+            endpoint: Kernel 地址
+            config: 客户端配置
+            read_cache: retrieve 的本地读缓存，不设置时每次读取都访问 Kernel
+        """
         self.endpoint = endpoint
-        self.channel = grpc.insecure_channel(endpoint)
-        self.stub = memory_pb2_grpc.MemoryServiceStub(self.channel)
-        self.conv_stub = memory_pb2_grpc.ConversationMemoryServiceStub(self.channel)
+        self.config = config or KernelClientConfig()
+        self.read_cache = read_cache
+        self._channels: List[grpc.aio.Channel] = []
+        self._stubs: List[Tuple[memory_pb2_grpc.MemoryServiceStub, memory_pb2_grpc.ConversationMemoryServiceStub]] = []
+        self._next_channel = itertools.count()
+        self._loop = None  # 创建通道时所在的事件循环
+        
+        # 写缓冲: (条目, 调用方等待的 future, 调用方的截止时刻)
+        self._pending_writes: List[Tuple[memory_pb2.MemoryEntry, asyncio.Future, Optional[float]]] = []
+        self._write_timer: Optional[asyncio.TimerHandle] = None
+        self._write_tasks: Set[asyncio.Task] = set()
+        self._batch_stats = {"batches": 0, "batched_writes": 0, "failed_writes": 0}
+        
+        # 服务端已确认支持的值编码 (读取结果以该编码返回过)
+        self._confirmed_encodings: Set[int] = set()
+    
+    async def __aenter__(self) -> "KernelMemoryClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """发送写缓冲中的条目并关闭通道，之后再次调用会重新创建"""
+        await self.flush()
+        channels, self._channels = self._channels, []
+        self._stubs = []
+        self._loop = None
+        for channel in channels:
+            await channel.close()
+    
+    def _channel_options(self) -> List[Tuple[str, Any]]:
+        """gRPC 通道参数"""
+        options = [
+            ("grpc.keepalive_time_ms", self.config.keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", self.config.keepalive_timeout_ms),
+            ("grpc.keepalive_permit_without_calls", int(self.config.keepalive_permit_without_calls)),
+            ("grpc.max_send_message_length", self.config.max_message_bytes),
+            ("grpc.max_receive_message_length", self.config.max_message_bytes),
+        ]
+        if self.config.num_channels > 1:
+            # 每个通道使用独立的子通道池，否则相同参数的通道会共享同一个连接
+            options.append(("grpc.use_local_subchannel_pool", 1))
+        return options + list(self.config.options)
+    
+    def _next_stubs(
+        self,
+    ) -> Tuple[memory_pb2_grpc.MemoryServiceStub, memory_pb2_grpc.ConversationMemoryServiceStub]:
+        """按轮询取一个通道的存根，首次调用或事件循环变化时创建通道"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 旧通道绑定已结束的事件循环，不可再用
+            self._channels = []
+            self._stubs = []
+            self._loop = loop
+        if not self._stubs:
+            options = self._channel_options()
+            for _ in range(max(1, self.config.num_channels)):
+                channel = grpc.aio.insecure_channel(self.endpoint, options=options)
+                self._channels.append(channel)
+                self._stubs.append((
+                    memory_pb2_grpc.MemoryServiceStub(channel),
+                    memory_pb2_grpc.ConversationMemoryServiceStub(channel),
+                ))
+        return self._stubs[next(self._next_channel) % len(self._stubs)]
+    
+    @property
+    def stub(self) -> memory_pb2_grpc.MemoryServiceStub:
+        """MemoryService 存根"""
+        return self._next_stubs()[0]
+    
+    @property
+    def conv_stub(self) -> memory_pb2_grpc.ConversationMemoryServiceStub:
+        """ConversationMemoryService 存根"""
+        return self._next_stubs()[1]
+    
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """本次调用的截止时间，未指定时使用配置的默认值"""
+        return self.config.timeout if timeout is None else timeout
+    
+    def _encoding(self, value_encoding: Optional[str]) -> int:
+        """本次调用的值编码，未指定时使用配置的默认值"""
+        return _value_encoding(self.config.value_encoding if value_encoding is None else value_encoding)
+    
+    def _fallback_value(self, encoding: int) -> bool:
+        """写入时是否需要同时填写 value (服务端尚未确认支持该编码)"""
+        return encoding not in self._confirmed_encodings
+    
+    def _note_encoding(self, entries: Any) -> None:
+        """记录读取结果中服务端使用的值编码"""
+        for entry in entries:
+            if entry.value_encoding:
+                self._confirmed_encodings.add(entry.value_encoding)
+            return
     
     async def store(
         self,
@@ -59,6 +479,8 @@ class KernelMemoryClient:
         importance: float = 0.5,
         expiry: Optional[datetime] = None,
         memory_type: str = "general",
+        timeout: Optional[float] = None,
+        value_encoding: Optional[str] = None,
     ) -> str:
         """
         存储记忆到 Kernel
@@ -71,47 +493,225 @@ class KernelMemoryClient:
             importance: 重要性 (0.0-1.0)
             expiry: 过期时间
             memory_type: 记忆类型
+            timeout: 截止时间 (秒)，默认使用配置值；写缓冲模式下从调用时起算，
+                批次请求使用批内最早的截止时刻
+            value_encoding: 值的二进制编码 ("protobuf" / "msgpack")，默认使用配置值
             
         Returns:
             记忆 ID
         """
-        entry = memory_pb2.MemoryEntry(
-            agent_id=agent_id,
-            key=key,
-            value=json.dumps(value),
-            tags=tags or [],
-            importance=importance,
-            memory_type=memory_type,
+        encoding = self._encoding(value_encoding)
+        entry = _build_entry(
+            agent_id, key, value, tags, importance, expiry, memory_type,
+            encoding, self._fallback_value(encoding),
         )
         
-        if expiry:
-            # 转换为 protobuf timestamp
-            from google.protobuf.timestamp_pb2 import Timestamp
-            ts = Timestamp()
-            ts.FromDatetime(expiry)
-            entry.expiry.CopyFrom(ts)
+        if self.config.batch_writes:
+            memory_id = await self._enqueue_write(entry, timeout)
+            self._cache_stored(entry, memory_id)
+            return memory_id
         
         request = memory_pb2.StoreRequest(entry=entry)
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.stub.Store(request)
-            )
+            response = await self.stub.Store(request, timeout=self._timeout(timeout))
             
             if not response.success:
+                self._cache_invalidate(agent_id, key)
                 raise Exception(f"Failed to store memory: {response.error}")
             
             logger.info(f"Stored memory: {response.memory_id}")
+            self._cache_stored(entry, response.memory_id)
             return response.memory_id
             
         except grpc.RpcError as e:
             logger.error(f"gRPC error storing memory: {e}")
             raise
     
+    async def store_many(
+        self,
+        agent_id: str,
+        items: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        value_encoding: Optional[str] = None,
+    ) -> List[str]:
+        """
+        批量存储记忆，按 max_batch_size 分为多个 StoreBatch 请求
+        
+        Args:
+            agent_id: Agent 标识
+            items: 记忆列表，每项包含 key、value，可选 tags、importance、expiry、memory_type
+            timeout: 每个请求的截止时间 (秒)，默认使用配置值
+            value_encoding: 值的二进制编码 ("protobuf" / "msgpack")，默认使用配置值
+            
+        Returns:
+            记忆 ID 列表，与 items 按位置对应
+            
+        Raises:
+            StoreBatchError: 部分条目存储失败，其余条目已写入
+        """
+        encoding = self._encoding(value_encoding)
+        entries = [
+            _build_entry(
+                agent_id,
+                item["key"],
+                item["value"],
+                item.get("tags"),
+                item.get("importance", 0.5),
+                item.get("expiry"),
+                item.get("memory_type", "general"),
+                encoding,
+                self._fallback_value(encoding),
+            )
+            for item in items
+        ]
+        
+        size = max(1, self.config.max_batch_size)
+        memory_ids: List[Optional[str]] = []
+        errors: Dict[int, str] = {}
+        for start in range(0, len(entries), size):
+            chunk = entries[start:start + size]
+            outcomes = await self._store_batch(chunk, timeout)
+            for offset, (entry, (memory_id, error)) in enumerate(zip(chunk, outcomes)):
+                memory_ids.append(memory_id)
+                if error is not None:
+                    errors[start + offset] = error
+                    self._cache_invalidate(entry.agent_id, entry.key)
+                else:
+                    self._cache_stored(entry, memory_id)
+        
+        if errors:
+            raise StoreBatchError(memory_ids, errors)
+        logger.info(f"Stored {len(memory_ids)} memories")
+        return memory_ids
+    
+    async def _store_batch(
+        self,
+        entries: List[memory_pb2.MemoryEntry],
+        timeout: Optional[float] = None,
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """发送一个 StoreBatch 请求，返回每个条目的 (记忆 ID, 错误)"""
+        request = memory_pb2.StoreBatchRequest(entries=entries)
+        try:
+            response = await self.stub.StoreBatch(request, timeout=self._timeout(timeout))
+        except grpc.RpcError as e:
+            logger.error(f"gRPC error storing memory batch: {e}")
+            raise
+        
+        self._batch_stats["batches"] += 1
+        self._batch_stats["batched_writes"] += len(entries)
+        outcomes = _batch_outcomes(response, len(entries))
+        self._batch_stats["failed_writes"] += sum(1 for _, error in outcomes if error is not None)
+        return outcomes
+    
+    # ========== 写缓冲 ==========
+    
+    async def _enqueue_write(self, entry: memory_pb2.MemoryEntry, timeout: Optional[float] = None) -> str:
+        """条目加入写缓冲，等待所在批次的结果"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timeout = self._timeout(timeout)
+        deadline = None if timeout is None else loop.time() + timeout
+        self._pending_writes.append((entry, future, deadline))
+        
+        if len(self._pending_writes) >= max(1, self.config.max_batch_size):
+            self._dispatch_writes()
+        elif self._write_timer is None:
+            self._write_timer = loop.call_later(
+                self.config.max_batch_delay_ms / 1000, self._dispatch_writes
+            )
+        
+        return await future
+    
+    def _dispatch_writes(self) -> None:
+        """取出写缓冲中的条目，在后台任务中发送"""
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+            self._write_timer = None
+        
+        size = max(1, self.config.max_batch_size)
+        while self._pending_writes:
+            batch = self._pending_writes[:size]
+            del self._pending_writes[:size]
+            task = asyncio.ensure_future(self._run_write_batch(batch))
+            self._write_tasks.add(task)
+            task.add_done_callback(self._write_tasks.discard)
+    
+    async def _run_write_batch(
+        self, batch: List[Tuple[memory_pb2.MemoryEntry, asyncio.Future, Optional[float]]],
+    ) -> None:
+        """发送一批写入并把结果分发给各调用方，请求截止时间取批内最早的调用方截止时刻"""
+        # 调用方已取消的条目不再发送
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        
+        deadlines = [deadline for _, _, deadline in batch if deadline is not None]
+        timeout = None
+        if deadlines:
+            timeout = max(0.0, min(deadlines) - asyncio.get_running_loop().time())
+        
+        try:
+            outcomes = await self._store_batch([entry for entry, _, _ in batch], timeout)
+        except Exception as e:
+            for entry, future, _ in batch:
+                self._cache_invalidate(entry.agent_id, entry.key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (entry, future, _), (memory_id, error) in zip(batch, outcomes):
+            if error is not None:
+                self._cache_invalidate(entry.agent_id, entry.key)
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(Exception(f"Failed to store memory: {error}"))
+            else:
+                future.set_result(memory_id)
+    
+    async def flush(self) -> None:
+        """立即发送写缓冲中的条目，并等待所有进行中的批次完成"""
+        self._dispatch_writes()
+        if self._write_tasks:
+            await asyncio.gather(*list(self._write_tasks), return_exceptions=True)
+    
+    # ========== 读缓存 ==========
+    
+    def _cache_stored(self, entry: memory_pb2.MemoryEntry, memory_id: str) -> None:
+        """写穿：缓存刚存储的记忆，记忆自身的过期时间先到时以其为准"""
+        if self.read_cache is None:
+            return
+        ttl_seconds = None
+        if entry.HasField("expiry"):
+            expires_at = entry.expiry.seconds + entry.expiry.nanos / 1e9
+            ttl_seconds = expires_at - time.time()
+        memory = _entry_to_dict(entry)
+        memory["id"] = memory_id
+        self.read_cache.put(entry.agent_id, entry.key, memory, ttl_seconds=ttl_seconds)
+    
+    def _cache_invalidate(self, agent_id: str, key: str) -> None:
+        """写入结果不确定时失效缓存的键"""
+        if self.read_cache is not None:
+            self.read_cache.invalidate(agent_id, key)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self._batch_stats)
+        stats["pending_writes"] = len(self._pending_writes)
+        stats["avg_batch_size"] = (
+            stats["batched_writes"] / stats["batches"] if stats["batches"] else 0.0
+        )
+        if self.read_cache is not None:
+            stats["read_cache"] = self.read_cache.get_stats()
+        return stats
+    
     async def retrieve(
         self,
         agent_id: str,
         key: str,
+        timeout: Optional[float] = None,
+        value_encoding: Optional[str] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         从 Kernel 检索记忆
@@ -119,31 +719,34 @@ class KernelMemoryClient:
         Args:
             agent_id: Agent 标识
             key: 记忆键
+            timeout: 截止时间 (秒)，默认使用配置值
+            value_encoding: 希望服务端使用的值编码，默认使用配置值
             
         Returns:
             记忆内容，如果不存在则返回 None
         """
+        if self.read_cache is not None:
+            hit, memory = self.read_cache.lookup(agent_id, key)
+            if hit:
+                return memory
+            generation = self.read_cache.generation
+        
         request = memory_pb2.RetrieveRequest(
             agent_id=agent_id,
             key=key,
+            accept_encoding=self._encoding(value_encoding),
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.stub.Retrieve(request)
-            )
-            
-            if not response.found:
-                return None
+            response = await self.stub.Retrieve(request, timeout=self._timeout(timeout))
             
-            return {
-                "id": response.entry.id,
-                "key": response.entry.key,
-                "value": json.loads(response.entry.value),
-                "tags": list(response.entry.tags),
-                "importance": response.entry.importance,
-                "memory_type": response.entry.memory_type,
-            }
+            memory = None
+            if response.found:
+                self._note_encoding([response.entry])
+                memory = _entry_to_dict(response.entry)
+            if self.read_cache is not None:
+                self.read_cache.fill(agent_id, key, memory, generation)
+            return memory
             
         except grpc.RpcError as e:
             logger.error(f"gRPC error retrieving memory: {e}")
@@ -153,6 +756,7 @@ class KernelMemoryClient:
         self,
         agent_id: str,
         key: str,
+        timeout: Optional[float] = None,
     ) -> bool:
         """删除记忆"""
         request = memory_pb2.DeleteRequest(
@@ -161,14 +765,19 @@ class KernelMemoryClient:
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.stub.Delete(request)
-            )
-            return response.success
+            response = await self.stub.Delete(request, timeout=self._timeout(timeout))
             
         except grpc.RpcError as e:
             logger.error(f"gRPC error deleting memory: {e}")
+            self._cache_invalidate(agent_id, key)
             return False
+        
+        if self.read_cache is not None:
+            if response.success:
+                self.read_cache.put_missing(agent_id, key)
+            else:
+                self.read_cache.invalidate(agent_id, key)
+        return response.success
     
     async def search(
         self,
@@ -178,6 +787,10 @@ class KernelMemoryClient:
         min_importance: float = 0.0,
         limit: int = 10,
         sort_by: str = "timestamp_desc",
+        timeout: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+        lazy: bool = False,
+        value_encoding: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         搜索记忆
@@ -189,54 +802,105 @@ class KernelMemoryClient:
             min_importance: 最小重要性
             limit: 返回数量限制
             sort_by: 排序方式
+            timeout: 截止时间 (秒)，默认使用配置值
+            fields: 只返回这些字段 (id / key / value / tags / importance / memory_type)，
+                不含 "value" 时服务端不必发送值，客户端也不解码
+            lazy: 返回 LazyMemoryEntry，value 在首次访问时才解码
+            value_encoding: 希望服务端使用的值编码，默认使用配置值
             
         Returns:
             记忆列表
         """
-        sort_enum = {
-            "timestamp_asc": memory_pb2.MemorySortBy.TIMESTAMP_ASC,
-            "timestamp_desc": memory_pb2.MemorySortBy.TIMESTAMP_DESC,
-            "importance_asc": memory_pb2.MemorySortBy.IMPORTANCE_ASC,
-            "importance_desc": memory_pb2.MemorySortBy.IMPORTANCE_DESC,
-        }
-        
-        query = memory_pb2.MemoryQuery(
-            agent_id=agent_id,
-            key_pattern=key_pattern or "",
-            tags=tags or [],
-            min_importance=min_importance,
-            limit=limit,
-            sort_by=sort_enum.get(sort_by, memory_pb2.MemorySortBy.TIMESTAMP_DESC),
+        projection = _check_fields(fields)
+        query = _build_query(
+            agent_id, key_pattern, tags, min_importance, limit, sort_by,
+            fields, self._encoding(value_encoding),
         )
         
         try:
             request = memory_pb2.SearchRequest(query=query)
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.stub.Search(request)
-            )
+            response = await self.stub.Search(request, timeout=self._timeout(timeout))
             
-            return [
-                {
-                    "id": entry.id,
-                    "key": entry.key,
-                    "value": json.loads(entry.value),
-                    "tags": list(entry.tags),
-                    "importance": entry.importance,
-                    "memory_type": entry.memory_type,
-                }
-                for entry in response.entries
-            ]
+            self._note_encoding(response.entries)
+            return _decode_entries(response.entries, projection, lazy)
             
         except grpc.RpcError as e:
             logger.error(f"gRPC error searching memories: {e}")
             raise
     
+    async def iter_search_pages(
+        self,
+        agent_id: str,
+        key_pattern: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        min_importance: float = 0.0,
+        limit: int = 0,
+        sort_by: str = "timestamp_desc",
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+        timeout: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+        lazy: bool = False,
+        value_encoding: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[List[Dict[str, Any]], str]]:
+        """
+        流式搜索记忆，逐页产出 (记忆列表, next_cursor)
+        
+        服务端按页发送，客户端消费一页后才会继续接收 (HTTP/2 流控)，内存占用与页大小成正比。
+        中断后把最后收到的 next_cursor 作为 cursor 重新调用即可从断点继续。
+        
+        Args:
+            agent_id: Agent 标识
+            key_pattern: 键模式匹配
+            tags: 标签过滤
+            min_importance: 最小重要性
+            limit: 结果总数上限，0 表示不限
+            sort_by: 排序方式
+            page_size: 每页条目数
+            cursor: 上一页的 next_cursor，None 表示从头开始
+            timeout: 整个流的截止时间 (秒)，默认不限
+            fields / lazy / value_encoding: 同 search()
+        """
+        projection = _check_fields(fields)
+        request = memory_pb2.SearchStreamRequest(
+            query=_build_query(
+                agent_id, key_pattern, tags, min_importance, limit, sort_by,
+                fields, self._encoding(value_encoding),
+            ),
+            page_size=page_size,
+            cursor=cursor or "",
+        )
+        call = self.stub.SearchStream(request, timeout=timeout)
+        try:
+            async for page in call:
+                self._note_encoding(page.entries)
+                yield _decode_entries(page.entries, projection, lazy), page.next_cursor
+        except grpc.RpcError as e:
+            logger.error(f"gRPC error streaming search: {e}")
+            raise
+        finally:
+            # 调用方提前退出时取消流，服务端停止发送
+            call.cancel()
+    
+    async def iter_search(self, agent_id: str, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式搜索记忆，逐条产出；参数同 iter_search_pages
+        
+        用法:
+            async for memory in client.iter_search("agent-1", tags=["conversation"]):
+                ...
+        """
+        async for entries, _ in self.iter_search_pages(agent_id, **kwargs):
+            for entry in entries:
+                yield entry
+    
     async def semantic_search(
         self,
         agent_id: str,
         query_text: str,
         top_k: int = 5,
         min_similarity: float = 0.7,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
         语义搜索记忆
@@ -246,6 +910,7 @@ class KernelMemoryClient:
             query_text: 查询文本
             top_k: 返回数量
             min_similarity: 最小相似度
+            timeout: 截止时间 (秒)，默认使用配置值
             
         Returns:
             记忆列表（带相似度分数）
@@ -259,15 +924,13 @@ class KernelMemoryClient:
         
         try:
             request = memory_pb2.SemanticSearchRequest(query=query)
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.stub.SemanticSearch(request)
-            )
+            response = await self.stub.SemanticSearch(request, timeout=self._timeout(timeout))
             
             return [
                 {
                     "id": result.entry.id,
                     "key": result.entry.key,
-                    "value": json.loads(result.entry.value),
+                    "value": _entry_value(result.entry),
                     "similarity": result.similarity_score,
                 }
                 for result in response.results
@@ -285,6 +948,7 @@ class KernelMemoryClient:
         conversation_id: str,
         turns: List[Dict[str, Any]],
         context: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> int:
         """
         保存对话到 Kernel Memory
@@ -295,6 +959,7 @@ class KernelMemoryClient:
             turns: 对话轮次列表
                 [{"role": "user", "content": "...", "timestamp": "..."}, ...]
             context: 上下文信息
+            timeout: 截止时间 (秒)，默认使用配置值
             
         Returns:
             保存的轮次数
@@ -324,13 +989,11 @@ class KernelMemoryClient:
             agent_id=agent_id,
             conversation_id=conversation_id,
             turns=proto_turns,
-            metadata=context or {},
+            context=context or {},
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.conv_stub.SaveConversation(request)
-            )
+            response = await self.conv_stub.SaveConversation(request, timeout=self._timeout(timeout))
             
             if not response.success:
                 raise Exception(f"Failed to save conversation: {response.error}")
@@ -347,6 +1010,7 @@ class KernelMemoryClient:
         agent_id: str,
         conversation_id: str,
         limit: int = 50,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """获取对话历史"""
         request = memory_pb2.GetConversationHistoryRequest(
@@ -356,30 +1020,68 @@ class KernelMemoryClient:
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.conv_stub.GetConversationHistory(request)
+            response = await self.conv_stub.GetConversationHistory(
+                request, timeout=self._timeout(timeout)
             )
             
-            return [
-                {
-                    "role": turn.role,
-                    "content": turn.content,
-                    "timestamp": turn.timestamp.ToJsonString() if turn.timestamp else None,
-                    "metadata": dict(turn.metadata),
-                }
-                for turn in response.turns
-            ]
+            return [_turn_to_dict(turn) for turn in response.turns]
             
         except grpc.RpcError as e:
             logger.error(f"gRPC error getting conversation history: {e}")
             raise
     
+    async def iter_conversation_history_pages(
+        self,
+        agent_id: str,
+        conversation_id: str,
+        limit: int = 0,
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[List[Dict[str, Any]], str]]:
+        """
+        流式获取对话历史，从最早的轮次开始逐页产出 (轮次列表, next_cursor)
+        
+        Args:
+            agent_id: Agent 标识
+            conversation_id: 对话 ID
+            limit: 最多返回的轮次数，0 表示不限
+            page_size: 每页轮次数
+            cursor: 上一页的 next_cursor，None 表示从头开始
+            timeout: 整个流的截止时间 (秒)，默认不限
+        """
+        request = memory_pb2.GetConversationHistoryStreamRequest(
+            agent_id=agent_id,
+            conversation_id=conversation_id,
+            limit=limit,
+            page_size=page_size,
+            cursor=cursor or "",
+        )
+        call = self.conv_stub.GetConversationHistoryStream(request, timeout=timeout)
+        try:
+            async for page in call:
+                yield [_turn_to_dict(turn) for turn in page.turns], page.next_cursor
+        except grpc.RpcError as e:
+            logger.error(f"gRPC error streaming conversation history: {e}")
+            raise
+        finally:
+            call.cancel()
+    
+    async def iter_conversation_history(
+        self, agent_id: str, conversation_id: str, **kwargs: Any,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式获取对话历史，逐轮产出；参数同 iter_conversation_history_pages"""
+        async for turns, _ in self.iter_conversation_history_pages(agent_id, conversation_id, **kwargs):
+            for turn in turns:
+                yield turn
+    
     async def extract_knowledge(
         self,
         agent_id: str,
         conversation_id: str,
         conversation_text: str,
         context: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
         从对话中提取知识
@@ -389,6 +1091,7 @@ class KernelMemoryClient:
             conversation_id: 对话 ID
             conversation_text: 完整对话文本
             context: 上下文信息
+            timeout: 截止时间 (秒)，默认使用配置值
             
         Returns:
             提取的知识列表
@@ -397,13 +1100,11 @@ class KernelMemoryClient:
             agent_id=agent_id,
             conversation_id=conversation_id,
             conversation_text=conversation_text,
-            metadata=context or {},
+            context=context or {},
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.conv_stub.ExtractKnowledge(request)
-            )
+            response = await self.conv_stub.ExtractKnowledge(request, timeout=self._timeout(timeout))
             
             return [
                 {
@@ -424,6 +1125,7 @@ class KernelMemoryClient:
         self,
         agent_id: str,
         knowledge_items: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
     ) -> List[str]:
         """
         保存提取的知识到 Memory
@@ -431,6 +1133,7 @@ class KernelMemoryClient:
         Args:
             agent_id: Agent 标识
             knowledge_items: 知识列表
+            timeout: 截止时间 (秒)，默认使用配置值
             
         Returns:
             保存的记忆 ID 列表
@@ -452,8 +1155,8 @@ class KernelMemoryClient:
         )
         
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.conv_stub.SaveExtractedKnowledge(request)
+            response = await self.conv_stub.SaveExtractedKnowledge(
+                request, timeout=self._timeout(timeout)
             )
             
             if not response.success:
@@ -541,7 +1244,10 @@ class ConversationContext:
 
 
 __all__ = [
+    "KernelClientConfig",
     "KernelMemoryClient",
+    "StoreBatchError",
+    "LazyMemoryEntry",
     "ConversationMemoryManager",
     "ConversationContext",
 ]
@@ -0,0 +1,780 @@
+"""
+NeuroFlow Python SDK - Persistent Memory Backend
+
+持久化记忆后端 - 为 VectorMemoryStore 提供跨进程重启的存储
+- 元数据: SQLite (WAL 模式)
+- 嵌入向量: 追加写入的 float32 文件，通过 np.memmap 惰性读取
+- 全文检索: BM25 倒排列表保存在 SQLite 中，关键词检索覆盖全部持久化条目
+
+目录结构:
+    <path>/metadata.db              记忆元数据、标签、当前代号
+    <path>/embeddings.<gen>.f32     第 gen 代的嵌入向量文件
+
+打开存储只读取 meta 表，不会加载任何记忆条目；条目在被访问时才实例化。
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import heapq
+import json
+import logging
+import math
+import os
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+from .bm25 import tokenize
+from .vector_store import MemoryEntry, MemoryFilter, MemoryType
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    row INTEGER,
+    value TEXT,
+    memory_type TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    importance REAL NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    access_count INTEGER NOT NULL,
+    ttl_seconds INTEGER,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_tags (
+    tag TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (tag, id)
+);
+CREATE TABLE IF NOT EXISTS memory_text (
+    id TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_terms (
+    term TEXT NOT NULL,
+    id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, id)
+);
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories(memory_type);
+CREATE INDEX IF NOT EXISTS idx_memory_tags_id ON memory_tags(id);
+CREATE INDEX IF NOT EXISTS idx_memory_terms_id ON memory_terms(id);
+"""
+
+# BM25 参数，与 BM25Index 的默认值一致
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+_COLUMNS = (
+    "id, key, row, value, memory_type, tags, importance, "
+    "created_at, accessed_at, access_count, ttl_seconds, metadata"
+)
+
+
+class PersistentMemoryBackend:
+    """
+    基于 SQLite + 内存映射文件的持久化后端
+
+    - 嵌入向量只追加写入；更新和删除留下的空洞由 compact() 回收
+    - 每次写入先落盘向量 (sync=True 时提交前 fsync)，再提交引用该行的 SQLite 事务，
+      崩溃时最多留下未被引用的尾部数据，重新打开时会被覆盖
+    - compact() 写出新一代向量文件后，在同一个事务中切换代号和行号，
+      任何时刻崩溃都能看到完整的旧代或新代
+
+    用法:
+        backend = PersistentMemoryBackend("~/.neuroflow/memory")
+        store = VectorMemoryStore(embedding_fn=embed, backend=backend)
+    """
+
+    def __init__(self, path: str, sync: bool = True):
+        """
+        Args:
+            path: 存储目录
+            sync: 提交 SQLite 事务前是否 fsync 向量文件；关闭后掉电可能留下
+                引用了未落盘向量的元数据
+        """
+        if np is None:
+            raise ImportError("PersistentMemoryBackend requires numpy: pip install numpy")
+
+        self.path = os.path.expanduser(path)
+        self.sync = sync
+        os.makedirs(self.path, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(self.path, "metadata.db"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._batch_depth = 0
+
+        self.dim: Optional[int] = self._get_meta("dim", None, int)
+        self.generation: int = self._get_meta("generation", 0, int)
+        self._row_count: int = self._get_meta("row_count", 0, int)
+        # 全文索引的文档数和总词数，随写入在同一事务中更新
+        self._text_docs: int = self._get_meta("text_docs", 0, int)
+        self._text_length: int = self._get_meta("text_length", 0, int)
+        if not self.text_indexed and self._conn.execute("SELECT 1 FROM memories LIMIT 1").fetchone() is None:
+            self._set_meta("text_index", 1)
+            self._conn.commit()
+
+        self._writer = None
+        self._unsynced = False  # 向量文件有尚未 fsync 的写入
+        self._memmap = None
+        self._memmap_rows = 0
+
+        # 向量检索用的 行号 -> ID 映射和有效行掩码，首次检索时加载，之后随写入更新
+        self._row_ids: Optional[List[Optional[str]]] = None
+        self._live = None
+        self._norms = None
+        # 记忆条数，首次 len() 时查询一次，之后随写入更新
+        self._count: Optional[int] = None
+
+        self._remove_stale_generations()
+
+    # ========== 元数据 ==========
+
+    def _get_meta(self, name: str, default: Any, cast=str) -> Any:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return cast(row[0]) if row else default
+
+    def _set_meta(self, name: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value))
+        )
+
+    def _embeddings_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"embeddings.{generation}.f32")
+
+    def _remove_stale_generations(self) -> None:
+        """删除崩溃遗留的其他代向量文件"""
+        current = os.path.basename(self._embeddings_path(self.generation))
+        for name in os.listdir(self.path):
+            if name.startswith("embeddings.") and name.endswith(".f32") and name != current:
+                os.remove(os.path.join(self.path, name))
+
+    @contextmanager
+    def batch(self):
+        """将多次写入合并为一个事务"""
+        self._batch_depth += 1
+        try:
+            yield self
+        except Exception:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.rollback()
+                self.dim = self._get_meta("dim", None, int)
+                self._row_count = self._get_meta("row_count", 0, int)
+                self._text_docs = self._get_meta("text_docs", 0, int)
+                self._text_length = self._get_meta("text_length", 0, int)
+                self._count = None
+                self._reset_search_state()
+            raise
+        else:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._sync_embeddings()
+                self._conn.commit()
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._sync_embeddings()
+            self._conn.commit()
+
+    def _sync_embeddings(self) -> None:
+        """提交前让已写入的向量落盘，每个事务只 fsync 一次"""
+        if self.sync and self._unsynced and self._writer is not None:
+            os.fsync(self._writer.fileno())
+        self._unsynced = False
+
+    # ========== 向量文件 ==========
+
+    def _append_embedding(self, embedding: Sequence[float]) -> Optional[int]:
+        """追加一行向量，返回行号；维度不匹配时返回 None"""
+        arr = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = arr.shape[0]
+            self._set_meta("dim", self.dim)
+        elif arr.shape[0] != self.dim:
+            logger.warning(f"Embedding dimension mismatch: expected {self.dim}, got {arr.shape[0]}")
+            return None
+
+        row = self._row_count
+        if self._writer is None:
+            path = self._embeddings_path(self.generation)
+            self._writer = open(path, "r+b" if os.path.exists(path) else "wb")
+        self._writer.seek(row * self.dim * 4)
+        self._writer.write(arr.tobytes())
+        self._writer.flush()
+        self._unsynced = True
+
+        self._row_count += 1
+        self._set_meta("row_count", self._row_count)
+
+        if self._row_ids is not None:
+            self._row_ids.append(None)
+            self._live = self._grow(self._live, row)
+            self._live[row] = False
+        if self._norms is not None:
+            # 只计算新行的范数，检索时无需重新扫描整个文件
+            self._norms = self._grow(self._norms, row)
+            self._norms[row] = np.linalg.norm(arr)
+        return row
+
+    @staticmethod
+    def _grow(array, row: int):
+        """容量不足以写入 row 时按倍数扩容，追加写入的均摊开销为 O(1)"""
+        if row < len(array):
+            return array
+        grown = np.zeros(max(16, 2 * len(array), row + 1), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _vectors(self):
+        """当前代向量文件的只读内存映射"""
+        if self._row_count == 0 or self.dim is None:
+            return None
+        if self._memmap is None or self._memmap_rows != self._row_count:
+            self._memmap = np.memmap(
+                self._embeddings_path(self.generation),
+                dtype=np.float32,
+                mode="r",
+                shape=(self._row_count, self.dim),
+            )
+            self._memmap_rows = self._row_count
+        return self._memmap
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _reset_search_state(self) -> None:
+        self._row_ids = None
+        self._live = None
+        self._norms = None
+        self._memmap = None
+
+    def _set_row(self, row: int, entry_id: Optional[str]) -> None:
+        """更新检索用的行映射和有效行掩码"""
+        self._row_ids[row] = entry_id
+        self._live[row] = entry_id is not None
+
+    # ========== 读写 ==========
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self._conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+        return self._count
+
+    def put(self, entry: MemoryEntry, write_embedding: bool = True, text: Optional[str] = None) -> None:
+        """
+        写入或更新记忆
+
+        Args:
+            entry: 记忆条目
+            write_embedding: 是否写入嵌入向量（只更新元数据时设为 False）
+            text: 全文索引文本，None 表示不更新该条目的倒排列表
+        """
+        old = self._conn.execute("SELECT row FROM memories WHERE id = ?", (entry.id,)).fetchone()
+        row = old[0] if old else None
+
+        # 同一个键的旧条目 (ID 不同) 会被 INSERT OR REPLACE 覆盖，一并清理其标签和倒排列表
+        replaced = self._conn.execute(
+            "SELECT id, row FROM memories WHERE key = ? AND id != ?", (entry.key, entry.id)
+        ).fetchone()
+        if replaced is not None:
+            self._conn.execute("DELETE FROM memory_tags WHERE id = ?", (replaced[0],))
+            self._unindex_text(replaced[0])
+
+        if write_embedding and entry.embedding is not None and len(entry.embedding) > 0:
+            row = self._append_embedding(entry.embedding)
+
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO memories ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.id,
+                entry.key,
+                row,
+                json.dumps(entry.value, ensure_ascii=False, default=str),
+                entry.memory_type.value,
+                json.dumps(entry.tags, ensure_ascii=False),
+                entry.importance,
+                entry.created_at,
+                entry.accessed_at,
+                entry.access_count,
+                entry.ttl_seconds,
+                json.dumps(entry.metadata, ensure_ascii=False, default=str),
+            ),
+        )
+        self._conn.execute("DELETE FROM memory_tags WHERE id = ?", (entry.id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO memory_tags (tag, id) VALUES (?, ?)",
+            [(tag, entry.id) for tag in entry.tags],
+        )
+        if text is not None:
+            self._index_text(entry.id, text)
+        if self._count is not None and not old and replaced is None:
+            self._count += 1
+        self._commit()
+
+        if self._row_ids is not None:
+            if old and old[0] is not None and old[0] != row:
+                self._set_row(old[0], None)
+            if replaced is not None and replaced[1] is not None:
+                self._set_row(replaced[1], None)
+            if row is not None:
+                self._set_row(row, entry.id)
+
+    def delete(self, entry_id: str) -> bool:
+        """按 ID 删除记忆"""
+        old = self._conn.execute("SELECT row FROM memories WHERE id = ?", (entry_id,)).fetchone()
+        if not old:
+            return False
+
+        self._conn.execute("DELETE FROM memories WHERE id = ?", (entry_id,))
+        self._conn.execute("DELETE FROM memory_tags WHERE id = ?", (entry_id,))
+        self._unindex_text(entry_id)
+        if self._count is not None:
+            self._count -= 1
+        self._commit()
+
+        if self._row_ids is not None and old[0] is not None:
+            self._set_row(old[0], None)
+        return True
+
+    def get(self, entry_id: str) -> Optional[MemoryEntry]:
+        """按 ID 读取记忆"""
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM memories WHERE id = ?", (entry_id,)
+        ).fetchone()
+        return self._to_entry(row) if row else None
+
+    def get_by_key(self, key: str) -> Optional[MemoryEntry]:
+        """按键读取记忆"""
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM memories WHERE key = ?", (key,)
+        ).fetchone()
+        return self._to_entry(row) if row else None
+
+    def get_id_by_key(self, key: str) -> Optional[str]:
+        """按键查询记忆 ID（不实例化条目）"""
+        row = self._conn.execute("SELECT id FROM memories WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def ids_by_tags(self, tags: List[str]) -> List[str]:
+        """查询同时带有所有标签的记忆 ID"""
+        if not tags:
+            return []
+        placeholders = ", ".join("?" for _ in tags)
+        rows = self._conn.execute(
+            f"SELECT id FROM memory_tags WHERE tag IN ({placeholders}) "
+            f"GROUP BY id HAVING COUNT(DISTINCT tag) = ?",
+            (*tags, len(set(tags))),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def ids_by_type(self, memory_type: MemoryType) -> List[str]:
+        """查询指定类型的记忆 ID"""
+        rows = self._conn.execute(
+            "SELECT id FROM memories WHERE memory_type = ?", (memory_type.value,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def expired_ids(self, now: float) -> List[str]:
+        """查询已过期的记忆 ID"""
+        rows = self._conn.execute(
+            "SELECT id FROM memories WHERE ttl_seconds IS NOT NULL "
+            "AND created_at + ttl_seconds < ?",
+            (now,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def iter_entries(self, batch_size: int = 1000) -> Iterator[MemoryEntry]:
+        """按批次遍历所有记忆"""
+        cursor = self._conn.execute(f"SELECT {_COLUMNS} FROM memories")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._to_entry(row)
+
+    def _to_entry(self, row: Tuple) -> MemoryEntry:
+        """将数据库行转换为记忆条目"""
+        (entry_id, key, vector_row, value, memory_type, tags, importance,
+         created_at, accessed_at, access_count, ttl_seconds, metadata) = row
+
+        embedding = None
+        vectors = self._vectors()
+        if vector_row is not None and vectors is not None:
+            embedding = vectors[vector_row]
+
+        return MemoryEntry(
+            id=entry_id,
+            key=key,
+            value=json.loads(value) if value is not None else None,
+            memory_type=MemoryType(memory_type),
+            tags=json.loads(tags),
+            importance=importance,
+            embedding=embedding,
+            created_at=created_at,
+            accessed_at=accessed_at,
+            access_count=access_count,
+            ttl_seconds=ttl_seconds,
+            metadata=json.loads(metadata),
+        )
+
+    # ========== 向量检索 ==========
+
+    def _ensure_search_state(self) -> None:
+        """加载 行号 -> ID 映射和有效行掩码，并计算向量范数"""
+        if self._row_ids is None:
+            self._row_ids = [None] * self._row_count
+            self._live = np.zeros(self._row_count, dtype=bool)
+            for entry_id, row in self._conn.execute(
+                "SELECT id, row FROM memories WHERE row IS NOT NULL"
+            ):
+                self._set_row(row, entry_id)
+
+        if self._norms is None:
+            vectors = self._vectors()
+            if vectors is None:
+                self._norms = np.zeros(0, dtype=np.float32)
+            else:
+                norms = np.empty(self._row_count, dtype=np.float32)
+                for start in range(0, self._row_count, 65536):
+                    chunk = vectors[start:start + 65536]
+                    norms[start:start + len(chunk)] = np.linalg.norm(chunk, axis=1)
+                self._norms = norms
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        min_similarity: float = -1.0,
+        chunk_size: int = 65536,
+        memory_filter: Optional[MemoryFilter] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        分块扫描内存映射的向量文件，返回 (记忆 ID, 相似度) 列表
+
+        只有被扫描的页面会被读入内存，结果中的条目不会被实例化。
+        设置 memory_filter 时先在 SQLite 中求出候选行，只读取并计算这些行。
+        """
+        vectors = self._vectors()
+        if vectors is None or top_k <= 0:
+            return []
+
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dim:
+            return []
+        q_norm = float(np.linalg.norm(q))
+        if q_norm == 0:
+            return []
+        q = q / q_norm
+
+        self._ensure_search_state()
+        live = self._live
+
+        candidate_rows = None
+        if memory_filter is not None:
+            candidate_rows = self._matching_rows(memory_filter)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for rows, chunk in self._row_blocks(vectors, chunk_size, candidate_rows):
+            norms = self._norms[rows]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = np.where(norms > 0, (chunk @ q) / norms, 0.0).astype(np.float32)
+            scores[~live[rows]] = -np.inf
+
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1)[:top_k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [
+            (self._row_ids[best_rows[i]], float(best_scores[i]))
+            for i in order
+            if np.isfinite(best_scores[i]) and best_scores[i] >= min_similarity
+        ]
+
+    def _row_blocks(self, vectors, chunk_size: int, rows=None):
+        """按块产出 (行号数组, 向量块)，rows 为 None 时顺序扫描全部行"""
+        if rows is None:
+            for start in range(0, self._row_count, chunk_size):
+                chunk = vectors[start:start + chunk_size]
+                yield np.arange(start, start + len(chunk)), chunk
+        else:
+            for start in range(0, len(rows), chunk_size):
+                block = rows[start:start + chunk_size]
+                yield block, vectors[block]
+
+    def _matching_rows(self, memory_filter: MemoryFilter):
+        """在 SQLite 中求出满足过滤条件的向量行号 (升序，便于顺序读取)"""
+        rows = sorted(self._filter_query("row", memory_filter, ["row IS NOT NULL"]))
+        return np.asarray(rows, dtype=np.int64)
+
+    def _matching_ids(self, memory_filter: MemoryFilter) -> List[str]:
+        """在 SQLite 中求出满足过滤条件的记忆 ID"""
+        return self._filter_query("id", memory_filter)
+
+    def _filter_query(
+        self,
+        column: str,
+        memory_filter: MemoryFilter,
+        conditions: Optional[List[str]] = None,
+    ) -> List[Any]:
+        """查询满足过滤条件的记忆的某一列 (元数据条件在 Python 中比较)"""
+        conditions = list(conditions or [])
+        params: List[Any] = []
+        if memory_filter.memory_type is not None:
+            conditions.append("memory_type = ?")
+            params.append(memory_filter.memory_type.value)
+        if memory_filter.min_importance is not None:
+            conditions.append("importance >= ?")
+            params.append(memory_filter.min_importance)
+        if memory_filter.max_importance is not None:
+            conditions.append("importance <= ?")
+            params.append(memory_filter.max_importance)
+        if memory_filter.created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(memory_filter.created_after)
+        if memory_filter.created_before is not None:
+            conditions.append("created_at <= ?")
+            params.append(memory_filter.created_before)
+        if memory_filter.tags:
+            tags = list(set(memory_filter.tags))
+            placeholders = ", ".join("?" for _ in tags)
+            conditions.append(
+                f"id IN (SELECT id FROM memory_tags WHERE tag IN ({placeholders}) "
+                f"GROUP BY id HAVING COUNT(DISTINCT tag) = ?)"
+            )
+            params.extend(tags)
+            params.append(len(tags))
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._conn.execute(f"SELECT {column}, metadata FROM memories{where}", params)
+        values = []
+        for value, metadata in cursor:
+            if memory_filter.metadata:
+                stored = json.loads(metadata)
+                if any(
+                    name not in stored or stored[name] != expected
+                    for name, expected in memory_filter.metadata.items()
+                ):
+                    continue
+            values.append(value)
+        return values
+
+    # ========== 全文检索 ==========
+
+    @property
+    def text_indexed(self) -> bool:
+        """全文索引是否覆盖全部条目 (早期版本创建的存储需要 rebuild_text_index())"""
+        return self._get_meta("text_index", None) is not None
+
+    def _index_text(self, entry_id: str, text: str) -> None:
+        """写入或替换条目的倒排列表"""
+        self._unindex_text(entry_id)
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        self._conn.executemany(
+            "INSERT INTO memory_terms (term, id, tf) VALUES (?, ?, ?)",
+            [(term, entry_id, tf) for term, tf in counts.items()],
+        )
+        self._conn.execute(
+            "INSERT INTO memory_text (id, length) VALUES (?, ?)", (entry_id, len(tokens))
+        )
+        self._text_docs += 1
+        self._text_length += len(tokens)
+        self._set_text_meta()
+
+    def _unindex_text(self, entry_id: str) -> None:
+        """删除条目的倒排列表"""
+        old = self._conn.execute(
+            "SELECT length FROM memory_text WHERE id = ?", (entry_id,)
+        ).fetchone()
+        if old is None:
+            return
+        self._conn.execute("DELETE FROM memory_terms WHERE id = ?", (entry_id,))
+        self._conn.execute("DELETE FROM memory_text WHERE id = ?", (entry_id,))
+        self._text_docs -= 1
+        self._text_length -= old[0]
+        self._set_text_meta()
+
+    def _set_text_meta(self) -> None:
+        self._set_meta("text_docs", self._text_docs)
+        self._set_meta("text_length", self._text_length)
+
+    def rebuild_text_index(self, text_fn) -> int:
+        """
+        用 text_fn(entry) 重建全文索引
+
+        Returns:
+            索引的条目数
+        """
+        with self.batch():
+            self._conn.execute("DELETE FROM memory_terms")
+            self._conn.execute("DELETE FROM memory_text")
+            self._text_docs = 0
+            self._text_length = 0
+            for entry in self.iter_entries():
+                self._index_text(entry.id, text_fn(entry))
+            self._set_text_meta()
+            self._set_meta("text_index", 1)
+        logger.info(f"Rebuilt text index for {self._text_docs} memories")
+        return self._text_docs
+
+    def text_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        memory_filter: Optional[MemoryFilter] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25 关键词检索，返回按分数降序的 (记忆 ID, 分数) 列表
+
+        只读取查询词的倒排列表，结果中的条目不会被实例化。
+        """
+        if not self._text_docs or top_k <= 0:
+            return []
+
+        candidate_ids = None
+        if memory_filter is not None:
+            candidate_ids = set(self._matching_ids(memory_filter))
+
+        n_docs = self._text_docs
+        avg_length = self._text_length / n_docs or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._conn.execute(
+                "SELECT t.id, t.tf, d.length FROM memory_terms t "
+                "JOIN memory_text d ON d.id = t.id WHERE t.term = ?",
+                (term,),
+            ).fetchall()
+            if not postings:
+                continue
+            # 与 BM25Index.search 相同的打分公式
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for entry_id, tf, length in postings:
+                if candidate_ids is not None and entry_id not in candidate_ids:
+                    continue
+                norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * length / avg_length)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * tf * (_BM25_K1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    # ========== 维护 ==========
+
+    def compact(self) -> int:
+        """
+        回收向量文件中的空洞
+
+        Returns:
+            压缩后的向量行数
+
+        Raises:
+            RuntimeError: 在 batch() 内调用 (压缩需要单独提交，会破坏批次的原子性)
+        """
+        if self._batch_depth:
+            raise RuntimeError("compact() cannot run inside batch()")
+
+        vectors = self._vectors()
+        live = self._conn.execute(
+            "SELECT id, row FROM memories WHERE row IS NOT NULL ORDER BY row"
+        ).fetchall()
+
+        new_generation = self.generation + 1
+        new_path = self._embeddings_path(new_generation)
+        with open(new_path, "wb") as f:
+            for _, row in live:
+                f.write(vectors[row].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            self._conn.executemany(
+                "UPDATE memories SET row = ? WHERE id = ?",
+                [(new_row, entry_id) for new_row, (entry_id, _) in enumerate(live)],
+            )
+            self._set_meta("generation", new_generation)
+            self._set_meta("row_count", len(live))
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            os.remove(new_path)
+            raise
+
+        self._close_writer()
+        old_path = self._embeddings_path(self.generation)
+        self.generation = new_generation
+        self._row_count = len(live)
+        self._reset_search_state()
+        if os.path.exists(old_path):
+            os.remove(old_path)
+
+        logger.info(f"Compacted embeddings to {len(live)} rows (generation {new_generation})")
+        return len(live)
+
+    def clear(self) -> None:
+        """删除所有记忆"""
+        self._conn.execute("DELETE FROM memories")
+        self._conn.execute("DELETE FROM memory_tags")
+        self._conn.execute("DELETE FROM memory_terms")
+        self._conn.execute("DELETE FROM memory_text")
+        self._set_meta("row_count", 0)
+        self._text_docs = 0
+        self._text_length = 0
+        self._set_text_meta()
+        self._conn.commit()
+        self._row_count = 0
+        self._count = 0
+        self._reset_search_state()
+        self._close_writer()
+        path = self._embeddings_path(self.generation)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        live_rows = self._conn.execute(
+            "SELECT COUNT(*) FROM memories WHERE row IS NOT NULL"
+        ).fetchone()[0]
+        return {
+            "path": self.path,
+            "persisted": len(self),
+            "dim": self.dim,
+            "generation": self.generation,
+            "embedding_rows": self._row_count,
+            "dead_rows": self._row_count - live_rows,
+            "text_indexed": self._text_docs,
+        }
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._memmap = None
+        self._sync_embeddings()
+        self._close_writer()
+        self._conn.commit()
+        self._conn.close()
+
+
+__all__ = [
+    "PersistentMemoryBackend",
+]
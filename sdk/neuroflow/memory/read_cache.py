@@ -0,0 +1,200 @@
+"""
+NeuroFlow Python SDK - Memory Read Cache
+
+Kernel 记忆的本地读缓存 - 按 (agent_id, key) 缓存 retrieve 的结果 (包括不存在)，
+热点键 (如每轮都读取的用户偏好) 无需再经过网络往返和值解码
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+import copy
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# 负缓存标记：键在 Kernel 中不存在
+_MISSING = object()
+
+
+class MemoryReadCache:
+    """
+    有界的记忆读缓存
+
+    - 键为 (agent_id, key)，每个 agent_id 是独立的命名空间，可单独失效
+    - 条目按 TTL 过期，超出 max_entries 时淘汰最久未使用的条目
+    - 不存在的键也缓存 (负缓存)，使用更短的 negative_ttl_seconds
+    - 返回的是缓存值的副本，调用方可以修改
+    - 客户端在 store / delete 成功后写穿缓存；读取期间有写入时，
+      该次读取的结果不再回填 (见 generation)
+
+    用法:
+        cache = MemoryReadCache(max_entries=10000, ttl_seconds=60)
+        client = KernelMemoryClient("localhost:50051", read_cache=cache)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 60.0,
+        negative_ttl_seconds: Optional[float] = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries: 最多缓存的条目数
+            ttl_seconds: 条目的缓存时间，None 表示不过期
+            negative_ttl_seconds: 不存在的键的缓存时间，0 表示不做负缓存
+            clock: 计算过期时间的时钟
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        # (agent_id, key) -> (记忆或 _MISSING, 过期时间，None 表示不过期)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, Optional[float]]]" = OrderedDict()
+        # agent_id -> 该命名空间下的键
+        self._namespaces: Dict[str, Set[str]] = {}
+        # 写入次数，读取前后不一致说明读到的结果可能已过时
+        self._generation = 0
+
+        # 统计
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """当前的写入代数，在发起读取前记录，回填时传给 fill()"""
+        return self._generation
+
+    def lookup(self, agent_id: str, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        查找缓存
+
+        Returns:
+            (是否命中, 记忆)；命中负缓存时为 (True, None)
+        """
+        cache_key = (agent_id, key)
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return False, None
+
+        memory, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            self._remove(cache_key)
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return False, None
+
+        self._entries.move_to_end(cache_key)
+        if memory is _MISSING:
+            self._stats["negative_hits"] += 1
+            return True, None
+        self._stats["hits"] += 1
+        return True, copy.deepcopy(memory)
+
+    def fill(self, agent_id: str, key: str, memory: Optional[Dict[str, Any]], generation: int) -> None:
+        """回填读取结果 (None 表示不存在)；读取期间有写入时丢弃"""
+        if generation != self._generation:
+            return
+        if memory is None:
+            self._set(agent_id, key, _MISSING, self.negative_ttl_seconds)
+        else:
+            self._set(agent_id, key, copy.deepcopy(memory), self.ttl_seconds)
+
+    def put(
+        self,
+        agent_id: str,
+        key: str,
+        memory: Dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """写穿：写入刚存储的记忆，ttl_seconds 不超过配置的 TTL (用于记忆本身的过期时间)"""
+        self._generation += 1
+        ttl = self.ttl_seconds
+        if ttl_seconds is not None:
+            ttl = ttl_seconds if ttl is None else min(ttl, ttl_seconds)
+        self._set(agent_id, key, copy.deepcopy(memory), ttl)
+
+    def put_missing(self, agent_id: str, key: str) -> None:
+        """写穿：记录刚删除的键"""
+        self._generation += 1
+        self._set(agent_id, key, _MISSING, self.negative_ttl_seconds)
+
+    def _set(self, agent_id: str, key: str, memory: Any, ttl_seconds: Optional[float]) -> None:
+        """写入条目，TTL 不为正时只删除旧条目"""
+        cache_key = (agent_id, key)
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            self._remove(cache_key)
+            return
+
+        expires_at = self._clock() + ttl_seconds if ttl_seconds is not None else None
+        self._entries[cache_key] = (memory, expires_at)
+        self._entries.move_to_end(cache_key)
+        self._namespaces.setdefault(agent_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, cache_key: Tuple[str, str]) -> None:
+        """删除条目并维护命名空间索引"""
+        if self._entries.pop(cache_key, None) is None:
+            return
+        agent_id, key = cache_key
+        keys = self._namespaces.get(agent_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[agent_id]
+
+    def invalidate(self, agent_id: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        失效缓存：指定 key 时只失效该键，只指定 agent_id 时失效整个命名空间，都不指定时清空
+
+        Returns:
+            删除的条目数
+        """
+        self._generation += 1
+        if agent_id is None:
+            count = len(self._entries)
+            self._entries.clear()
+            self._namespaces.clear()
+            return count
+        if key is not None:
+            before = len(self._entries)
+            self._remove((agent_id, key))
+            return before - len(self._entries)
+
+        keys = self._namespaces.pop(agent_id, set())
+        for k in keys:
+            self._entries.pop((agent_id, k), None)
+        return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self.invalidate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        stats["namespaces"] = len(self._namespaces)
+        hits = stats["hits"] + stats["negative_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+__all__ = [
+    "MemoryReadCache",
+]
@@ -0,0 +1,470 @@
+"""
+NeuroFlow Python SDK - Vector Index
+
+向量索引 - 为 VectorMemoryStore 提供矩阵化的相似度检索
+- FlatVectorIndex: 精确暴力检索
+- IVFFlatIndex: 倒排文件近似检索 (IVF-Flat)
+
+NumPy 为可选依赖，未安装时 VectorMemoryStore 会回退到纯 Python 的逐条计算。
+"""
+
+from abc import ABC, abstractmethod
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+def numpy_available() -> bool:
+    """检查 NumPy 是否可用"""
+    return np is not None
+
+
+class VectorIndex(ABC):
+    """向量索引接口 - VectorMemoryStore 的可插拔检索后端"""
+
+    @abstractmethod
+    def add(self, entry_id: str, vector: Sequence[float]) -> bool:
+        """添加或更新向量"""
+        pass
+
+    @abstractmethod
+    def remove(self, entry_id: str) -> bool:
+        """删除向量"""
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        min_similarity: float = -1.0,
+        candidate_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        检索最相似的向量，返回 (记忆 ID, 相似度) 列表
+
+        设置 candidate_ids 时只对这些向量打分 (预过滤)
+        """
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空索引"""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __contains__(self, entry_id: str) -> bool:
+        pass
+
+
+class FlatVectorIndex(VectorIndex):
+    """
+    扁平向量索引 - 精确的暴力检索
+
+    所有向量保存在一个连续的 float32 矩阵中，写入时预先归一化，
+    查询时只需一次矩阵-向量乘法加 argpartition 取 top-k。
+
+    删除采用 "末行换位" 策略，保证矩阵始终紧凑，删除为 O(dim)。
+
+    用法:
+        index = FlatVectorIndex()
+        index.add("id-1", [0.1, 0.2, 0.3])
+        hits = index.search([0.1, 0.2, 0.3], top_k=5)  # [(id, similarity), ...]
+    """
+
+    def __init__(self, dim: Optional[int] = None, initial_capacity: int = 1024):
+        if np is None:
+            raise ImportError("FlatVectorIndex requires numpy: pip install numpy")
+
+        self.dim = dim
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix = None
+        self._size = 0
+
+        # 行号 <-> 记忆 ID 映射
+        self._row_ids: List[str] = []
+        self._id_rows: Dict[str, int] = {}
+
+        if dim is not None:
+            self._allocate(dim, self._initial_capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._id_rows
+
+    def _allocate(self, dim: int, capacity: int) -> None:
+        """分配矩阵空间"""
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+
+    def _ensure_capacity(self, required: int) -> None:
+        """容量不足时按倍数扩容"""
+        capacity = self._matrix.shape[0]
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def _normalize(self, vector: Sequence[float]):
+        """转换为归一化的 float32 向量，维度不匹配时返回 None"""
+        arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dim is not None and arr.shape[0] != self.dim:
+            return None
+        norm = float(np.linalg.norm(arr))
+        if norm > 0:
+            arr = arr / norm
+        return arr
+
+    def add(self, entry_id: str, vector: Sequence[float]) -> bool:
+        """
+        添加或更新向量
+
+        Returns:
+            是否成功写入（维度不匹配时返回 False）
+        """
+        if self.dim is None:
+            self.dim = len(vector)
+            self._allocate(self.dim, self._initial_capacity)
+
+        arr = self._normalize(vector)
+        if arr is None:
+            logger.warning(
+                f"Embedding dimension mismatch for {entry_id}: "
+                f"expected {self.dim}, got {len(vector)}"
+            )
+            return False
+
+        row = self._id_rows.get(entry_id)
+        if row is None:
+            self._ensure_capacity(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._row_ids.append(entry_id)
+            self._id_rows[entry_id] = row
+
+        self._matrix[row] = arr
+        return True
+
+    def remove(self, entry_id: str) -> bool:
+        """删除向量（将末行移入空位）"""
+        row = self._id_rows.pop(entry_id, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            moved_id = self._row_ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._row_ids[row] = moved_id
+            self._id_rows[moved_id] = row
+
+        self._row_ids.pop()
+        self._size -= 1
+        return True
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        min_similarity: float = -1.0,
+        candidate_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        检索最相似的向量
+
+        Args:
+            query: 查询向量
+            top_k: 返回数量
+            min_similarity: 最小余弦相似度
+            candidate_ids: 只在这些记忆中检索，None 表示全部
+
+        Returns:
+            按相似度降序排列的 (记忆 ID, 相似度) 列表
+        """
+        if self._size == 0 or top_k <= 0:
+            return []
+
+        q = self._normalize(query)
+        if q is None:
+            return []
+
+        if candidate_ids is None:
+            rows = np.arange(self._size)
+            scores = self._matrix[:self._size] @ q
+        else:
+            rows = np.fromiter(
+                (self._id_rows[i] for i in candidate_ids if i in self._id_rows),
+                dtype=np.int64,
+            )
+            if len(rows) == 0:
+                return []
+            scores = self._matrix[rows] @ q
+
+        k = min(top_k, len(rows))
+        if k < len(rows):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            (self._row_ids[rows[i]], float(scores[i]))
+            for i in top
+            if scores[i] >= min_similarity
+        ]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._size = 0
+        self._row_ids.clear()
+        self._id_rows.clear()
+        if self.dim is not None:
+            self._allocate(self.dim, self._initial_capacity)
+
+    def get_vectors(self) -> Tuple[List[str], "np.ndarray"]:
+        """导出所有 (记忆 ID 列表, 归一化向量矩阵副本)"""
+        if self._size == 0:
+            return [], np.zeros((0, self.dim or 0), dtype=np.float32)
+        return list(self._row_ids), self._matrix[:self._size].copy()
+
+
+class IVFFlatIndex(VectorIndex):
+    """
+    IVF-Flat 近似最近邻索引
+
+    通过球面 k-means 将向量划分到 nlist 个倒排列表中，每个列表是一个
+    FlatVectorIndex。查询时只扫描与查询最接近的 nprobe 个列表，
+    代价约为 O(N * nprobe / nlist)。
+
+    - 向量数量达到 train_threshold 前，所有向量放在同一个列表中 (等价于精确检索)
+    - 达到阈值后自动训练质心；之后新增向量直接分配到最近的质心
+    - 向量数量相对上次训练增长 retrain_factor 倍时重新训练
+
+    用法:
+        index = IVFFlatIndex(nlist=64, nprobe=8)
+        store = VectorMemoryStore(embedding_fn=embed, vector_index=index)
+    """
+
+    def __init__(
+        self,
+        nlist: int = 64,
+        nprobe: int = 8,
+        train_threshold: Optional[int] = None,
+        retrain_factor: float = 4.0,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+    ):
+        if np is None:
+            raise ImportError("IVFFlatIndex requires numpy: pip install numpy")
+
+        self.nlist = max(1, nlist)
+        self.nprobe = max(1, nprobe)
+        self.train_threshold = train_threshold or self.nlist * 16
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self._rng = np.random.default_rng(seed)
+
+        self.dim: Optional[int] = None
+        self._centroids = None
+        self._trained_size = 0
+
+        # 倒排列表: 未训练时只有一个列表
+        self._lists: List[FlatVectorIndex] = [FlatVectorIndex()]
+        self._assignment: Dict[str, int] = {}  # id -> list
+
+    def __len__(self) -> int:
+        return len(self._assignment)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._assignment
+
+    @property
+    def is_trained(self) -> bool:
+        """是否已训练质心"""
+        return self._centroids is not None
+
+    def _nearest_list(self, vector) -> int:
+        """查找与向量最接近的质心"""
+        return int(np.argmax(self._centroids @ vector))
+
+    def add(self, entry_id: str, vector: Sequence[float]) -> bool:
+        arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = arr.shape[0]
+        elif arr.shape[0] != self.dim:
+            logger.warning(
+                f"Embedding dimension mismatch for {entry_id}: "
+                f"expected {self.dim}, got {arr.shape[0]}"
+            )
+            return False
+
+        norm = float(np.linalg.norm(arr))
+        if norm > 0:
+            arr = arr / norm
+
+        target = self._nearest_list(arr) if self.is_trained else 0
+        current = self._assignment.get(entry_id)
+        if current is not None and current != target:
+            self._lists[current].remove(entry_id)
+
+        self._lists[target].add(entry_id, arr)
+        self._assignment[entry_id] = target
+
+        size = len(self._assignment)
+        if not self.is_trained:
+            if size >= self.train_threshold:
+                self.train()
+        elif size >= self._trained_size * self.retrain_factor:
+            self.train()
+        return True
+
+    def remove(self, entry_id: str) -> bool:
+        list_no = self._assignment.pop(entry_id, None)
+        if list_no is None:
+            return False
+        self._lists[list_no].remove(entry_id)
+        return True
+
+    def train(self) -> None:
+        """使用当前所有向量训练质心，并重新分配倒排列表"""
+        ids: List[str] = []
+        blocks = []
+        for inverted_list in self._lists:
+            list_ids, vectors = inverted_list.get_vectors()
+            ids.extend(list_ids)
+            blocks.append(vectors)
+
+        if not ids:
+            return
+
+        data = np.concatenate(blocks, axis=0)
+        nlist = min(self.nlist, len(ids))
+        centroids = self._kmeans(data, nlist)
+        assignments = np.argmax(data @ centroids.T, axis=1)
+
+        self._centroids = centroids
+        capacity = max(16, 2 * len(ids) // nlist)
+        self._lists = [
+            FlatVectorIndex(dim=self.dim, initial_capacity=capacity)
+            for _ in range(nlist)
+        ]
+        self._assignment = {}
+        for entry_id, vector, list_no in zip(ids, data, assignments):
+            list_no = int(list_no)
+            self._lists[list_no].add(entry_id, vector)
+            self._assignment[entry_id] = list_no
+
+        self._trained_size = len(ids)
+        logger.debug(f"Trained IVF index: {nlist} lists over {len(ids)} vectors")
+
+    def _kmeans(self, data, k: int):
+        """球面 k-means (数据已归一化，使用内积作为相似度)"""
+        init = self._rng.choice(data.shape[0], size=k, replace=False)
+        centroids = data[init].copy()
+
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=k)
+
+            empty = counts == 0
+            if empty.any():
+                # 空簇重新随机初始化
+                sums[empty] = data[self._rng.choice(data.shape[0], size=int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        return centroids
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        min_similarity: float = -1.0,
+        candidate_ids: Optional[Collection[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        if not self._assignment or top_k <= 0:
+            return []
+
+        if not self.is_trained:
+            return self._lists[0].search(query, top_k, min_similarity, candidate_ids)
+
+        if candidate_ids is not None:
+            return self._search_candidates(query, top_k, min_similarity, candidate_ids)
+
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dim:
+            return []
+        norm = float(np.linalg.norm(q))
+        if norm > 0:
+            q = q / norm
+
+        nprobe = min(self.nprobe, len(self._lists))
+        centroid_scores = self._centroids @ q
+        if nprobe < len(self._lists):
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = range(len(self._lists))
+
+        hits: List[Tuple[str, float]] = []
+        for list_no in probes:
+            hits.extend(self._lists[int(list_no)].search(q, top_k, min_similarity))
+
+        hits.sort(key=lambda x: -x[1])
+        return hits[:top_k]
+
+    def _search_candidates(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        min_similarity: float,
+        candidate_ids: Collection[str],
+    ) -> List[Tuple[str, float]]:
+        """
+        预过滤检索：候选集已经限定了打分范围，因此不再按 nprobe 裁剪，
+        而是在候选所在的每个倒排列表中精确检索，结果不会因过滤而丢失
+        """
+        grouped: Dict[int, List[str]] = {}
+        for entry_id in candidate_ids:
+            list_no = self._assignment.get(entry_id)
+            if list_no is not None:
+                grouped.setdefault(list_no, []).append(entry_id)
+
+        hits: List[Tuple[str, float]] = []
+        for list_no, ids in grouped.items():
+            hits.extend(self._lists[list_no].search(query, top_k, min_similarity, ids))
+
+        hits.sort(key=lambda x: -x[1])
+        return hits[:top_k]
+
+    def clear(self) -> None:
+        self.dim = None
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = [FlatVectorIndex()]
+        self._assignment.clear()
+
+
+__all__ = [
+    "VectorIndex",
+    "FlatVectorIndex",
+    "IVFFlatIndex",
+    "numpy_available",
+]
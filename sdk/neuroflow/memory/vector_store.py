@@ -4,14 +4,32 @@ NeuroFlow Python SDK - Vector Memory Store
 向量记忆存储 - 支持语义检索的长短期记忆系统
 """
 
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
 from enum import Enum
+import asyncio
+import sys
 import uuid
 import time
 import logging
 import math
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+from .vector_index import VectorIndex, FlatVectorIndex, numpy_available
+from .bm25 import BM25Index
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache
+from .eviction import EvictionQueue
+from .expiry import TimingWheel, ExpirySweeper
+
+if TYPE_CHECKING:
+    from .persistent_store import PersistentMemoryBackend
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,22 +42,107 @@ class MemoryType(Enum):
     SEMANTIC = "semantic"
 
 
-@dataclass
 class MemoryEntry:
-    """记忆条目"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    key: str = ""
-    value: Any = None
-    memory_type: MemoryType = MemoryType.SHORT_TERM
-    tags: List[str] = field(default_factory=list)
-    importance: float = 0.5  # 0.0 - 1.0
-    embedding: Optional[List[float]] = None
-    created_at: float = field(default_factory=time.time)
-    accessed_at: float = field(default_factory=time.time)
-    access_count: int = 0
-    ttl_seconds: Optional[int] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    
+    """
+    记忆条目
+
+    使用 __slots__ 的紧凑表示:
+    - 嵌入向量保存为 array('f')，每维 4 字节，而不是装箱的 Python float
+    - 标签字符串经过 sys.intern，相同标签在所有条目间共享
+    - metadata 在首次访问时才创建字典
+
+    构造参数、属性名和 to_dict() 输出与原先的 dataclass 保持一致。
+    """
+
+    __slots__ = (
+        "id",
+        "key",
+        "value",
+        "memory_type",
+        "_tags",
+        "importance",
+        "_embedding",
+        "created_at",
+        "accessed_at",
+        "access_count",
+        "ttl_seconds",
+        "_metadata",
+    )
+
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        key: str = "",
+        value: Any = None,
+        memory_type: MemoryType = MemoryType.SHORT_TERM,
+        tags: Optional[List[str]] = None,
+        importance: float = 0.5,  # 0.0 - 1.0
+        embedding: Optional[Sequence[float]] = None,
+        created_at: Optional[float] = None,
+        accessed_at: Optional[float] = None,
+        access_count: int = 0,
+        ttl_seconds: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        now = time.time()
+        self.id = id if id is not None else str(uuid.uuid4())
+        self.key = key
+        self.value = value
+        self.memory_type = memory_type
+        self.tags = tags if tags is not None else []
+        self.importance = importance
+        self.embedding = embedding
+        self.created_at = created_at if created_at is not None else now
+        self.accessed_at = accessed_at if accessed_at is not None else now
+        self.access_count = access_count
+        self.ttl_seconds = ttl_seconds
+        self._metadata = metadata
+
+    @property
+    def tags(self) -> List[str]:
+        """标签列表"""
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags: List[str]) -> None:
+        self._tags = [sys.intern(tag) if type(tag) is str else tag for tag in tags]
+
+    @property
+    def embedding(self) -> Optional[array]:
+        """嵌入向量 (array('f'))"""
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, embedding: Optional[Sequence[float]]) -> None:
+        self._embedding = _to_float_array(embedding) if embedding is not None else None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """额外元数据"""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: Dict[str, Any]) -> None:
+        self._metadata = metadata
+
+    def __repr__(self) -> str:
+        return (
+            f"MemoryEntry(id={self.id!r}, key={self.key!r}, value={self.value!r}, "
+            f"memory_type={self.memory_type}, tags={self.tags!r}, importance={self.importance})"
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.to_dict() == other.to_dict()
+            and self.embedding == other.embedding
+        )
+
+    __hash__ = None
+
     def is_expired(self) -> bool:
         """检查是否过期"""
         if self.ttl_seconds is None:
@@ -63,6 +166,68 @@ class MemoryEntry:
         }
 
 
+def _to_float_array(values: Sequence[float]) -> array:
+    """转换为 float32 数组，已是 array('f') 时不复制"""
+    if isinstance(values, array) and values.typecode == "f":
+        return values
+    if np is not None and isinstance(values, np.ndarray):
+        result = array("f")
+        result.frombytes(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+        return result
+    return array("f", values)
+
+
+@dataclass
+class MemoryFilter:
+    """
+    记忆过滤条件 - 各条件之间为 AND 关系，None 表示不限制
+
+    - tags: 必须同时带有的标签
+    - memory_type: 记忆类型
+    - min_importance / max_importance: 重要性范围 (闭区间)
+    - created_after / created_before: 创建时间范围 (闭区间，时间戳)
+    - metadata: 元数据中必须相等的键值
+    """
+    tags: Optional[List[str]] = None
+    memory_type: Optional[MemoryType] = None
+    min_importance: Optional[float] = None
+    max_importance: Optional[float] = None
+    created_after: Optional[float] = None
+    created_before: Optional[float] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def is_empty(self) -> bool:
+        """是否没有任何条件"""
+        return not self.tags and self.memory_type is None and not self.has_attribute_conditions()
+
+    def has_attribute_conditions(self) -> bool:
+        """是否有无法通过标签/类型索引求值的条件"""
+        return (
+            self.min_importance is not None
+            or self.max_importance is not None
+            or self.created_after is not None
+            or self.created_before is not None
+            or bool(self.metadata)
+        )
+
+    def matches_attributes(self, entry: MemoryEntry) -> bool:
+        """检查重要性、创建时间和元数据条件"""
+        if self.min_importance is not None and entry.importance < self.min_importance:
+            return False
+        if self.max_importance is not None and entry.importance > self.max_importance:
+            return False
+        if self.created_after is not None and entry.created_at < self.created_after:
+            return False
+        if self.created_before is not None and entry.created_at > self.created_before:
+            return False
+        if self.metadata:
+            metadata = entry.metadata
+            for name, value in self.metadata.items():
+                if name not in metadata or metadata[name] != value:
+                    return False
+        return True
+
+
 class VectorMemoryStore:
     """
     向量记忆存储 - 支持语义检索
@@ -71,7 +236,27 @@ class VectorMemoryStore:
     1. 向量嵌入存储
     2. 语义相似度检索
     3. 记忆重要性管理
-    4. TTL 过期管理
+    4. TTL 过期管理 (时间轮 + 可选的后台清理任务)
+    
+    安装 NumPy 后，嵌入向量会同步写入向量索引 (默认 FlatVectorIndex)，
+    语义检索变为一次矩阵-向量乘法；否则回退到逐条计算。
+    键、值和标签同时写入 BM25 倒排索引，用于关键词检索和混合检索
+    (semantic_search(..., hybrid=True) 以倒数排名融合合并两路结果)。
+    大规模记忆可传入 IVFFlatIndex 等近似索引:
+    
+        store = VectorMemoryStore(
+            max_memories=100000,
+            embedding_fn=embed,
+            vector_index=IVFFlatIndex(nlist=256, nprobe=16),
+        )
+    
+    传入 PersistentMemoryBackend 后记忆会写穿到磁盘，内存中只保留最近使用的
+    max_memories 条，超出部分被卸载而不是删除，下次访问时再从磁盘加载:
+    
+        store = VectorMemoryStore(
+            embedding_fn=embed,
+            backend=PersistentMemoryBackend("~/.neuroflow/memory"),
+        )
     
     用法:
         store = VectorMemoryStore()
@@ -89,25 +274,153 @@ class VectorMemoryStore:
             query="用户喜欢什么样的回答？",
             top_k=3,
         )
+        
+        # 启动后台过期清理（可选）
+        await store.start()
+        ...
+        await store.stop()
     """
     
     def __init__(
         self, 
         max_memories: int = 1000,
         embedding_fn: Optional[callable] = None,
+        use_vector_index: bool = True,
+        vector_index: Optional[VectorIndex] = None,
+        batch_embedding_fn: Optional[callable] = None,
+        embedding_batch_size: int = 32,
+        embedding_batch_wait_ms: float = 5.0,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        eviction_rescore_interval: float = 3600.0,
+        expiry_tick_seconds: float = 1.0,
+        sweep_interval: float = 1.0,
+        backend: Optional["PersistentMemoryBackend"] = None,
+        rrf_k: int = 60,
     ):
+        """
+        Args:
+            max_memories: 最大记忆数量
+            embedding_fn: 单文本嵌入函数 async (str) -> List[float]
+            use_vector_index: 是否启用默认的 FlatVectorIndex
+            vector_index: 自定义向量索引
+            batch_embedding_fn: 批量嵌入函数 async (List[str]) -> List[List[float]]，
+                设置后并发的 store 调用会被合并为批量请求
+            embedding_batch_size: 每批最大文本数
+            embedding_batch_wait_ms: 批次最长等待时间 (毫秒)
+            embedding_cache: 嵌入缓存，store 与 semantic_search 共享
+            eviction_rescore_interval: 淘汰分数全量重算的最小间隔 (秒)，
+                用于修正新鲜度随时间的衰减
+            expiry_tick_seconds: 过期时间轮的刻度 (秒)
+            sweep_interval: 后台过期清理的间隔 (秒)
+            backend: 持久化后端，设置后 max_memories 为内存中的工作集大小，
+                语义检索由后端的内存映射向量文件完成，关键词检索由后端的倒排列表完成
+            rrf_k: 混合检索中倒数排名融合的平滑常数
+        """
+        if backend is not None and vector_index is not None:
+            raise ValueError("vector_index cannot be combined with a persistent backend")
+        
         self.max_memories = max_memories
         self.embedding_fn = embedding_fn
+        self.embedding_cache = embedding_cache
+        
+        # 嵌入批处理器
+        self._batcher: Optional[EmbeddingBatcher] = None
+        if batch_embedding_fn:
+            self._batcher = EmbeddingBatcher(
+                batch_embedding_fn,
+                max_batch_size=embedding_batch_size,
+                max_wait_ms=embedding_batch_wait_ms,
+            )
         
         # 记忆存储
         self._memories: Dict[str, MemoryEntry] = {}
         
         # 索引
         self._key_index: Dict[str, str] = {}  # key -> id
-        self._tag_index: Dict[str, List[str]] = {}  # tag -> [ids]
-        self._type_index: Dict[MemoryType, List[str]] = {
-            t: [] for t in MemoryType
+        self._tag_index: Dict[str, Set[str]] = {}  # tag -> {ids}
+        self._type_index: Dict[MemoryType, Set[str]] = {
+            t: set() for t in MemoryType
         }
+        
+        # BM25 全文索引 (键 + 值 + 标签)，使用持久化后端时由后端负责
+        self._text_index = BM25Index()
+        self.rrf_k = rrf_k
+        
+        # 淘汰优先级队列
+        self._eviction_queue = EvictionQueue()
+        self.eviction_rescore_interval = eviction_rescore_interval
+        self._eviction_rescored_at = time.time()
+        
+        # 过期时间轮和后台清理任务
+        self._expiry_wheel = TimingWheel(tick_seconds=expiry_tick_seconds)
+        self._sweeper = ExpirySweeper(
+            self._expiry_wheel,
+            self._reclaim_expired,
+            interval=sweep_interval,
+        )
+        
+        # 持久化后端 (早期版本创建的存储没有全文索引，首次打开时补建)
+        self.backend = backend
+        if backend is not None and not backend.text_indexed:
+            backend.rebuild_text_index(self._entry_text)
+        
+        # 向量索引 (需要 NumPy)，使用持久化后端时由后端负责检索
+        self._vector_index: Optional[VectorIndex] = vector_index
+        if (
+            self._vector_index is None
+            and backend is None
+            and use_vector_index
+            and numpy_available()
+        ):
+            self._vector_index = FlatVectorIndex()
+    
+    @property
+    def has_embeddings(self) -> bool:
+        """是否配置了嵌入函数"""
+        return self.embedding_fn is not None or self._batcher is not None
+    
+    async def _embed(self, text: str) -> List[float]:
+        """生成单个文本的嵌入向量（优先读取缓存）"""
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(text)
+            if cached is not None:
+                return cached
+        
+        if self._batcher is not None:
+            embedding = await self._batcher.embed(text)
+        else:
+            embedding = await self.embedding_fn(text)
+        
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(text, embedding)
+        return embedding
+    
+    async def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """批量生成嵌入向量（只为缓存未命中的文本发起请求）"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        
+        for i, text in enumerate(texts):
+            cached = self.embedding_cache.get(text) if self.embedding_cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+        
+        if missing:
+            pending = list(missing.keys())
+            if self._batcher is not None:
+                embeddings = await self._batcher.embed_many(pending)
+            else:
+                embeddings = await asyncio.gather(*(self.embedding_fn(t) for t in pending))
+            
+            for text, embedding in zip(pending, embeddings):
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put(text, embedding)
+                for i in missing[text]:
+                    results[i] = embedding
+        
+        return results
     
     async def store(
         self,
@@ -134,6 +447,73 @@ class VectorMemoryStore:
         Returns:
             记忆条目
         """
+        await self._load_key(key)
+        
+        embedding = None
+        if key not in self._key_index and self.has_embeddings:
+            try:
+                embedding = await self._embed(self._value_to_text(value))
+            except Exception as e:
+                logger.warning(f"Failed to generate embedding: {e}")
+        
+        return await self._store_entry(
+            key, value, memory_type, tags, importance, ttl_seconds, metadata, embedding
+        )
+    
+    async def store_many(self, items: List[Dict[str, Any]]) -> List[MemoryEntry]:
+        """
+        批量存储记忆 - 所有新记忆的嵌入向量在一次批量请求中生成
+        
+        Args:
+            items: 记忆列表，每项的键与 store() 的参数一致
+                [{"key": "...", "value": ..., "tags": [...], ...}, ...]
+            
+        Returns:
+            记忆条目列表（与 items 顺序一致）
+        """
+        for item in items:
+            await self._load_key(item["key"])
+        
+        embeddings: Dict[str, List[float]] = {}
+        if self.has_embeddings:
+            new_items = {}
+            for item in items:
+                if item["key"] not in self._key_index and item["key"] not in new_items:
+                    new_items[item["key"]] = self._value_to_text(item["value"])
+            
+            if new_items:
+                try:
+                    vectors = await self._embed_many(list(new_items.values()))
+                    embeddings = dict(zip(new_items.keys(), vectors))
+                except Exception as e:
+                    logger.warning(f"Failed to generate batch embeddings: {e}")
+        
+        entries = []
+        for item in items:
+            entries.append(await self._store_entry(
+                item["key"],
+                item["value"],
+                item.get("memory_type", MemoryType.SHORT_TERM),
+                item.get("tags"),
+                item.get("importance", 0.5),
+                item.get("ttl_seconds"),
+                item.get("metadata"),
+                embeddings.get(item["key"]),
+            ))
+        return entries
+    
+    async def _store_entry(
+        self,
+        key: str,
+        value: Any,
+        memory_type: MemoryType,
+        tags: Optional[List[str]],
+        importance: float,
+        ttl_seconds: Optional[int],
+        metadata: Optional[Dict[str, Any]],
+        embedding: Optional[List[float]],
+    ) -> MemoryEntry:
+        """写入记忆并更新索引"""
         # 检查是否已存在
         if key in self._key_index:
             entry_id = self._key_index[key]
@@ -142,11 +522,19 @@ class VectorMemoryStore:
             entry.accessed_at = time.time()
             entry.importance = importance
             if tags:
+                self._unindex_tags(entry)
                 entry.tags = tags
+                self._index_tags(entry)
+            if self.backend is None:
+                self._text_index.add(entry.id, self._entry_text(entry))
             if ttl_seconds is not None:
                 entry.ttl_seconds = ttl_seconds
+                self._schedule_expiry(entry)
             if metadata:
                 entry.metadata.update(metadata)
+            if self.backend is not None:
+                self.backend.put(entry, write_embedding=False, text=self._entry_text(entry))
+            self._eviction_queue.push(entry.id, self._eviction_score(entry, entry.accessed_at))
             logger.debug(f"Updated memory: {key}")
             return entry
         
@@ -157,29 +545,15 @@ class VectorMemoryStore:
             memory_type=memory_type,
             tags=tags or [],
             importance=importance,
+            embedding=embedding,
             ttl_seconds=ttl_seconds,
-            metadata=metadata or {},
+            metadata=metadata,
         )
         
-        # 生成嵌入向量
-        if self.embedding_fn:
-            try:
-                text = self._value_to_text(value)
-                entry.embedding = await self.embedding_fn(text)
-            except Exception as e:
-                logger.warning(f"Failed to generate embedding: {e}")
-        
         # 存储
-        self._memories[entry.id] = entry
-        self._key_index[key] = entry.id
-        
-        # 更新索引
-        for tag in entry.tags:
-            if tag not in self._tag_index:
-                self._tag_index[tag] = []
-            self._tag_index[tag].append(entry.id)
-        
-        self._type_index[entry.memory_type].append(entry.id)
+        if self.backend is not None:
+            self.backend.put(entry, text=self._entry_text(entry))
+        self._adopt(entry)
         
         # 检查容量限制
         if len(self._memories) > self.max_memories:
@@ -188,13 +562,85 @@ class VectorMemoryStore:
         logger.debug(f"Stored memory: {key}")
         return entry
     
-    async def retrieve(self, key: str) -> Optional[Any]:
-        """检索记忆"""
+    def _adopt(self, entry: MemoryEntry) -> None:
+        """将条目放入内存并更新索引"""
+        self._memories[entry.id] = entry
+        self._key_index[entry.key] = entry.id
+        
+        self._index_tags(entry)
+        self._type_index[entry.memory_type].add(entry.id)
+        self._eviction_queue.push(
+            entry.id, self._eviction_score(entry, max(entry.created_at, entry.accessed_at))
+        )
+        self._schedule_expiry(entry)
+        if self.backend is None:
+            self._text_index.add(entry.id, self._entry_text(entry))
+        
+        if self._vector_index is not None and entry.embedding:
+            self._vector_index.add(entry.id, entry.embedding)
+    
+    def _unload(self, entry: MemoryEntry) -> None:
+        """将条目移出内存及内存索引（不影响持久化后端）"""
+        self._unindex_tags(entry)
+        self._type_index[entry.memory_type].discard(entry.id)
+        self._eviction_queue.remove(entry.id)
+        self._expiry_wheel.cancel(entry.id)
+        self._text_index.remove(entry.id)
+        
+        if self._vector_index is not None:
+            self._vector_index.remove(entry.id)
+        
+        del self._memories[entry.id]
+        del self._key_index[entry.key]
+    
+    async def _load_key(self, key: str) -> Optional[MemoryEntry]:
+        """返回内存中的条目，不在内存时从持久化后端加载"""
         entry_id = self._key_index.get(key)
-        if not entry_id:
+        if entry_id:
+            return self._memories.get(entry_id)
+        if self.backend is None:
+            return None
+        
+        entry = self.backend.get_by_key(key)
+        if entry is None:
             return None
         
+        self._adopt(entry)
+        if len(self._memories) > self.max_memories:
+            await self._evict_memories()
+        return entry
+    
+    def _lookup(self, entry_id: str) -> Optional[MemoryEntry]:
+        """按 ID 查找条目，优先使用内存中的副本（不加载到工作集）"""
         entry = self._memories.get(entry_id)
+        if entry is None and self.backend is not None:
+            entry = self.backend.get(entry_id)
+        return entry
+    
+    def _schedule_expiry(self, entry: MemoryEntry) -> None:
+        """在时间轮中登记条目的到期时间"""
+        if entry.ttl_seconds is None:
+            self._expiry_wheel.cancel(entry.id)
+        else:
+            self._expiry_wheel.schedule(entry.id, entry.created_at + entry.ttl_seconds)
+    
+    def _index_tags(self, entry: MemoryEntry) -> None:
+        """将条目加入标签索引"""
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, set()).add(entry.id)
+    
+    def _unindex_tags(self, entry: MemoryEntry) -> None:
+        """从标签索引中移除条目"""
+        for tag in entry.tags:
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(entry.id)
+                if not ids:
+                    del self._tag_index[tag]
+    
+    async def retrieve(self, key: str) -> Optional[Any]:
+        """检索记忆"""
+        entry = await self._load_key(key)
         if not entry:
             return None
         
@@ -206,36 +652,35 @@ class VectorMemoryStore:
         # 更新访问信息
         entry.accessed_at = time.time()
         entry.access_count += 1
+        self._eviction_queue.push(entry.id, self._eviction_score(entry, entry.accessed_at))
         
         return entry.value
     
     async def delete(self, key: str) -> bool:
         """删除记忆"""
-        entry_id = self._key_index.get(key)
-        if not entry_id:
-            return False
+        deleted = False
         
-        entry = self._memories.get(entry_id)
+        entry_id = self._key_index.get(key)
+        entry = self._memories.get(entry_id) if entry_id else None
         if entry:
-            # 清理索引
-            for tag in entry.tags:
-                if tag in self._tag_index:
-                    self._tag_index[tag].remove(entry_id)
-            
-            if entry_id in self._type_index[entry.memory_type]:
-                self._type_index[entry.memory_type].remove(entry_id)
-            
-            # 删除记忆
-            del self._memories[entry_id]
-            del self._key_index[key]
-            
-            logger.debug(f"Deleted memory: {key}")
-            return True
+            self._unload(entry)
+            deleted = True
+        
+        if self.backend is not None:
+            entry_id = entry_id or self.backend.get_id_by_key(key)
+            if entry_id and self.backend.delete(entry_id):
+                deleted = True
         
-        return False
+        if deleted:
+            logger.debug(f"Deleted memory: {key}")
+        return deleted
     
     async def search_by_tags(self, tags: List[str]) -> List[MemoryEntry]:
         """根据标签搜索记忆"""
+        if self.backend is not None:
+            entries = [self._lookup(eid) for eid in self.backend.ids_by_tags(tags)]
+            return sorted((e for e in entries if e), key=lambda e: -e.importance)
+        
         result_ids = set()
         
         for tag in tags:
@@ -243,7 +688,7 @@ class VectorMemoryStore:
                 if not result_ids:
                     result_ids = set(self._tag_index[tag])
                 else:
-                    result_ids &= set(self._tag_index[tag])
+                    result_ids &= self._tag_index[tag]
         
         if not result_ids:
             return []
@@ -258,6 +703,10 @@ class VectorMemoryStore:
     
     async def search_by_type(self, memory_type: MemoryType) -> List[MemoryEntry]:
         """根据类型搜索记忆"""
+        if self.backend is not None:
+            entries = [self._lookup(eid) for eid in self.backend.ids_by_type(memory_type)]
+            return [e for e in entries if e and not e.is_expired()]
+        
         ids = self._type_index.get(memory_type, [])
         entries = [
             self._memories[eid] 
@@ -271,76 +720,196 @@ class VectorMemoryStore:
         query: str,
         top_k: int = 5,
         min_similarity: float = 0.5,
+        hybrid: bool = False,
+        tags: Optional[List[str]] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_importance: Optional[float] = None,
+        max_importance: Optional[float] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[MemoryEntry, float]]:
         """
         语义检索
         
+        过滤条件在打分之前求值 (标签/类型走索引)，只有候选条目参与相似度计算，
+        top_k 截断发生在过滤之后，不会因为过滤而丢失结果。
+        
         Args:
             query: 查询文本
             top_k: 返回数量
             min_similarity: 最小相似度
+            hybrid: 是否融合 BM25 关键词检索结果 (倒数排名融合)，
+                此时返回的分数为融合分数而不是余弦相似度
+            tags: 必须同时带有的标签
+            memory_type: 记忆类型
+            min_importance: 最小重要性
+            max_importance: 最大重要性
+            created_after: 最早创建时间 (时间戳)
+            created_before: 最晚创建时间 (时间戳)
+            metadata: 元数据中必须相等的键值
             
         Returns:
             (记忆条目，相似度) 列表
         """
-        if not self.embedding_fn:
+        memory_filter: Optional[MemoryFilter] = MemoryFilter(
+            tags=tags,
+            memory_type=memory_type,
+            min_importance=min_importance,
+            max_importance=max_importance,
+            created_after=created_after,
+            created_before=created_before,
+            metadata=metadata,
+        )
+        if memory_filter.is_empty():
+            memory_filter = None
+        
+        # 内存中的候选集 (使用持久化后端时向量检索由后端在 SQLite 中过滤)
+        candidate_ids = None
+        if memory_filter is not None:
+            candidate_ids = self._filter_candidates(memory_filter)
+        
+        if not self.has_embeddings:
             logger.warning("Embedding function not set, using keyword search")
-            return await self._keyword_search(query, top_k)
+            return await self._keyword_search(query, top_k, candidate_ids, memory_filter)
         
         try:
             # 生成查询嵌入
-            query_embedding = await self.embedding_fn(query)
+            query_embedding = await self._embed(query)
             
-            # 计算相似度
-            results = []
-            for entry in self._memories.values():
-                if entry.embedding:
-                    similarity = self._cosine_similarity(
-                        query_embedding, 
-                        entry.embedding
-                    )
-                    if similarity >= min_similarity:
-                        results.append((entry, similarity))
-            
-            # 排序
-            results.sort(key=lambda x: -x[1])
+            if not hybrid:
+                return self._vector_search(
+                    query_embedding, top_k, min_similarity, memory_filter, candidate_ids
+                )
             
-            return results[:top_k]
+            # 两路各取更多候选，再按排名融合
+            candidates = top_k * 4
+            return self._fuse_rankings(
+                [
+                    self._vector_search(
+                        query_embedding, candidates, min_similarity, memory_filter, candidate_ids
+                    ),
+                    await self._keyword_search(query, candidates, candidate_ids, memory_filter),
+                ],
+                top_k,
+            )
         except Exception as e:
             logger.error(f"Semantic search error: {e}")
-            return await self._keyword_search(query, top_k)
+            return await self._keyword_search(query, top_k, candidate_ids, memory_filter)
+    
+    def _filter_candidates(self, memory_filter: MemoryFilter) -> Set[str]:
+        """
+        求出内存中满足过滤条件的记忆 ID 集合
+        
+        先按从小到大的顺序求标签集合与类型集合的交集，
+        再对剩余的候选逐条检查重要性、创建时间和元数据。
+        """
+        id_sets = [self._tag_index.get(tag, set()) for tag in set(memory_filter.tags or ())]
+        if memory_filter.memory_type is not None:
+            id_sets.append(self._type_index[memory_filter.memory_type])
+        
+        if id_sets:
+            id_sets.sort(key=len)
+            candidates = set(id_sets[0])
+            for ids in id_sets[1:]:
+                if not candidates:
+                    break
+                candidates &= ids
+        else:
+            candidates = self._memories.keys()
+        
+        if not memory_filter.has_attribute_conditions():
+            return set(candidates)
+        return {
+            entry_id for entry_id in candidates
+            if memory_filter.matches_attributes(self._memories[entry_id])
+        }
+    
+    def _vector_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        min_similarity: float,
+        memory_filter: Optional[MemoryFilter] = None,
+        candidate_ids: Optional[Set[str]] = None,
+    ) -> List[Tuple[MemoryEntry, float]]:
+        """向量检索，返回按余弦相似度降序的结果"""
+        if self.backend is not None:
+            hits = self.backend.search(
+                query_embedding, top_k, min_similarity, memory_filter=memory_filter
+            )
+            results = []
+            for entry_id, similarity in hits:
+                entry = self._lookup(entry_id)
+                if entry is not None:
+                    results.append((entry, similarity))
+            return results
+        
+        if self._vector_index is not None:
+            hits = self._vector_index.search(
+                query_embedding, top_k, min_similarity, candidate_ids
+            )
+            return [
+                (self._memories[entry_id], similarity)
+                for entry_id, similarity in hits
+            ]
+        
+        # 计算相似度
+        if candidate_ids is None:
+            entries = self._memories.values()
+        else:
+            entries = (self._memories[entry_id] for entry_id in candidate_ids)
+        results = []
+        for entry in entries:
+            if entry.embedding:
+                similarity = self._cosine_similarity(
+                    query_embedding, 
+                    entry.embedding
+                )
+                if similarity >= min_similarity:
+                    results.append((entry, similarity))
+        
+        # 排序
+        results.sort(key=lambda x: -x[1])
+        
+        return results[:top_k]
     
     async def _keyword_search(
         self,
         query: str,
         top_k: int = 5,
+        candidate_ids: Optional[Set[str]] = None,
+        memory_filter: Optional[MemoryFilter] = None,
     ) -> List[Tuple[MemoryEntry, float]]:
-        """关键词搜索（备用）"""
-        query_lower = query.lower()
-        results = []
+        """关键词搜索 (BM25)，使用持久化后端时检索全部持久化条目"""
+        if self.backend is not None:
+            results = []
+            for entry_id, score in self.backend.text_search(query, top_k, memory_filter):
+                entry = self._lookup(entry_id)
+                if entry is not None:
+                    results.append((entry, score))
+            return results
         
-        for entry in self._memories.values():
-            score = 0.0
-            
-            # 匹配键
-            if query_lower in entry.key.lower():
-                score += 0.5
-            
-            # 匹配值
-            value_str = str(entry.value).lower()
-            if query_lower in value_str:
-                score += 0.3
-            
-            # 匹配标签
-            for tag in entry.tags:
-                if query_lower in tag.lower():
-                    score += 0.2
-            
-            if score > 0:
-                results.append((entry, score))
+        return [
+            (self._memories[entry_id], score)
+            for entry_id, score in self._text_index.search(query, top_k, candidate_ids)
+        ]
+    
+    def _fuse_rankings(
+        self,
+        rankings: List[List[Tuple[MemoryEntry, float]]],
+        top_k: int,
+    ) -> List[Tuple[MemoryEntry, float]]:
+        """倒数排名融合: score = sum(1 / (rrf_k + rank))，只依赖排名，不受两路分数尺度影响"""
+        entries: Dict[str, MemoryEntry] = {}
+        scores: Dict[str, float] = {}
+        for ranking in rankings:
+            for rank, (entry, _) in enumerate(ranking, start=1):
+                entries[entry.id] = entry
+                scores[entry.id] = scores.get(entry.id, 0.0) + 1.0 / (self.rrf_k + rank)
         
-        results.sort(key=lambda x: -x[1])
-        return results[:top_k]
+        fused = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+        return [(entries[entry_id], score) for entry_id, score in fused]
     
     def _cosine_similarity(
         self, 
@@ -360,6 +929,10 @@ class VectorMemoryStore:
         
         return dot_product / (norm_a * norm_b)
     
+    def _entry_text(self, entry: MemoryEntry) -> str:
+        """条目的全文索引文本"""
+        return " ".join([entry.key, self._value_to_text(entry.value), *entry.tags])
+    
     def _value_to_text(self, value: Any) -> str:
         """将值转换为文本（用于嵌入）"""
         if isinstance(value, str):
@@ -373,48 +946,102 @@ class VectorMemoryStore:
         else:
             return str(value)
     
+    def _eviction_score(self, entry: MemoryEntry, current_time: float) -> float:
+        """计算淘汰分数：越低越先被淘汰"""
+        # 过期记忆优先清理
+        if entry.is_expired():
+            return -1.0
+        
+        # 计算分数：重要性 + 新鲜度 + 访问频率
+        age = current_time - entry.created_at
+        recency = 1.0 / (1.0 + age / 86400)  # 天为单位
+        
+        access_score = min(1.0, entry.access_count / 10)
+        
+        return (
+            entry.importance * 0.5 +
+            recency * 0.3 +
+            access_score * 0.2
+        )
+    
     async def _evict_memories(self) -> None:
-        """清理记忆（基于重要性和时间）"""
-        # 计算记忆分数
-        scores = []
-        current_time = time.time()
+        """
+        清理记忆（基于重要性和时间）
         
-        for entry in self._memories.values():
-            # 过期记忆优先清理
-            if entry.is_expired():
-                scores.append((entry.id, -1.0))
-                continue
-            
-            # 计算分数：重要性 + 新鲜度 + 访问频率
-            age = current_time - entry.created_at
-            recency = 1.0 / (1.0 + age / 86400)  # 天为单位
-            
-            access_score = min(1.0, entry.access_count / 10)
-            
-            score = (
-                entry.importance * 0.5 +
-                recency * 0.3 +
-                access_score * 0.2
+        分数在写入/更新/访问时计算并放入最小堆，淘汰时直接弹出最低分条目。
+        新鲜度随时间衰减，因此每隔 eviction_rescore_interval 秒全量重算一次 (O(n) 建堆)。
+        使用持久化后端时，未过期的条目只是被卸载出内存，访问统计写回后端。
+        """
+        current_time = time.time()
+        if current_time - self._eviction_rescored_at >= self.eviction_rescore_interval:
+            self._eviction_queue.rebuild(
+                (entry.id, self._eviction_score(entry, current_time))
+                for entry in self._memories.values()
             )
-            
-            scores.append((entry.id, score))
-        
-        # 排序并删除最低分的记忆
-        scores.sort(key=lambda x: x[1])
+            self._eviction_rescored_at = current_time
         
         # 删除 10% 的记忆
-        to_delete = max(1, int(len(scores) * 0.1))
-        for i in range(to_delete):
-            entry_id = scores[i][0]
+        to_delete = max(1, int(len(self._memories) * 0.1))
+        evicted = 0
+        while evicted < to_delete:
+            entry_id = self._eviction_queue.pop()
+            if entry_id is None:
+                break
             entry = self._memories.get(entry_id)
-            if entry:
+            if not entry:
+                continue
+            if self.backend is not None and not entry.is_expired():
+                self.backend.put(entry, write_embedding=False)
+                self._unload(entry)
+            else:
                 await self.delete(entry.key)
+            evicted += 1
         
-        logger.info(f"Evicted {to_delete} memories")
+        logger.info(f"Evicted {evicted} memories")
+    
+    async def _reclaim_expired(self, entry_ids: List[str]) -> int:
+        """删除时间轮报告到期的记忆"""
+        reclaimed = 0
+        for entry_id in entry_ids:
+            entry = self._memories.get(entry_id)
+            if entry is None:
+                continue
+            if entry.is_expired():
+                await self.delete(entry.key)
+                reclaimed += 1
+            else:
+                self._schedule_expiry(entry)
+        return reclaimed
+    
+    async def sweep_expired(self) -> int:
+        """立即清理所有已过期的记忆（包括未加载的持久化记忆），返回回收数量"""
+        reclaimed = await self._sweeper.sweep_once()
+        if self.backend is not None:
+            with self.backend.batch():
+                for entry_id in self.backend.expired_ids(time.time()):
+                    if entry_id not in self._memories and self.backend.delete(entry_id):
+                        reclaimed += 1
+        return reclaimed
+    
+    async def flush(self) -> None:
+        """将内存中记忆的访问统计写回持久化后端"""
+        if self.backend is None:
+            return
+        with self.backend.batch():
+            for entry in self._memories.values():
+                self.backend.put(entry, write_embedding=False)
+    
+    async def start(self) -> None:
+        """启动后台过期清理任务"""
+        self._sweeper.start()
+    
+    async def stop(self) -> None:
+        """停止后台过期清理任务"""
+        await self._sweeper.stop()
     
     async def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
-        return {
+        stats = {
             "total_memories": len(self._memories),
             "by_type": {
                 t.value: len(ids) 
@@ -424,11 +1051,16 @@ class VectorMemoryStore:
                 tag: len(ids) 
                 for tag, ids in self._tag_index.items()
             },
-            "expired": sum(
-                1 for e in self._memories.values() 
-                if e.is_expired()
-            ),
+            "expired": self._expiry_wheel.count_due(),
+            "expiry": self._sweeper.get_stats(),
         }
+        if self._batcher is not None:
+            stats["embedding_batcher"] = self._batcher.get_stats()
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.get_stats()
+        if self.backend is not None:
+            stats["persisted"] = len(self.backend)
+        return stats
     
     async def clear(self) -> None:
         """清空所有记忆"""
@@ -436,12 +1068,20 @@ class VectorMemoryStore:
         self._key_index.clear()
         self._tag_index.clear()
         for t in self._type_index:
-            self._type_index[t] = []
+            self._type_index[t] = set()
+        self._eviction_queue.clear()
+        self._expiry_wheel.clear()
+        self._text_index.clear()
+        if self._vector_index is not None:
+            self._vector_index.clear()
+        if self.backend is not None:
+            self.backend.clear()
         logger.info("Cleared all memories")
 
 
 __all__ = [
     "MemoryType",
     "MemoryEntry",
+    "MemoryFilter",
     "VectorMemoryStore",
 ]
@@ -9,13 +9,41 @@ from .llm_client import (
     LLMConfig,
     Message,
     LLMResponse,
+    StreamedFunction,
+    StreamedToolCall,
+    LLMStreamChunk,
     LLMClient,
 )
 
+from .response_cache import (
+    ResponseCacheBackend,
+    InMemoryResponseCacheBackend,
+    DiskResponseCacheBackend,
+    CacheLookup,
+    ResponseCache,
+)
+
+from .scheduler import (
+    TokenBucket,
+    ProviderLimits,
+    SchedulerConfig,
+    LLMScheduler,
+)
+
+from .tool_graph import (
+    ToolNode,
+    ToolGraph,
+    ToolGraphStats,
+    ToolGraphResult,
+    ToolBatch,
+    ToolGraphExecutor,
+)
+
 from .llm_orchestrator import (
     OrchestratorMode,
     OrchestratorConfig,
     TurnResult,
+    StreamEvent,
     LLMOrchestrator,
 )
 
@@ -26,11 +54,36 @@ __all__ = [
     "LLMConfig",
     "Message",
     "LLMResponse",
+    "StreamedFunction",
+    "StreamedToolCall",
+    "LLMStreamChunk",
     "LLMClient",
     
+    # Response Cache
+    "ResponseCacheBackend",
+    "InMemoryResponseCacheBackend",
+    "DiskResponseCacheBackend",
+    "CacheLookup",
+    "ResponseCache",
+    
+    # Scheduler
+    "TokenBucket",
+    "ProviderLimits",
+    "SchedulerConfig",
+    "LLMScheduler",
+    
+    # Tool Graph
+    "ToolNode",
+    "ToolGraph",
+    "ToolGraphStats",
+    "ToolGraphResult",
+    "ToolBatch",
+    "ToolGraphExecutor",
+    
     # Orchestrator
     "OrchestratorMode",
     "OrchestratorConfig",
     "TurnResult",
+    "StreamEvent",
     "LLMOrchestrator",
 ]
@@ -6,10 +6,18 @@ NeuroFlow Python SDK - LLM Client
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
 from enum import Enum
+import asyncio
 import json
 import logging
+import uuid
+
+from ..tools.protocol import estimate_tokens
+
+if TYPE_CHECKING:
+    from .response_cache import ResponseCache
+    from .scheduler import LLMScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +46,11 @@ class LLMConfig:
     base_url: Optional[str] = None
     temperature: float = 0.7
     max_tokens: int = 1000
+    # 连接池 (LLMClient 复用同一个提供商客户端，连接保持长连接)
+    max_connections: int = 100           # 最大并发连接数
+    max_keepalive_connections: int = 20  # 最多保留的空闲长连接数
+    keepalive_expiry: float = 30.0       # 空闲连接保留时间 (秒)
+    timeout: float = 60.0                # 单次请求超时 (秒)
     
     def __post_init__(self):
         """自动从环境变量获取 API Key"""
@@ -129,6 +142,49 @@ class LLMResponse:
         return bool(self.tool_calls)
 
 
+@dataclass
+class StreamedFunction:
+    """流式工具调用的函数部分"""
+    name: str
+    arguments: str  # JSON 字符串
+
+
+@dataclass
+class StreamedToolCall:
+    """
+    流式响应中已接收完整的工具调用
+    
+    属性与 OpenAI 的 tool_call 对象一致 (id / type / function.name / function.arguments)，
+    Anthropic 的 tool_use 块也转换为该格式。
+    """
+    id: str
+    function: StreamedFunction
+    type: str = "function"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 OpenAI 消息中的 tool_calls 项"""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "function": {"name": self.function.name, "arguments": self.function.arguments},
+        }
+
+
+@dataclass
+class LLMStreamChunk:
+    """
+    流式响应片段
+    
+    - content: 文本增量 (delta)
+    - tool_call: 一个参数已接收完整的工具调用，可以立即执行
+    - done: 流结束，response 为汇总后的完整响应
+    """
+    type: str  # content, tool_call, done
+    delta: str = ""
+    tool_call: Optional[StreamedToolCall] = None
+    response: Optional[LLMResponse] = None
+
+
 class LLMClient:
     """
     增强的 LLM 客户端 - 支持 Function Calling
@@ -146,11 +202,98 @@ class LLMClient:
         response = await client.chat(
             messages=[Message.user("你好")],
         )
+    
+    提供商客户端 (OpenAI / Anthropic SDK 客户端、Ollama 的 aiohttp 会话) 在首次调用时创建，
+    之后所有调用复用同一个连接池，避免每轮对话重新建立连接和 TLS 握手。
+    连接池参数见 LLMConfig；不再使用时调用 aclose() 释放连接:
+    
+        async with LLMClient(config) as client:
+            await client.chat(...)
+    
+    设置 response_cache 后，chat() 对重复 (或语义近似) 的请求直接返回缓存的响应，
+    见 ResponseCache。chat_stream() 不经过缓存。
+    
+    设置 scheduler 后，未命中缓存的 chat() 请求和 chat_stream() 经 LLMScheduler 排队、
+    限速和重试，可通过 priority=n 指定优先级 (越小越先执行)。
     """
     
-    def __init__(self, config: LLMConfig):
+    def __init__(
+        self,
+        config: LLMConfig,
+        response_cache: Optional["ResponseCache"] = None,
+        scheduler: Optional["LLMScheduler"] = None,
+    ):
+        """
+        Args:
+            config: LLM 配置
+            response_cache: 响应缓存，None 表示不缓存
+            scheduler: 请求调度器 (可在多个客户端间共享)，None 表示直接发送
+        """
         self.config = config
-        self._session = None
+        self.response_cache = response_cache
+        self.scheduler = scheduler
+        self._session = None          # Ollama 使用的 aiohttp 会话
+        self._provider_client = None  # OpenAI / Anthropic SDK 客户端
+        self._loop = None             # 创建上述客户端时所在的事件循环
+    
+    async def __aenter__(self) -> "LLMClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """关闭连接池，之后再次调用会重新创建"""
+        client, self._provider_client = self._provider_client, None
+        session, self._session = self._session, None
+        self._loop = None
+        if client is not None:
+            await client.close()
+        if session is not None and not session.closed:
+            await session.close()
+    
+    def _check_loop(self) -> None:
+        """
+        连接池绑定创建时的事件循环，事件循环变化 (如多次 asyncio.run) 后
+        旧连接不可再用，直接丢弃
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._provider_client = None
+            self._session = None
+            self._loop = loop
+    
+    def _http_client(self):
+        """创建 OpenAI / Anthropic SDK 共用的 httpx 连接池"""
+        import httpx
+        
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=self.config.timeout,
+        )
+    
+    def _sdk_retry_options(self) -> Dict[str, Any]:
+        """由调度器负责重试时关闭 SDK 自带的重试，避免重复重试"""
+        return {"max_retries": 0} if self.scheduler is not None else {}
+    
+    async def _get_session(self):
+        """获取 Ollama 使用的 aiohttp 会话"""
+        import aiohttp
+        
+        self._check_loop()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.config.max_connections,
+                    keepalive_timeout=self.config.keepalive_expiry,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+            )
+        return self._session
     
     async def chat(
         self,
@@ -168,11 +311,71 @@ class LLMClient:
             tools: 工具 Schema 列表
             tool_choice: 工具选择策略
             response_format: 响应格式 (如 JSON)
-            **kwargs: 额外参数
+            **kwargs: 额外参数 (priority 为调度优先级，只在设置了 scheduler 时生效)
             
         Returns:
             LLM 响应
         """
+        priority = kwargs.pop("priority", 0)
+        cache = self.response_cache
+        temperature = kwargs.get("temperature", self.config.temperature)
+        if cache is None or not cache.should_cache(temperature):
+            return await self._schedule(messages, tools, tool_choice, response_format, priority, **kwargs)
+        
+        lookup = await cache.lookup(
+            self.config.model,
+            messages,
+            tools,
+            temperature,
+            tool_choice=tool_choice,
+            response_format=response_format,
+            max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+        )
+        if lookup.response is not None:
+            return lookup.response
+        
+        response = await self._schedule(messages, tools, tool_choice, response_format, priority, **kwargs)
+        await cache.store(lookup, response)
+        return response
+    
+    async def _schedule(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: str,
+        response_format: Optional[Dict[str, str]],
+        priority: int,
+        **kwargs,
+    ) -> LLMResponse:
+        """经调度器 (如有) 发送请求"""
+        if self.scheduler is None:
+            return await self._chat(messages, tools, tool_choice, response_format, **kwargs)
+        
+        return await self.scheduler.submit(
+            self._provider_name(),
+            lambda: self._chat(messages, tools, tool_choice, response_format, **kwargs),
+            priority=priority,
+            estimated_tokens=self._estimate_request_tokens(messages, **kwargs),
+        )
+    
+    def _provider_name(self) -> str:
+        """调度器按此名称区分限速"""
+        return getattr(self.config.provider, "value", self.config.provider)
+    
+    def _estimate_request_tokens(self, messages: List[Message], **kwargs) -> int:
+        """请求的预估 token 数 (输入 + 最大输出)，用于调度器的准入判断"""
+        estimated_tokens = sum(estimate_tokens(m.content or "") for m in messages)
+        return estimated_tokens + kwargs.get("max_tokens", self.config.max_tokens)
+    
+    async def _chat(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: str,
+        response_format: Optional[Dict[str, str]],
+        **kwargs,
+    ) -> LLMResponse:
+        """按提供商分发请求"""
         if self.config.provider == LLMProvider.OPENAI:
             return await self._call_openai(
                 messages, tools, tool_choice, response_format, **kwargs
@@ -188,6 +391,59 @@ class LLMClient:
         else:
             raise ValueError(f"Unsupported provider: {self.config.provider}")
     
+    async def chat_stream(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto",
+        **kwargs,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        流式对话调用
+        
+        文本增量到达时立即产出；每个工具调用在其参数接收完整后立即产出
+        (不等待整条消息结束)，调用方可以提前开始执行工具。
+        最后产出一个 type="done" 的片段，携带汇总后的 LLMResponse。
+        设置 scheduler 时经调度器排队和限速 (priority 同 chat())，产出第一个片段前的 429/5xx 会重试。
+        
+        用法:
+            async for chunk in client.chat_stream(messages, tools=tools):
+                if chunk.type == "content":
+                    print(chunk.delta, end="")
+                elif chunk.type == "tool_call":
+                    start_tool(chunk.tool_call)
+        """
+        priority = kwargs.pop("priority", 0)
+        if self.scheduler is None:
+            stream = self._open_stream(messages, tools, tool_choice, **kwargs)
+        else:
+            stream = self.scheduler.stream(
+                self._provider_name(),
+                lambda: self._open_stream(messages, tools, tool_choice, **kwargs),
+                priority=priority,
+                estimated_tokens=self._estimate_request_tokens(messages, **kwargs),
+            )
+        
+        async for chunk in stream:
+            yield chunk
+    
+    def _open_stream(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: str,
+        **kwargs,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """按提供商创建流"""
+        if self.config.provider == LLMProvider.OPENAI:
+            return self._stream_openai(messages, tools, tool_choice, **kwargs)
+        elif self.config.provider == LLMProvider.ANTHROPIC:
+            return self._stream_anthropic(messages, tools, **kwargs)
+        elif self.config.provider == LLMProvider.OLLAMA:
+            return self._stream_ollama(messages, tools, **kwargs)
+        else:
+            raise ValueError(f"Unsupported provider: {self.config.provider}")
+    
     async def _call_openai(
         self,
         messages: List[Message],
@@ -197,17 +453,71 @@ class LLMClient:
         **kwargs,
     ) -> LLMResponse:
         """OpenAI 调用"""
+        client = self._openai_client()
+        request_params = self._openai_request_params(
+            messages, tools, tool_choice, response_format, **kwargs
+        )
+        
+        response = await client.chat.completions.create(**request_params)
+        
+        choice = response.choices[0]
+        message = choice.message
+        
+        return LLMResponse(
+            content=message.content or "",
+            model=response.model,
+            usage={
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens,
+            } if response.usage else None,
+            tool_calls=message.tool_calls,
+            finish_reason=choice.finish_reason,
+            raw_response=response,
+        )
+    
+    async def _stream_openai(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: str,
+        **kwargs,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """OpenAI 流式调用"""
+        client = self._openai_client()
+        request_params = self._openai_request_params(messages, tools, tool_choice, None, **kwargs)
+        request_params["stream"] = True
+        
+        stream = await client.chat.completions.create(**request_params)
+        async for chunk in _assemble_openai_stream(stream, self.config.model):
+            yield chunk
+    
+    def _openai_client(self):
+        """获取复用的 OpenAI 客户端"""
         try:
             import openai
         except ImportError:
             raise ImportError("Please install openai: pip install openai")
         
-        client = openai.AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
-        )
-        
-        # 构建请求
+        self._check_loop()
+        if self._provider_client is None:
+            self._provider_client = openai.AsyncOpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.base_url,
+                http_client=self._http_client(),
+                **self._sdk_retry_options(),
+            )
+        return self._provider_client
+    
+    def _openai_request_params(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        tool_choice: str,
+        response_format: Optional[Dict[str, str]],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """构建 OpenAI 请求参数"""
         request_params = {
             "model": self.config.model,
             "messages": [m.to_dict() for m in messages],
@@ -233,47 +543,89 @@ class LLMClient:
         if response_format:
             request_params["response_format"] = response_format
         
-        response = await client.chat.completions.create(**request_params)
+        return request_params
+    
+    async def _call_anthropic(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        **kwargs,
+    ) -> LLMResponse:
+        """Anthropic Claude 调用 - 支持 Tool Use"""
+        client = self._anthropic_client()
+        request_params = self._anthropic_request_params(messages, tools, **kwargs)
         
-        choice = response.choices[0]
-        message = choice.message
+        response = await client.messages.create(**request_params)
+        
+        # 提取内容
+        tool_calls = []
+        content_text = ""
+        
+        for block in response.content:
+            if hasattr(block, 'type') and block.type == "text":
+                content_text += block.text
+            elif hasattr(block, 'type') and block.type == "tool_use":
+                tool_calls.append(block)
         
         return LLMResponse(
-            content=message.content or "",
+            content=content_text,
             model=response.model,
             usage={
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            } if response.usage else None,
-            tool_calls=message.tool_calls,
-            finish_reason=choice.finish_reason,
-            raw_response=response,
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens,
+            },
+            tool_calls=tool_calls if tool_calls else None,
         )
     
-    async def _call_anthropic(
+    async def _stream_anthropic(
         self,
         messages: List[Message],
         tools: Optional[List[Dict[str, Any]]],
         **kwargs,
-    ) -> LLMResponse:
-        """Anthropic Claude 调用 - 支持 Tool Use"""
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Anthropic Claude 流式调用"""
+        client = self._anthropic_client()
+        request_params = self._anthropic_request_params(messages, tools, **kwargs)
+        request_params["stream"] = True
+        
+        stream = await client.messages.create(**request_params)
+        async for chunk in _assemble_anthropic_stream(stream, self.config.model):
+            yield chunk
+    
+    def _anthropic_client(self):
+        """获取复用的 Anthropic 客户端"""
         try:
             from anthropic import AsyncAnthropic
         except ImportError:
             raise ImportError("Please install anthropic: pip install anthropic")
         
-        client = AsyncAnthropic(api_key=self.config.api_key)
-        
-        # 分离系统消息
-        system_message = ""
+        self._check_loop()
+        if self._provider_client is None:
+            self._provider_client = AsyncAnthropic(
+                api_key=self.config.api_key,
+                http_client=self._http_client(),
+                **self._sdk_retry_options(),
+            )
+        return self._provider_client
+    
+    def _anthropic_request_params(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """构建 Anthropic 请求参数"""
+        # 分离系统消息 (Anthropic 只接受一个 system 参数，多条系统消息依次合并)
+        system_parts = []
         chat_messages = []
         
         for msg in messages:
             if msg.role == "system":
-                system_message = msg.content
+                if msg.content:
+                    system_parts.append(msg.content)
             else:
                 chat_messages.append(msg.to_dict())
+        system_message = "\n\n".join(system_parts)
         
         # 构建请求
         request_params = {
@@ -296,27 +648,7 @@ class LLMClient:
                 for t in tools
             ]
         
-        response = await client.messages.create(**request_params)
-        
-        # 提取内容
-        tool_calls = []
-        content_text = ""
-        
-        for block in response.content:
-            if hasattr(block, 'type') and block.type == "text":
-                content_text += block.text
-            elif hasattr(block, 'type') and block.type == "tool_use":
-                tool_calls.append(block)
-        
-        return LLMResponse(
-            content=content_text,
-            model=response.model,
-            usage={
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens,
-            },
-            tool_calls=tool_calls if tool_calls else None,
-        )
+        return request_params
     
     async def _call_ollama(
         self,
@@ -325,8 +657,6 @@ class LLMClient:
         **kwargs,
     ) -> LLMResponse:
         """Ollama 调用"""
-        import aiohttp
-        
         url = self.config.base_url or "http://localhost:11434/api/chat"
         
         payload = {
@@ -339,15 +669,72 @@ class LLMClient:
         if tools:
             payload["tools"] = tools
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as response:
-                result = await response.json()
+        session = await self._get_session()
+        async with session.post(url, json=payload) as response:
+            response.raise_for_status()
+            result = await response.json()
+            
+            return LLMResponse(
+                content=result["message"]["content"],
+                model=self.config.model,
+                usage=result.get("usage"),
+            )
+    
+    async def _stream_ollama(
+        self,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]],
+        **kwargs,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Ollama 流式调用 (逐行 JSON)"""
+        url = self.config.base_url or "http://localhost:11434/api/chat"
+        
+        payload = {
+            "model": self.config.model,
+            "messages": [m.to_dict() for m in messages],
+            "stream": True,
+        }
+        if tools:
+            payload["tools"] = tools
+        
+        content_parts: List[str] = []
+        tool_calls: List[StreamedToolCall] = []
+        
+        session = await self._get_session()
+        async with session.post(url, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                message = data.get("message") or {}
                 
-                return LLMResponse(
-                    content=result["message"]["content"],
-                    model=self.config.model,
-                    usage=result.get("usage"),
-                )
+                if message.get("content"):
+                    content_parts.append(message["content"])
+                    yield LLMStreamChunk(type="content", delta=message["content"])
+                
+                # Ollama 的工具调用总是在一个片段中完整给出
+                for tc in message.get("tool_calls") or []:
+                    function = tc.get("function", {})
+                    call = StreamedToolCall(
+                        id=tc.get("id") or str(uuid.uuid4()),
+                        function=StreamedFunction(
+                            name=function.get("name", ""),
+                            arguments=json.dumps(function.get("arguments") or {}),
+                        ),
+                    )
+                    tool_calls.append(call)
+                    yield LLMStreamChunk(type="tool_call", tool_call=call)
+                
+                if data.get("done"):
+                    break
+        
+        yield LLMStreamChunk(type="done", response=LLMResponse(
+            content="".join(content_parts),
+            model=self.config.model,
+            tool_calls=tool_calls or None,
+            finish_reason="tool_calls" if tool_calls else "stop",
+        ))
     
     async def complete(self, prompt: str, **kwargs) -> str:
         """
@@ -364,10 +751,141 @@ class LLMClient:
         return response.content
 
 
+async def _assemble_openai_stream(stream, model: str) -> AsyncIterator[LLMStreamChunk]:
+    """
+    将 OpenAI 的流式片段组装为 LLMStreamChunk
+    
+    工具调用参数按 index 分片到达，且同一时间只有一个调用在输出；
+    出现新的 index 或 finish_reason 时，前一个调用的参数即已完整。
+    """
+    content_parts: List[str] = []
+    tool_calls: List[StreamedToolCall] = []
+    pending: Dict[int, Dict[str, Any]] = {}
+    current_index: Optional[int] = None
+    finish_reason = None
+    usage = None
+    
+    def finish(index: int) -> StreamedToolCall:
+        slot = pending.pop(index)
+        call = StreamedToolCall(
+            id=slot["id"] or str(uuid.uuid4()),
+            function=StreamedFunction(
+                name=slot["name"],
+                arguments="".join(slot["arguments"]) or "{}",
+            ),
+        )
+        tool_calls.append(call)
+        return call
+    
+    async for raw in stream:
+        model = getattr(raw, "model", None) or model
+        if getattr(raw, "usage", None):
+            usage = {
+                "prompt_tokens": raw.usage.prompt_tokens,
+                "completion_tokens": raw.usage.completion_tokens,
+                "total_tokens": raw.usage.total_tokens,
+            }
+        if not raw.choices:
+            continue
+        
+        choice = raw.choices[0]
+        delta = choice.delta
+        if delta.content:
+            content_parts.append(delta.content)
+            yield LLMStreamChunk(type="content", delta=delta.content)
+        
+        for tc in delta.tool_calls or []:
+            if current_index is not None and tc.index != current_index and current_index in pending:
+                yield LLMStreamChunk(type="tool_call", tool_call=finish(current_index))
+            current_index = tc.index
+            slot = pending.setdefault(tc.index, {"id": "", "name": "", "arguments": []})
+            if tc.id:
+                slot["id"] = tc.id
+            if tc.function is not None:
+                if tc.function.name:
+                    slot["name"] += tc.function.name
+                if tc.function.arguments:
+                    slot["arguments"].append(tc.function.arguments)
+        
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+            for index in sorted(pending):
+                yield LLMStreamChunk(type="tool_call", tool_call=finish(index))
+    
+    for index in sorted(pending):
+        yield LLMStreamChunk(type="tool_call", tool_call=finish(index))
+    
+    yield LLMStreamChunk(type="done", response=LLMResponse(
+        content="".join(content_parts),
+        model=model,
+        usage=usage,
+        tool_calls=tool_calls or None,
+        finish_reason=finish_reason,
+    ))
+
+
+async def _assemble_anthropic_stream(stream, model: str) -> AsyncIterator[LLMStreamChunk]:
+    """
+    将 Anthropic 的流式事件组装为 LLMStreamChunk
+    
+    tool_use 块在 content_block_stop 时参数完整，立即产出。
+    """
+    content_parts: List[str] = []
+    tool_calls: List[StreamedToolCall] = []
+    blocks: Dict[int, Dict[str, Any]] = {}
+    finish_reason = None
+    usage: Dict[str, int] = {}
+    
+    async for event in stream:
+        event_type = getattr(event, "type", None)
+        
+        if event_type == "message_start":
+            model = getattr(event.message, "model", None) or model
+            if getattr(event.message, "usage", None):
+                usage["input_tokens"] = event.message.usage.input_tokens
+        elif event_type == "content_block_start":
+            block = event.content_block
+            if block.type == "tool_use":
+                blocks[event.index] = {"id": block.id, "name": block.name, "arguments": []}
+        elif event_type == "content_block_delta":
+            delta = event.delta
+            if delta.type == "text_delta":
+                content_parts.append(delta.text)
+                yield LLMStreamChunk(type="content", delta=delta.text)
+            elif delta.type == "input_json_delta" and event.index in blocks:
+                blocks[event.index]["arguments"].append(delta.partial_json)
+        elif event_type == "content_block_stop" and event.index in blocks:
+            slot = blocks.pop(event.index)
+            call = StreamedToolCall(
+                id=slot["id"],
+                function=StreamedFunction(
+                    name=slot["name"],
+                    arguments="".join(slot["arguments"]) or "{}",
+                ),
+            )
+            tool_calls.append(call)
+            yield LLMStreamChunk(type="tool_call", tool_call=call)
+        elif event_type == "message_delta":
+            finish_reason = getattr(event.delta, "stop_reason", None) or finish_reason
+            if getattr(event, "usage", None):
+                usage["output_tokens"] = event.usage.output_tokens
+    
+    yield LLMStreamChunk(type="done", response=LLMResponse(
+        content="".join(content_parts),
+        model=model,
+        usage=usage or None,
+        tool_calls=tool_calls or None,
+        finish_reason=finish_reason,
+    ))
+
+
 __all__ = [
     "LLMProvider",
     "LLMConfig",
     "Message",
     "LLMResponse",
+    "StreamedFunction",
+    "StreamedToolCall",
+    "LLMStreamChunk",
     "LLMClient",
 ]
@@ -9,10 +9,11 @@ import asyncio
 import json
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import logging
 
-from .llm_client import LLMClient, LLMConfig, Message, LLMResponse
+from .llm_client import LLMClient, LLMConfig, Message, LLMResponse, StreamedFunction, StreamedToolCall
+from .tool_graph import ToolGraph, ToolGraphExecutor, ToolGraphResult, ToolGraphStats
 from ..tools import (
     UnifiedToolRegistry,
     ToolCall,
@@ -36,8 +37,12 @@ class OrchestratorConfig:
     mode: str = "auto"
     max_tool_calls_per_turn: int = 5  # 每轮最多工具调用次数
     parallel_tool_calls: bool = True   # 是否并行执行工具
+    max_parallel_tools: int = 8        # 并行执行时同时进行的工具调用数上限
     tool_timeout_ms: int = 30000       # 工具调用超时
+    cancel_on_tool_failure: bool = False  # 某个工具调用失败时是否取消同一批的其它调用
     require_tool_confirmation: bool = False  # 是否需要用户确认
+    tool_selection_top_k: Optional[int] = None  # 每次只发送最相关的 k 个工具，None 表示发送全部
+    pinned_tools: List[str] = field(default_factory=list)  # 启用工具筛选时始终发送的工具
 
 
 @dataclass
@@ -47,6 +52,17 @@ class TurnResult:
     tool_results: List[ToolResult]  # 工具执行结果
     turns_taken: int               # 实际执行轮数
     reasoning_trace: List[str] = field(default_factory=list)  # 推理追踪
+    tool_stats: List[ToolGraphStats] = field(default_factory=list)  # 每轮工具执行的耗时统计
+
+
+@dataclass
+class StreamEvent:
+    """流式执行事件"""
+    type: str  # token, tool_call, tool_result, done
+    content: str = ""                       # token: 文本增量
+    tool_call: Optional[ToolCall] = None    # tool_call: 参数已完整、已开始执行的工具调用
+    tool_result: Optional[ToolResult] = None  # tool_result: 工具执行结果
+    result: Optional[TurnResult] = None     # done: 完整执行结果
 
 
 class LLMOrchestrator:
@@ -69,6 +85,17 @@ class LLMOrchestrator:
             user_message="帮我计算 123 + 456",
         )
         print(result.final_response)
+    
+    工具较多时可设置 tool_selection_top_k，每次只把与用户消息最相关的工具
+    (加上 pinned_tools) 发送给 LLM。设置 tool_embedding_fn 时按嵌入相似度筛选，
+    否则按 BM25 关键词相关度筛选:
+    
+        orchestrator = LLMOrchestrator(
+            llm_client=LLMClient(config),
+            tool_registry=registry,
+            config=OrchestratorConfig(tool_selection_top_k=8, pinned_tools=["search"]),
+            tool_embedding_fn=embed,
+        )
     """
     
     def __init__(
@@ -76,15 +103,36 @@ class LLMOrchestrator:
         llm_client: LLMClient,
         tool_registry: UnifiedToolRegistry,
         config: Optional[OrchestratorConfig] = None,
+        tool_embedding_fn: Optional[Callable] = None,
     ):
+        """
+        Args:
+            llm_client: LLM 客户端
+            tool_registry: 工具注册表
+            config: 编排器配置
+            tool_embedding_fn: 工具筛选使用的嵌入函数 async (str) -> List[float]
+        """
         self.llm = llm_client
         self.registry = tool_registry
         self.config = config or OrchestratorConfig()
+        self.tool_embedding_fn = tool_embedding_fn
+        
+        # 工具筛选统计
+        self._selection_stats = {
+            "selections": 0,
+            "tools_offered": 0,
+            "tools_available": 0,
+            "llm_calls": 0,
+            "schema_tokens_saved": 0,
+        }
         
         # 系统提示词模板
         self.system_prompts = {
             "auto": self._build_auto_system_prompt(),
         }
+        
+        # 默认系统提示词缓存: (工具集版本号, 模板, 工具子集, 提示词)
+        self._default_system_prompt: Optional[Tuple[int, str, Optional[Tuple[str, ...]], str]] = None
     
     def _build_auto_system_prompt(self) -> str:
         """构建自主决策模式的系统提示词"""
@@ -104,51 +152,90 @@ class LLMOrchestrator:
 {tools_schema}
 """
     
-    def _generate_tools_description(self) -> str:
+    def _generate_tools_description(self, tool_names: Optional[List[str]] = None) -> str:
         """生成工具描述文本"""
-        tools = self.registry.list_tools()
-        if not tools:
-            return "暂无可用工具"
-        
-        lines = []
-        for tool in tools:
-            params_desc = ", ".join([
-                f"{p.name} ({p.parameter_type})" 
-                for p in tool.parameters
-            ])
-            lines.append(f"- {tool.name}({params_desc}): {tool.description}")
-        
-        return "\n".join(lines)
+        return self.registry.get_tools_description(tool_names)
+    
+    def _get_default_system_prompt(self, tool_names: Optional[List[str]] = None) -> str:
+        """获取注入了工具信息的默认系统提示词，工具集不变时直接复用"""
+        version = self.registry.version
+        template = self.system_prompts["auto"]
+        subset = tuple(tool_names) if tool_names is not None else None
+        cached = self._default_system_prompt
+        if (
+            cached is None
+            or cached[0] != version
+            or cached[1] is not template
+            or cached[2] != subset
+        ):
+            prompt = template.format(
+                tools_description=self._generate_tools_description(tool_names),
+                tools_schema=self.registry.get_tools_schema_json(tool_names),
+            )
+            cached = self._default_system_prompt = (version, template, subset, prompt)
+        return cached[3]
+    
+    async def _select_tools(self, user_message: str) -> Optional[List[str]]:
+        """
+        选出本次发送给 LLM 的工具
+        
+        Returns:
+            工具名列表 (固定工具在前)，未启用筛选或工具数量不超过上限时返回 None 表示全部
+        """
+        top_k = self.config.tool_selection_top_k
+        if top_k is None:
+            return None
+        
+        pinned = [name for name in self.config.pinned_tools if self.registry.get_tool(name)]
+        if self.registry.count() <= top_k + len(pinned):
+            return None
+        
+        ranked = await self.registry.rank_tools(
+            user_message, top_k + len(pinned), self.tool_embedding_fn
+        )
+        selected = pinned + [name for name in ranked if name not in pinned][:top_k]
+        
+        self._selection_stats["selections"] += 1
+        self._selection_stats["tools_offered"] += len(selected)
+        self._selection_stats["tools_available"] += self.registry.count()
+        return selected
+    
+    def get_tool_selection_stats(self) -> Dict[str, Any]:
+        """
+        获取工具筛选统计
+        
+        schema_tokens_saved 为估算值：每次 LLM 调用少发送的工具 Schema token 数
+        (使用默认系统提示词时 Schema 同时出现在提示词和 tools 参数中，按两份计)
+        """
+        stats = dict(self._selection_stats)
+        selections = stats["selections"]
+        stats["avg_tools_offered"] = stats["tools_offered"] / selections if selections else 0.0
+        stats["avg_tools_available"] = stats["tools_available"] / selections if selections else 0.0
+        return stats
     
     def _build_messages(
         self,
         user_message: str,
         history: Optional[List[Message]],
         system_prompt: Optional[str],
+        tool_names: Optional[List[str]] = None,
     ) -> List[Message]:
         """构建消息列表"""
-        messages = []
+        # 系统提示词 (未指定时使用默认提示词，注入工具信息)
+        system_parts = [system_prompt or self._get_default_system_prompt(tool_names)]
         
-        # 添加系统提示词
-        if system_prompt:
-            messages.append(Message.system(system_prompt))
-        else:
-            # 使用默认系统提示词，注入工具信息
-            tools_desc = self._generate_tools_description()
-            tools_schema = json.dumps(
-                self.registry.get_all_llm_schemas(), 
-                indent=2
-            )
-            messages.append(Message.system(
-                self.system_prompts["auto"].format(
-                    tools_description=tools_desc,
-                    tools_schema=tools_schema,
-                )
-            ))
+        # 历史开头的系统消息 (自定义提示词、历史摘要) 并入同一条系统消息，
+        # 避免只保留一条系统消息的提供商丢掉工具说明
+        history = history or []
+        leading = 0
+        while leading < len(history) and history[leading].role == "system":
+            system_parts.append(history[leading].content)
+            leading += 1
+        
+        messages = [Message.system("\n\n".join(p for p in system_parts if p))]
         
         # 添加历史消息
-        if history:
-            messages.extend(history)
+        messages.extend(history[leading:])
         
         # 添加用户消息
         messages.append(Message.user(user_message))
@@ -161,32 +248,101 @@ class LLMOrchestrator:
         
         if response.tool_calls:
             for tc in response.tool_calls:
-                # 处理 OpenAI 格式
-                if hasattr(tc, 'function') and hasattr(tc.function, 'name'):
-                    try:
-                        arguments = json.loads(tc.function.arguments)
-                    except (json.JSONDecodeError, AttributeError):
-                        arguments = {}
-                    
-                    tool_calls.append(ToolCall(
-                        tool_id=tc.id or str(uuid.uuid4()),
-                        tool_name=tc.function.name,
-                        arguments=arguments,
-                        call_id=tc.id or str(uuid.uuid4()),
-                        timeout_ms=self.config.tool_timeout_ms,
-                    ))
-                # 处理 Anthropic 格式
-                elif hasattr(tc, 'type') and tc.type == "tool_use":
-                    tool_calls.append(ToolCall(
-                        tool_id=tc.id or str(uuid.uuid4()),
-                        tool_name=tc.name,
-                        arguments=tc.input or {},
-                        call_id=tc.id or str(uuid.uuid4()),
-                        timeout_ms=self.config.tool_timeout_ms,
-                    ))
+                call = self._parse_tool_call(tc)
+                if call is not None:
+                    tool_calls.append(call)
         
         return tool_calls
     
+    def _parse_tool_call(self, tc: Any) -> Optional[ToolCall]:
+        """解析单个工具调用，无法识别的格式返回 None"""
+        # 处理 OpenAI 格式 (含流式组装的 StreamedToolCall)
+        if hasattr(tc, 'function') and hasattr(tc.function, 'name'):
+            try:
+                arguments = json.loads(tc.function.arguments)
+            except (json.JSONDecodeError, AttributeError):
+                arguments = {}
+            
+            return ToolCall(
+                tool_id=tc.id or str(uuid.uuid4()),
+                tool_name=tc.function.name,
+                arguments=arguments,
+                call_id=tc.id or str(uuid.uuid4()),
+                timeout_ms=self.config.tool_timeout_ms,
+            )
+        # 处理 Anthropic 格式
+        if hasattr(tc, 'type') and tc.type == "tool_use":
+            return ToolCall(
+                tool_id=tc.id or str(uuid.uuid4()),
+                tool_name=tc.name,
+                arguments=tc.input or {},
+                call_id=tc.id or str(uuid.uuid4()),
+                timeout_ms=self.config.tool_timeout_ms,
+            )
+        return None
+    
+    @staticmethod
+    def _tool_call_dict(tc: Any) -> Dict[str, Any]:
+        """
+        工具调用转换为消息中的 tool_calls 项 (与流式路径相同的 OpenAI 格式字典)
+        
+        响应中的工具调用可能是提供商 SDK 的对象、Anthropic 的 tool_use 块
+        或响应缓存还原的 StreamedToolCall，不能直接放进下一轮请求。
+        """
+        if not isinstance(tc, StreamedToolCall):
+            if hasattr(tc, "function"):
+                function = StreamedFunction(name=tc.function.name, arguments=tc.function.arguments)
+            else:
+                function = StreamedFunction(name=tc.name, arguments=json.dumps(tc.input or {}))
+            tc = StreamedToolCall(id=tc.id, function=function)
+        return tc.to_dict()
+    
+    async def _prepare_turn(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Message]],
+        system_prompt: Optional[str],
+    ) -> Tuple[Optional[List[str]], List[Dict[str, Any]], int, List[Message]]:
+        """
+        筛选工具并构建消息
+        
+        Returns:
+            (工具名子集或 None, 工具 Schema 列表, 每次 LLM 调用节省的 Schema token 数, 消息列表)
+        """
+        tool_names = await self._select_tools(user_message)
+        if tool_names is None:
+            tools = self.registry.get_all_llm_schemas()
+            saved_tokens_per_call = 0
+        else:
+            tools = self.registry.get_llm_schemas(tool_names)
+            copies = 1 if system_prompt else 2
+            saved_tokens_per_call = copies * (
+                self.registry.estimate_schema_tokens()
+                - self.registry.estimate_schema_tokens(tool_names)
+            )
+        
+        messages = self._build_messages(
+            user_message, 
+            conversation_history,
+            system_prompt,
+            tool_names,
+        )
+        return tool_names, tools, saved_tokens_per_call, messages
+    
+    def _record_llm_call(self, tool_names: Optional[List[str]], saved_tokens: int) -> None:
+        """记录一次使用了工具筛选的 LLM 调用"""
+        if tool_names is not None:
+            self._selection_stats["llm_calls"] += 1
+            self._selection_stats["schema_tokens_saved"] += saved_tokens
+    
+    @staticmethod
+    def _tool_result_message(result: ToolResult) -> Message:
+        """将工具结果转换为工具消息"""
+        return Message.tool(
+            content=json.dumps(result.result) if result.success else result.error,
+            tool_call_id=result.call_id,
+        )
+    
     async def execute(
         self,
         user_message: str,
@@ -204,15 +360,14 @@ class LLMOrchestrator:
         Returns:
             执行结果
         """
-        # 构建消息历史
-        messages = self._build_messages(
-            user_message, 
-            conversation_history,
-            system_prompt
+        # 筛选相关工具，构建消息历史
+        tool_names, tools, saved_tokens_per_call, messages = await self._prepare_turn(
+            user_message, conversation_history, system_prompt
         )
         
         tool_results = []
         reasoning_trace = []
+        tool_stats: List[ToolGraphStats] = []
         turns_taken = 0
         
         while turns_taken < self.config.max_tool_calls_per_turn:
@@ -221,9 +376,10 @@ class LLMOrchestrator:
             # 调用 LLM
             response = await self.llm.chat(
                 messages=messages,
-                tools=self.registry.get_all_llm_schemas(),
+                tools=tools,
                 tool_choice="auto" if self.config.mode == "auto" else "none",
             )
+            self._record_llm_call(tool_names, saved_tokens_per_call)
             
             # 解析响应
             tool_calls = self._parse_tool_calls(response)
@@ -235,6 +391,7 @@ class LLMOrchestrator:
                     tool_results=tool_results,
                     turns_taken=turns_taken,
                     reasoning_trace=reasoning_trace,
+                    tool_stats=tool_stats,
                 )
             
             # 记录推理
@@ -242,24 +399,28 @@ class LLMOrchestrator:
                 f"LLM decided to call tools: {[tc.tool_name for tc in tool_calls]}"
             )
             
-            # 执行工具调用
-            if self.config.parallel_tool_calls:
-                results = await self._execute_tools_parallel(tool_calls)
-            else:
-                results = await self._execute_tools_sequential(tool_calls)
+            # 执行工具调用，重复 ID 的调用不执行，直接记为失败结果
+            rejected = self._reject_duplicate_calls(tool_calls)
+            outcome = await self._tool_executor().run(ToolGraph.from_calls(
+                call for i, call in enumerate(tool_calls) if i not in rejected
+            ))
+            executed = iter(outcome.results)
+            results = [
+                rejected[i] if i in rejected else next(executed)
+                for i in range(len(tool_calls))
+            ]
+            tool_stats.append(outcome.stats)
+            reasoning_trace.append(self._tool_stats_trace(outcome.stats))
             
             tool_results.extend(results)
             
             # 将工具结果添加到消息历史
             messages.append(Message.assistant(
                 content=response.content,
-                tool_calls=response.tool_calls,
+                tool_calls=[self._tool_call_dict(tc) for tc in response.tool_calls],
             ))
             for result in results:
-                messages.append(Message.tool(
-                    content=json.dumps(result.result) if result.success else result.error,
-                    tool_call_id=result.call_id,
-                ))
+                messages.append(self._tool_result_message(result))
         
         # 达到最大轮数，让 LLM 整合结果
         final_response = await self._synthesize_final_response(
@@ -271,20 +432,187 @@ class LLMOrchestrator:
             tool_results=tool_results,
             turns_taken=turns_taken,
             reasoning_trace=reasoning_trace,
+            tool_stats=tool_stats,
         )
     
-    async def _execute_tools_parallel(self, calls: List[ToolCall]) -> List[ToolResult]:
-        """并行执行工具调用"""
-        tasks = [self.registry.execute(call) for call in calls]
-        return await asyncio.gather(*tasks)
+    async def execute_stream(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Message]] = None,
+        system_prompt: Optional[str] = None,
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        流式执行单轮对话
+        
+        逐个产出 LLM 的文本增量；某个工具调用的参数一旦完整就立即开始执行
+        (parallel_tool_calls 为 True 时)，不必等待整条消息生成完毕。
+        最后产出 type="done" 的事件，其 result 与 execute() 的返回值相同。
+        
+        用法:
+            async for event in orchestrator.execute_stream("北京天气怎么样"):
+                if event.type == "token":
+                    print(event.content, end="")
+                elif event.type == "done":
+                    result = event.result
+        """
+        tool_names, tools, saved_tokens_per_call, messages = await self._prepare_turn(
+            user_message, conversation_history, system_prompt
+        )
+        
+        tool_results = []
+        reasoning_trace = []
+        tool_stats: List[ToolGraphStats] = []
+        turns_taken = 0
+        
+        while turns_taken < self.config.max_tool_calls_per_turn:
+            turns_taken += 1
+            
+            content_parts: List[str] = []
+            streamed_calls: List[StreamedToolCall] = []
+            calls: List[ToolCall] = []
+            tasks: Dict[int, asyncio.Task] = {}
+            rejected: Dict[int, ToolResult] = {}
+            batch = self._tool_executor().batch()
+            
+            try:
+                async for chunk in self.llm.chat_stream(
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto" if self.config.mode == "auto" else "none",
+                ):
+                    if chunk.type == "content":
+                        content_parts.append(chunk.delta)
+                        yield StreamEvent(type="token", content=chunk.delta)
+                    elif chunk.type == "tool_call":
+                        call = self._parse_tool_call(chunk.tool_call)
+                        if call is None:
+                            continue
+                        if any(c.call_id == call.call_id for c in calls):
+                            rejected[len(calls)] = self._duplicate_call_result(call)
+                        elif self.config.parallel_tool_calls:
+                            # 参数已完整，立即开始执行
+                            tasks[len(calls)] = asyncio.create_task(batch.execute(call))
+                        streamed_calls.append(chunk.tool_call)
+                        calls.append(call)
+                        yield StreamEvent(type="tool_call", tool_call=call)
+                
+                self._record_llm_call(tool_names, saved_tokens_per_call)
+                
+                if not calls:
+                    yield StreamEvent(type="done", result=TurnResult(
+                        final_response="".join(content_parts),
+                        tool_results=tool_results,
+                        turns_taken=turns_taken,
+                        reasoning_trace=reasoning_trace,
+                        tool_stats=tool_stats,
+                    ))
+                    return
+                
+                reasoning_trace.append(
+                    f"LLM decided to call tools: {[tc.tool_name for tc in calls]}"
+                )
+                
+                results = []
+                for i, call in enumerate(calls):
+                    if i in rejected:
+                        result = rejected[i]
+                    elif i in tasks:
+                        result = await tasks[i]
+                    else:
+                        result = await batch.execute(call)
+                    results.append(result)
+                    yield StreamEvent(type="tool_result", tool_result=result)
+                
+                stats = batch.stats(ToolGraph.from_calls(
+                    call for i, call in enumerate(calls) if i not in rejected
+                ))
+                tool_stats.append(stats)
+                reasoning_trace.append(self._tool_stats_trace(stats))
+            finally:
+                # 出错或调用方提前停止迭代时，取消仍在执行的工具
+                for task in tasks.values():
+                    if not task.done():
+                        task.cancel()
+            
+            tool_results.extend(results)
+            
+            messages.append(Message.assistant(
+                content="".join(content_parts),
+                tool_calls=[tc.to_dict() for tc in streamed_calls],
+            ))
+            for result in results:
+                messages.append(self._tool_result_message(result))
+        
+        # 达到最大轮数，让 LLM 整合结果
+        content_parts = []
+        synthesis_prompt = Message.user(
+            "请根据以上工具执行结果，给用户一个完整的回复。"
+        )
+        async for chunk in self.llm.chat_stream(
+            messages=messages + [synthesis_prompt],
+            tools=[],
+        ):
+            if chunk.type == "content":
+                content_parts.append(chunk.delta)
+                yield StreamEvent(type="token", content=chunk.delta)
+        
+        yield StreamEvent(type="done", result=TurnResult(
+            final_response="".join(content_parts),
+            tool_results=tool_results,
+            turns_taken=turns_taken,
+            reasoning_trace=reasoning_trace,
+            tool_stats=tool_stats,
+        ))
+    
+    @staticmethod
+    def _duplicate_call_result(call: ToolCall) -> ToolResult:
+        """LLM 在同一轮中重复使用的调用 ID 不执行，返回失败结果"""
+        return ToolResult(
+            call_id=call.call_id,
+            success=False,
+            result=None,
+            error=f"Duplicate tool call id '{call.call_id}' in this turn",
+        )
+    
+    @classmethod
+    def _reject_duplicate_calls(cls, calls: List[ToolCall]) -> Dict[int, ToolResult]:
+        """同一轮中调用 ID 重复的调用 (位置 -> 失败结果)，第一次出现的调用正常执行"""
+        seen = set()
+        rejected = {}
+        for i, call in enumerate(calls):
+            if call.call_id in seen:
+                rejected[i] = cls._duplicate_call_result(call)
+            seen.add(call.call_id)
+        return rejected
+    
+    def _tool_executor(self) -> ToolGraphExecutor:
+        """按配置创建工具图执行器 (不并行时并发上限为 1，即按顺序执行)"""
+        return ToolGraphExecutor(
+            self.registry,
+            max_concurrency=self.config.max_parallel_tools if self.config.parallel_tool_calls else 1,
+            cancel_on_failure=self.config.cancel_on_tool_failure,
+        )
     
-    async def _execute_tools_sequential(self, calls: List[ToolCall]) -> List[ToolResult]:
-        """顺序执行工具调用"""
-        results = []
-        for call in calls:
-            result = await self.registry.execute(call)
-            results.append(result)
-        return results
+    @staticmethod
+    def _tool_stats_trace(stats: ToolGraphStats) -> str:
+        """工具执行耗时的推理追踪记录"""
+        return (
+            f"Executed {stats.calls} tool calls in {stats.wall_time_ms:.0f}ms "
+            f"(critical path {stats.critical_path_ms:.0f}ms: {stats.critical_path})"
+        )
+    
+    async def execute_plan(self, plan: Dict[str, Any]) -> ToolGraphResult:
+        """
+        执行 plan() 生成的计划
+        
+        计划中的工具调用按 depends_on 和参数里的 {{id}} / {{id.field}} 占位符构建依赖图，
+        互不依赖的调用并行执行。
+        
+        Raises:
+            ValueError: 计划的依赖不存在或存在环
+        """
+        graph = ToolGraph.from_plan(plan, self.registry, timeout_ms=self.config.tool_timeout_ms)
+        return await self._tool_executor().run(graph)
     
     async def _synthesize_final_response(
         self, 
@@ -312,7 +640,7 @@ class LLMOrchestrator:
         """
         规划执行计划（不实际执行）
         
-        用于预览 LLM 会如何响应用户请求
+        用于预览 LLM 会如何响应用户请求，返回的计划可交给 execute_plan() 执行
         """
         reasoning_prompt = """你是一个善于推理的 AI 助手。请按以下步骤处理用户请求：
 
@@ -324,9 +652,12 @@ class LLMOrchestrator:
 {
     "analysis": "你的分析",
     "plan": "你的计划",
-    "tool_calls": [{"name": "工具名", "arguments": {...}}],
+    "tool_calls": [{"id": "step1", "name": "工具名", "arguments": {...}, "depends_on": []}],
     "needs_user_confirmation": false
 }
+
+如果某个工具调用需要用到前一个调用的结果，在 depends_on 中列出其 id，
+并在参数中用 "{{id}}" 或 "{{id.字段名}}" 引用该结果；互不依赖的调用会并行执行。
 """
         
         messages = [
@@ -354,5 +685,6 @@ __all__ = [
     "OrchestratorMode",
     "OrchestratorConfig",
     "TurnResult",
+    "StreamEvent",
     "LLMOrchestrator",
 ]
@@ -0,0 +1,498 @@
+"""
+NeuroFlow Python SDK - LLM Response Cache
+
+LLM 响应缓存 - 以请求的规范化哈希为键，可选按语义相似度匹配近似重复的用户消息
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+
+from .llm_client import LLMResponse, Message, StreamedFunction, StreamedToolCall
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(obj: Any) -> Any:
+    """json.dumps 的 default：把 SDK 对象 (如原始工具调用) 转换为可序列化的结构"""
+    for attr in ("to_dict", "model_dump"):
+        method = getattr(obj, attr, None)
+        if callable(method):
+            return method()
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+    return repr(obj)
+
+
+def _encode_response(response: LLMResponse) -> Dict[str, Any]:
+    """LLMResponse 转换为可持久化的字典 (不保存 raw_response)"""
+    tool_calls = None
+    if response.tool_calls:
+        tool_calls = []
+        for tc in response.tool_calls:
+            if hasattr(tc, "function"):
+                # OpenAI 格式
+                tool_calls.append({
+                    "id": tc.id,
+                    "name": tc.function.name,
+                    "arguments": tc.function.arguments,
+                })
+            else:
+                # Anthropic tool_use
+                tool_calls.append({
+                    "id": tc.id,
+                    "name": tc.name,
+                    "arguments": json.dumps(tc.input or {}),
+                })
+    return {
+        "content": response.content,
+        "model": response.model,
+        "usage": response.usage,
+        "tool_calls": tool_calls,
+        "finish_reason": response.finish_reason,
+    }
+
+
+def _decode_response(data: Dict[str, Any]) -> LLMResponse:
+    """从字典还原 LLMResponse，工具调用统一还原为 StreamedToolCall"""
+    tool_calls = None
+    if data.get("tool_calls"):
+        tool_calls = [
+            StreamedToolCall(
+                id=tc["id"],
+                function=StreamedFunction(name=tc["name"], arguments=tc["arguments"]),
+            )
+            for tc in data["tool_calls"]
+        ]
+    return LLMResponse(
+        content=data["content"],
+        model=data["model"],
+        usage=data.get("usage"),
+        tool_calls=tool_calls,
+        finish_reason=data.get("finish_reason"),
+    )
+
+
+def _cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """计算余弦相似度"""
+    if len(a) != len(b):
+        return 0.0
+    dot_product = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot_product / (norm_a * norm_b)
+
+
+# ========== 存储后端 ==========
+
+class ResponseCacheBackend(ABC):
+    """响应缓存存储后端，超出容量时按 LRU 顺序淘汰"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取记录并标记为最近使用"""
+
+    @abstractmethod
+    def put(self, key: str, record: Dict[str, Any]) -> List[str]:
+        """写入记录，返回因超出容量被淘汰的键"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除记录"""
+
+    @abstractmethod
+    def records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """遍历所有记录 (不影响 LRU 顺序)"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def close(self) -> None:
+        """释放资源"""
+
+
+class InMemoryResponseCacheBackend(ResponseCacheBackend):
+    """进程内 LRU 存储"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(key)
+        if record is not None:
+            self._records.move_to_end(key)
+        return record
+
+    def put(self, key: str, record: Dict[str, Any]) -> List[str]:
+        self._records[key] = record
+        self._records.move_to_end(key)
+
+        evicted = []
+        while len(self._records) > self.max_entries:
+            evicted.append(self._records.popitem(last=False)[0])
+        return evicted
+
+    def delete(self, key: str) -> None:
+        self._records.pop(key, None)
+
+    def records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(list(self._records.items()))
+
+    def clear(self) -> None:
+        self._records.clear()
+
+
+class DiskResponseCacheBackend(ResponseCacheBackend):
+    """
+    SQLite 存储，进程重启后缓存仍然有效
+
+    用法:
+        cache = ResponseCache(backend=DiskResponseCacheBackend("~/.neuroflow/llm_cache.db"))
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        record TEXT NOT NULL,
+        accessed INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed);
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        """
+        Args:
+            path: SQLite 数据库文件路径
+            max_entries: 最大条目数
+        """
+        self.path = os.path.expanduser(path)
+        self.max_entries = max(1, max_entries)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+        # 访问序号，用于 LRU 排序 (比时间戳更能区分快速连续的访问)
+        row = self._conn.execute("SELECT MAX(accessed), COUNT(*) FROM responses").fetchone()
+        self._clock = row[0] or 0
+        # 条目数在写入/删除时维护，避免每次写入都 COUNT(*) 全表
+        self._count = row[1]
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT record FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (self._tick(), key)
+        )
+        self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, record: Dict[str, Any]) -> List[str]:
+        encoded = json.dumps(record)
+        cursor = self._conn.execute(
+            "UPDATE responses SET record = ?, accessed = ? WHERE key = ?",
+            (encoded, self._tick(), key),
+        )
+        if cursor.rowcount == 0:
+            self._conn.execute(
+                "INSERT INTO responses (key, record, accessed) VALUES (?, ?, ?)",
+                (key, encoded, self._clock),
+            )
+            self._count += 1
+
+        evicted = []
+        excess = self._count - self.max_entries
+        if excess > 0:
+            evicted = [
+                row[0] for row in self._conn.execute(
+                    "SELECT key FROM responses ORDER BY accessed LIMIT ?", (excess,)
+                )
+            ]
+            self._conn.executemany(
+                "DELETE FROM responses WHERE key = ?", [(k,) for k in evicted]
+            )
+            self._count -= len(evicted)
+        self._conn.commit()
+        return evicted
+
+    def delete(self, key: str) -> None:
+        cursor = self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._count -= cursor.rowcount
+        self._conn.commit()
+
+    def records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for key, record in self._conn.execute("SELECT key, record FROM responses"):
+            yield key, json.loads(record)
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM responses")
+        self._count = 0
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ========== 响应缓存 ==========
+
+@dataclass
+class CacheLookup:
+    """一次缓存查询的结果；未命中时传回 ResponseCache.store() 写入"""
+    key: str                                  # 完整请求的哈希
+    prefix: Optional[str] = None              # 除最后一条用户消息外的请求哈希 (语义匹配的范围)
+    embedding: Optional[List[float]] = None   # 最后一条用户消息的嵌入向量
+    response: Optional[LLMResponse] = None    # 命中时的缓存响应
+    hit: Optional[str] = None                 # "exact" / "semantic" / None
+
+
+class ResponseCache:
+    """
+    LLM 响应缓存
+
+    - 精确匹配：键为 (模型, 消息, 工具, 温度及其它生成参数) 的规范化 JSON 的 SHA-256
+    - 语义匹配 (设置 embedding_fn 时)：其余部分完全相同、只有最后一条用户消息不同的请求，
+      若用户消息的嵌入相似度不低于 similarity_threshold，复用已缓存的响应；
+      带 tool_calls 的响应 (参数取决于用户消息的具体内容) 只参与精确匹配
+    - 超过 ttl_seconds 的条目视为过期；容量由存储后端按 LRU 淘汰
+    - temperature > 0 的请求输出本就不确定，默认不缓存，force=True 时强制缓存
+
+    用法:
+        cache = ResponseCache(max_entries=5000, ttl_seconds=3600, embedding_fn=embed)
+        client = LLMClient(LLMConfig(provider="openai", temperature=0), response_cache=cache)
+        ...
+        cache.get_stats()  # {"hit_rate": 0.42, ...}
+    """
+
+    def __init__(
+        self,
+        backend: Optional[ResponseCacheBackend] = None,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[float] = 3600.0,
+        embedding_fn: Optional[Callable] = None,
+        similarity_threshold: float = 0.95,
+        force: bool = False,
+    ):
+        """
+        Args:
+            backend: 存储后端，默认 InMemoryResponseCacheBackend(max_entries)
+            max_entries: 默认内存后端的最大条目数
+            ttl_seconds: 条目有效期，None 表示不过期
+            embedding_fn: async (str) -> List[float]，设置后启用语义匹配
+            similarity_threshold: 语义匹配的最低余弦相似度
+            force: 是否缓存 temperature > 0 的请求
+        """
+        self.backend = backend if backend is not None else InMemoryResponseCacheBackend(max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.embedding_fn = embedding_fn
+        self.similarity_threshold = similarity_threshold
+        self.force = force
+
+        # 语义索引: 前缀哈希 -> {键: 嵌入向量}
+        self._semantic: Dict[str, Dict[str, List[float]]] = {}
+        self._prefix_of: Dict[str, str] = {}
+
+        # 统计
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        for key, record in self.backend.records():
+            if not record["response"].get("tool_calls"):
+                self._index(key, record.get("prefix"), record.get("embedding"))
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """计算请求的规范化哈希"""
+        canonical = json.dumps(
+            request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_jsonable
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def should_cache(self, temperature: float) -> bool:
+        """该温度下的请求是否走缓存，不走缓存时计入 bypassed"""
+        if self.force or temperature <= 0:
+            return True
+        self._bypassed += 1
+        return False
+
+    async def lookup(
+        self,
+        model: str,
+        messages: List[Message],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.0,
+        **params,
+    ) -> CacheLookup:
+        """
+        查询缓存
+
+        Args:
+            model: 模型名
+            messages: 消息列表
+            tools: 工具 Schema 列表
+            temperature: 温度
+            **params: 其它影响输出的参数 (如 tool_choice、max_tokens)
+        """
+        request = {
+            "model": model,
+            "messages": [m.to_dict() for m in messages],
+            "tools": tools or [],
+            "temperature": temperature,
+            "params": params,
+        }
+        key = self.make_key(request)
+
+        record = self._get_fresh(key)
+        if record is not None:
+            self._exact_hits += 1
+            return CacheLookup(key=key, response=_decode_response(record["response"]), hit="exact")
+
+        result = CacheLookup(key=key)
+        if self.embedding_fn is not None and messages and messages[-1].role == "user":
+            request["messages"] = request["messages"][:-1]
+            result.prefix = self.make_key(request)
+            try:
+                result.embedding = list(await self.embedding_fn(messages[-1].content))
+            except Exception as e:
+                logger.warning(f"Response cache embedding failed, semantic lookup skipped: {e}")
+            else:
+                record = self._semantic_match(result.prefix, result.embedding)
+                if record is not None:
+                    self._semantic_hits += 1
+                    result.response = _decode_response(record["response"])
+                    result.hit = "semantic"
+                    return result
+
+        self._misses += 1
+        return result
+
+    async def store(self, lookup: CacheLookup, response: LLMResponse) -> None:
+        """写入 lookup() 未命中的请求的响应"""
+        # 工具调用的参数针对原始措辞生成，语义近似的请求不能复用
+        semantic = not response.tool_calls
+        record = {
+            "response": _encode_response(response),
+            "created_at": time.time(),
+            "prefix": lookup.prefix if semantic else None,
+            "embedding": lookup.embedding if semantic else None,
+        }
+        for key in self.backend.put(lookup.key, record):
+            self._forget(key)
+            self._evictions += 1
+        self._index(lookup.key, record["prefix"], record["embedding"])
+
+    def _get_fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的记录，过期的记录顺便删除"""
+        record = self.backend.get(key)
+        if record is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - record["created_at"] > self.ttl_seconds:
+            self.backend.delete(key)
+            self._forget(key)
+            self._expirations += 1
+            return None
+        return record
+
+    def _semantic_match(self, prefix: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """在同一前缀下查找相似度最高且不低于阈值的记录"""
+        candidates = self._semantic.get(prefix)
+        if not candidates:
+            return None
+
+        best_key, best_score = None, self.similarity_threshold
+        for key, vector in candidates.items():
+            score = _cosine_similarity(embedding, vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self._get_fresh(best_key) if best_key is not None else None
+
+    def _index(self, key: str, prefix: Optional[str], embedding: Optional[List[float]]) -> None:
+        """加入语义索引"""
+        self._forget(key)
+        if prefix is not None and embedding:
+            self._semantic.setdefault(prefix, {})[key] = embedding
+            self._prefix_of[key] = prefix
+
+    def _forget(self, key: str) -> None:
+        """从语义索引移除"""
+        prefix = self._prefix_of.pop(key, None)
+        if prefix is None:
+            return
+        entries = self._semantic[prefix]
+        entries.pop(key, None)
+        if not entries:
+            del self._semantic[prefix]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self.backend.clear()
+        self._semantic.clear()
+        self._prefix_of.clear()
+
+    def close(self) -> None:
+        """关闭存储后端"""
+        self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        hits = self._exact_hits + self._semantic_hits
+        lookups = hits + self._misses
+        return {
+            "size": len(self.backend),
+            "hits": hits,
+            "exact_hits": self._exact_hits,
+            "semantic_hits": self._semantic_hits,
+            "misses": self._misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bypassed": self._bypassed,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+
+
+__all__ = [
+    "ResponseCacheBackend",
+    "InMemoryResponseCacheBackend",
+    "DiskResponseCacheBackend",
+    "CacheLookup",
+    "ResponseCache",
+]
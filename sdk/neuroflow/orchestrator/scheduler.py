@@ -0,0 +1,415 @@
+"""
+NeuroFlow Python SDK - LLM Request Scheduler
+
+LLM 请求调度器 - 限制并发、按提供商的令牌桶限速 (请求数/分钟、token 数/分钟)、
+优先级排队，以及 429/5xx 的退避重试
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    容量为每分钟的额度，按 rate_per_minute / 60 每秒匀速补充。
+    consume() 允许余额为负，用于按实际用量补扣预估不足的部分。
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate_per_minute / 60.0
+        )
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """当前余额"""
+        self._refill()
+        return self._tokens
+
+    def time_until(self, amount: float) -> float:
+        """余额足够 amount (超过容量时按容量计) 还需等待的秒数"""
+        needed = min(amount, self.capacity) - self.available
+        if needed <= 0:
+            return 0.0
+        return needed * 60.0 / self.rate_per_minute
+
+    def consume(self, amount: float) -> None:
+        """扣除额度"""
+        self._refill()
+        self._tokens -= amount
+
+
+@dataclass
+class ProviderLimits:
+    """单个提供商的限速配置，None 表示不限"""
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+@dataclass
+class SchedulerConfig:
+    """调度器配置"""
+    max_concurrency: int = 8                  # 同时进行的请求数上限 (所有提供商共享)
+    default_limits: ProviderLimits = field(default_factory=ProviderLimits)
+    provider_limits: Dict[str, ProviderLimits] = field(default_factory=dict)  # 提供商名 -> 限速
+    max_retries: int = 3                      # 429/5xx 的最大重试次数
+    base_backoff_seconds: float = 0.5         # 指数退避的初始等待
+    max_backoff_seconds: float = 30.0         # 单次退避的最大等待
+
+
+class _ProviderState:
+    """单个提供商的队列和令牌桶"""
+
+    def __init__(self, limits: ProviderLimits):
+        self.queue: List[list] = []  # [priority, seq, future, estimated_tokens]
+        self.requests = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute else None
+        self.tokens = TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        self.paused_until = 0.0  # 收到 429 后暂停派发到该时间 (monotonic)
+
+    def wait_time(self, estimated_tokens: int) -> float:
+        """队首请求还需等待的秒数"""
+        wait = max(0.0, self.paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.time_until(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.time_until(estimated_tokens))
+        return wait
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """提取 HTTP 状态码 (openai/anthropic 的 status_code，aiohttp 的 status)"""
+    for attr in ("status_code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """提取 Retry-After 响应头 (秒)"""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    """从 LLMResponse.usage 取实际 token 数"""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return None
+    if "total_tokens" in usage:
+        return usage["total_tokens"]
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+
+class LLMScheduler:
+    """
+    LLM 请求调度器
+
+    - 所有请求共享 max_concurrency 个并发槽位
+    - 每个提供商一个优先级队列 (priority 越小越先执行，同优先级先到先得)
+      和两个令牌桶：请求数/分钟、token 数/分钟
+    - token 桶在派发时按预估值扣除，请求完成后按 LLMResponse.usage 的实际用量补差
+    - 429 和 5xx 按指数退避 (带抖动，优先使用 Retry-After) 重试；退避期间归还槽位，
+      到期后重新排队，重试同样受请求数和 token 限速约束；
+      429 同时暂停该提供商的派发，避免其它排队请求继续撞上限
+    - stream() 以同样的方式调度流式请求，流消费期间占用槽位
+
+    多个 LLMClient (例如并发处理请求的多个 Agent) 共享同一个调度器:
+
+        scheduler = LLMScheduler(SchedulerConfig(
+            max_concurrency=4,
+            provider_limits={"openai": ProviderLimits(requests_per_minute=500, tokens_per_minute=90000)},
+        ))
+        client = LLMClient(config, scheduler=scheduler)
+        await client.chat(messages, priority=0)
+        scheduler.get_stats()  # {"queue_depth": 3, "avg_wait_ms": 120.5, ...}
+    """
+
+    def __init__(self, config: Optional[SchedulerConfig] = None):
+        self.config = config or SchedulerConfig()
+        self._providers: Dict[str, _ProviderState] = {}
+        self._active = 0
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._backing_off = 0  # 退避中、尚未重新排队的重试
+
+        # 统计
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+        }
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._dispatched = 0
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._providers.get(provider)
+        if state is None:
+            limits = self.config.provider_limits.get(provider, self.config.default_limits)
+            state = self._providers[provider] = _ProviderState(limits)
+        return state
+
+    async def submit(
+        self,
+        provider: str,
+        request: Callable[[], Awaitable[Any]],
+        priority: int = 0,
+        estimated_tokens: int = 0,
+    ) -> Any:
+        """
+        排队执行请求
+
+        Args:
+            provider: 提供商名 (限速按提供商区分)
+            request: 发起请求的无参协程函数，重试时会再次调用
+            priority: 优先级，越小越先执行
+            estimated_tokens: 预估 token 数，用于 token 限速的准入判断
+
+        Returns:
+            request() 的返回值
+        """
+        self._stats["submitted"] += 1
+        state = self._state(provider)
+        seq = next(self._seq)
+        attempt = 0
+        delay = 0.0
+        while True:
+            await self._acquire(state, priority, seq, estimated_tokens, delay)
+            try:
+                response = await request()
+            except Exception as e:
+                delay = self._retry_delay(state, e, attempt)
+                if delay is None:
+                    self._stats["failed"] += 1
+                    raise
+                attempt += 1
+                continue
+            finally:
+                self._release()
+
+            self._settle(state, response, estimated_tokens)
+            return response
+
+    async def stream(
+        self,
+        provider: str,
+        open_stream: Callable[[], AsyncIterator[Any]],
+        priority: int = 0,
+        estimated_tokens: int = 0,
+    ) -> AsyncIterator[Any]:
+        """
+        排队执行流式请求，流消费期间占用一个并发槽位
+
+        只有在产出第一个片段之前失败 (429/5xx) 才会重试；片段带有 response
+        (LLMStreamChunk type="done") 时按其 usage 补扣 token 额度。
+
+        Args:
+            provider: 提供商名
+            open_stream: 打开流的无参函数，返回异步迭代器，重试时会再次调用
+            priority: 优先级，越小越先执行
+            estimated_tokens: 预估 token 数
+        """
+        self._stats["submitted"] += 1
+        state = self._state(provider)
+        seq = next(self._seq)
+        attempt = 0
+        delay = 0.0
+        while True:
+            await self._acquire(state, priority, seq, estimated_tokens, delay)
+            stream = open_stream()
+            started = False
+            response = None
+            try:
+                async for chunk in stream:
+                    started = True
+                    response = getattr(chunk, "response", None) or response
+                    yield chunk
+            except Exception as e:
+                delay = None if started else self._retry_delay(state, e, attempt)
+                if delay is None:
+                    self._stats["failed"] += 1
+                    raise
+                attempt += 1
+                continue
+            finally:
+                self._release()
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+            self._settle(state, response, estimated_tokens)
+            return
+
+    async def _acquire(
+        self,
+        state: _ProviderState,
+        priority: int,
+        seq: int,
+        estimated_tokens: int,
+        delay: float = 0.0,
+    ) -> None:
+        """
+        等待派发 (占用一个槽位并扣除限速额度)
+
+        delay > 0 时为重试：退避期间不占用槽位也不在队列中，到期后以原来的
+        优先级和顺序重新排队，派发时重新计入请求数和 token 限速
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        entry = [priority, seq, waiter, estimated_tokens]
+        enqueued = time.monotonic() + delay
+
+        handle = None
+
+        def enqueue():
+            nonlocal handle
+            handle = None
+            self._backing_off -= 1
+            heapq.heappush(state.queue, entry)
+            self._pump()
+
+        if delay > 0:
+            self._backing_off += 1
+            handle = loop.call_later(delay, enqueue)
+        else:
+            heapq.heappush(state.queue, entry)
+            self._pump()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if handle is not None:
+                # 仍在退避中，尚未排队
+                handle.cancel()
+                self._backing_off -= 1
+            elif waiter.done() and not waiter.cancelled():
+                # 已分配槽位但调用方被取消
+                self._release()
+            elif entry in state.queue:
+                state.queue.remove(entry)
+                heapq.heapify(state.queue)
+                self._pump()
+            raise
+
+        wait = max(0.0, time.monotonic() - enqueued)
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        self._dispatched += 1
+
+    def _retry_delay(self, state: _ProviderState, error: Exception, attempt: int) -> Optional[float]:
+        """429/5xx 且未超过重试次数时返回退避秒数，否则返回 None"""
+        status = _status_code(error)
+        retryable = status is not None and (status == 429 or status >= 500)
+        if not retryable or attempt >= self.config.max_retries:
+            return None
+
+        delay = _retry_after(error)
+        if delay is None:
+            delay = self.config.base_backoff_seconds * (2 ** attempt)
+            delay *= 0.5 + random.random()
+        delay = min(delay, self.config.max_backoff_seconds)
+
+        if status == 429:
+            self._stats["rate_limited"] += 1
+            state.paused_until = max(state.paused_until, time.monotonic() + delay)
+        self._stats["retries"] += 1
+        logger.warning(f"LLM request failed with status {status}, retrying in {delay:.2f}s")
+        return delay
+
+    def _settle(self, state: _ProviderState, response: Any, estimated_tokens: int) -> None:
+        """请求完成：按实际用量补扣 token 额度"""
+        actual = _usage_tokens(response)
+        if state.tokens is not None and actual is not None:
+            state.tokens.consume(actual - estimated_tokens)
+        self._stats["completed"] += 1
+
+    def _release(self) -> None:
+        """归还并发槽位"""
+        self._active -= 1
+        self._pump()
+
+    def _pump(self) -> None:
+        """在槽位和额度允许时，按优先级派发各提供商队首的请求"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        next_wait: Optional[float] = None
+        while self._active < self.config.max_concurrency:
+            best = None
+            for state in self._providers.values():
+                # 丢弃已被取消的请求
+                while state.queue and state.queue[0][2].done():
+                    heapq.heappop(state.queue)
+                if not state.queue:
+                    continue
+                wait = state.wait_time(state.queue[0][3])
+                if wait > 0:
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    continue
+                if best is None or state.queue[0][:2] < best.queue[0][:2]:
+                    best = state
+            if best is None:
+                break
+
+            _, _, waiter, estimated_tokens = heapq.heappop(best.queue)
+            if best.requests is not None:
+                best.requests.consume(1)
+            if best.tokens is not None:
+                best.tokens.consume(estimated_tokens)
+            self._active += 1
+            waiter.set_result(None)
+
+        if next_wait is not None and self._active < self.config.max_concurrency:
+            self._timer = asyncio.get_running_loop().call_later(next_wait, self._pump)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self._stats)
+        stats["active"] = self._active
+        stats["backing_off"] = self._backing_off
+        stats["queue_depth"] = sum(len(state.queue) for state in self._providers.values())
+        stats["queue_depth_by_provider"] = {
+            provider: len(state.queue) for provider, state in self._providers.items()
+        }
+        stats["avg_wait_ms"] = (
+            self._total_wait / self._dispatched * 1000 if self._dispatched else 0.0
+        )
+        stats["max_wait_ms"] = self._max_wait * 1000
+        return stats
+
+
+__all__ = [
+    "TokenBucket",
+    "ProviderLimits",
+    "SchedulerConfig",
+    "LLMScheduler",
+]
@@ -0,0 +1,507 @@
+"""
+NeuroFlow Python SDK - Tool Graph Execution
+
+工具调用 DAG 执行 - 把一组工具调用 (plan() 的计划或 LLM 单轮返回的调用) 构建为依赖图，
+在并发上限内并行执行互不依赖的调用，强制 ToolCall.timeout_ms，并统计关键路径耗时
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import re
+import time
+
+from ..tools import ToolCall, ToolResult, UnifiedToolRegistry
+
+logger = logging.getLogger(__name__)
+
+# 参数中引用其它调用结果的占位符: {{step1}} 或 {{step1.field.sub}}
+_REFERENCE = re.compile(r"\{\{\s*([\w-]+)((?:\.[\w-]+)*)\s*\}\}")
+
+# 节点状态
+_OK = "ok"
+_FAILED = "failed"
+_TIMED_OUT = "timed_out"
+_CANCELLED = "cancelled"
+_SKIPPED = "skipped"
+
+
+def _find_references(value: Any) -> Set[str]:
+    """收集参数中引用的调用 ID"""
+    if isinstance(value, str):
+        return {m.group(1) for m in _REFERENCE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(_find_references(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(_find_references(v) for v in value)) if value else set()
+    return set()
+
+
+def _lookup(value: Any, path: str) -> Any:
+    """按 .a.b 路径取值，取不到时返回 None"""
+    for key in filter(None, path.split(".")):
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, (list, tuple)) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def _substitute(value: Any, outputs: Dict[str, Any]) -> Any:
+    """把占位符替换为依赖调用的结果；整个字符串就是占位符时保留原始类型"""
+    if isinstance(value, str):
+        match = _REFERENCE.fullmatch(value.strip())
+        if match and match.group(1) in outputs:
+            return _lookup(outputs[match.group(1)], match.group(2))
+
+        def render(m: "re.Match") -> str:
+            if m.group(1) not in outputs:
+                return m.group(0)
+            resolved = _lookup(outputs[m.group(1)], m.group(2))
+            return resolved if isinstance(resolved, str) else json.dumps(resolved, default=str)
+
+        return _REFERENCE.sub(render, value)
+    if isinstance(value, dict):
+        return {k: _substitute(v, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, outputs) for v in value]
+    return value
+
+
+@dataclass
+class ToolNode:
+    """依赖图中的一个工具调用"""
+    call: ToolCall
+    depends_on: List[str] = field(default_factory=list)  # 显式依赖的调用 ID
+    references: Set[str] = field(default_factory=set)    # 参数占位符引用的调用 ID
+
+    @property
+    def call_id(self) -> str:
+        return self.call.call_id
+
+
+class ToolGraph:
+    """
+    工具调用依赖图
+
+    依赖来自两处:
+    - 显式声明的 depends_on
+    - 参数中的 {{call_id}} / {{call_id.field}} 占位符，执行前替换为对应调用的结果
+      (resolve_references=False 时不解析，参数原样传给工具)
+
+    用法:
+        graph = ToolGraph()
+        graph.add(ToolCall(tool_id="search", tool_name="search", arguments={"q": "北京"}, call_id="s"))
+        graph.add(ToolCall(tool_id="weather", tool_name="weather",
+                           arguments={"city": "{{s.city}}"}, call_id="w"))
+        graph.order()  # 校验依赖并返回拓扑序
+    """
+
+    def __init__(self, resolve_references: bool = True):
+        self._nodes: Dict[str, ToolNode] = {}
+        self.resolve_references = resolve_references
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self._nodes
+
+    @property
+    def nodes(self) -> List[ToolNode]:
+        """按加入顺序的节点"""
+        return list(self._nodes.values())
+
+    def get(self, call_id: str) -> Optional[ToolNode]:
+        return self._nodes.get(call_id)
+
+    def add(self, call: ToolCall, depends_on: Optional[Iterable[str]] = None) -> ToolNode:
+        """加入工具调用 (允许引用之后才加入的调用)"""
+        if call.call_id in self._nodes:
+            raise ValueError(f"Duplicate tool call id '{call.call_id}'")
+        node = ToolNode(
+            call=call,
+            depends_on=list(depends_on or []),
+            references=_find_references(call.arguments) if self.resolve_references else set(),
+        )
+        self._nodes[call.call_id] = node
+        return node
+
+    def dependencies(self, call_id: str) -> List[str]:
+        """节点的全部依赖: 显式依赖 + 图中存在的占位符引用"""
+        node = self._nodes[call_id]
+        deps = list(node.depends_on)
+        deps.extend(sorted(ref for ref in node.references if ref in self._nodes and ref not in deps))
+        return deps
+
+    def order(self) -> List[str]:
+        """
+        校验依赖并返回拓扑序 (同层保持加入顺序)
+
+        Raises:
+            ValueError: 依赖不存在的调用、依赖自身或存在环
+        """
+        indegree: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {call_id: [] for call_id in self._nodes}
+        for call_id, node in self._nodes.items():
+            for dep in node.depends_on:
+                if dep not in self._nodes:
+                    raise ValueError(f"Tool call '{call_id}' depends on unknown call '{dep}'")
+            deps = self.dependencies(call_id)
+            if call_id in deps:
+                raise ValueError(f"Tool call '{call_id}' depends on itself")
+            indegree[call_id] = len(deps)
+            for dep in deps:
+                dependents[dep].append(call_id)
+
+        ready = [call_id for call_id in self._nodes if indegree[call_id] == 0]
+        result = []
+        while ready:
+            call_id = ready.pop(0)
+            result.append(call_id)
+            for dependent in dependents[call_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(result) != len(self._nodes):
+            cycle = sorted(set(self._nodes) - set(result))
+            raise ValueError(f"Tool call dependencies contain a cycle: {cycle}")
+        return result
+
+    def resolve(self, call_id: str, results: Dict[str, ToolResult]) -> ToolCall:
+        """用已完成依赖的结果替换参数中的占位符"""
+        node = self._nodes[call_id]
+        if not node.references:
+            return node.call
+        outputs = {
+            ref: results[ref].result for ref in node.references if ref in results
+        }
+        return replace(node.call, arguments=_substitute(node.call.arguments, outputs))
+
+    def critical_path(self, durations: Dict[str, float]) -> Tuple[float, List[str]]:
+        """
+        关键路径: 依赖链上耗时之和最大的一条
+
+        Args:
+            durations: 调用 ID -> 耗时 (ms)，缺失按 0 计
+
+        Returns:
+            (关键路径耗时 ms, 路径上的调用 ID)
+        """
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for call_id in self.order():
+            deps = self.dependencies(call_id)
+            slowest = max(deps, key=lambda d: finish[d], default=None)
+            start = finish[slowest] if slowest is not None else 0.0
+            finish[call_id] = start + durations.get(call_id, 0.0)
+            previous[call_id] = slowest
+
+        if not finish:
+            return 0.0, []
+        end = max(finish, key=finish.get)
+        path = []
+        current: Optional[str] = end
+        while current is not None:
+            path.append(current)
+            current = previous[current]
+        return finish[end], path[::-1]
+
+    @classmethod
+    def from_calls(cls, calls: Iterable[ToolCall]) -> "ToolGraph":
+        """
+        LLM 单轮返回的工具调用: 相互独立，参数原样传给工具，不解析占位符
+
+        Raises:
+            ValueError: 调用 ID 重复 (调用方应先剔除)
+        """
+        graph = cls(resolve_references=False)
+        for call in calls:
+            graph.add(call)
+        return graph
+
+    @classmethod
+    def from_plan(
+        cls,
+        plan: Dict[str, Any],
+        registry: Optional[UnifiedToolRegistry] = None,
+        timeout_ms: int = 30000,
+    ) -> "ToolGraph":
+        """
+        从 plan() 的输出构建
+
+        plan["tool_calls"] 的每一项: {"id": "step1", "name": 工具名, "arguments": {...},
+        "depends_on": ["..."]}，id 缺省为 step1、step2 …
+
+        Raises:
+            ValueError: 依赖不存在或存在环
+        """
+        graph = cls()
+        for i, step in enumerate(plan.get("tool_calls") or []):
+            name = step.get("name") or step.get("tool_name") or ""
+            call_id = str(step.get("id") or f"step{i + 1}")
+            tool = registry.get_tool(name) if registry is not None else None
+            graph.add(
+                ToolCall(
+                    tool_id=tool.id if tool else name,
+                    tool_name=name,
+                    arguments=step.get("arguments") or {},
+                    call_id=call_id,
+                    timeout_ms=step.get("timeout_ms") or timeout_ms,
+                ),
+                depends_on=[str(d) for d in step.get("depends_on") or []],
+            )
+        graph.order()
+        return graph
+
+
+@dataclass
+class ToolGraphStats:
+    """一次工具图执行的统计"""
+    calls: int = 0
+    wall_time_ms: float = 0.0          # 从开始到全部结束的实际耗时
+    critical_path_ms: float = 0.0      # 关键路径耗时 (并发不受限时的理论最短耗时)
+    critical_path: List[str] = field(default_factory=list)
+    total_tool_time_ms: float = 0.0    # 各调用耗时之和 (顺序执行所需时间)
+    max_concurrency: int = 0           # 实际达到的最大并发数
+    failed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    skipped: int = 0                   # 因依赖失败而未执行
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_time_ms": self.wall_time_ms,
+            "critical_path_ms": self.critical_path_ms,
+            "critical_path": list(self.critical_path),
+            "total_tool_time_ms": self.total_tool_time_ms,
+            "max_concurrency": self.max_concurrency,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+        }
+
+
+@dataclass
+class ToolGraphResult:
+    """工具图执行结果，results 与 graph.nodes 顺序一致"""
+    results: List[ToolResult]
+    stats: ToolGraphStats
+
+
+class ToolBatch:
+    """
+    单次执行的并发槽位和计时
+
+    execute_stream() 边接收 LLM 输出边派发工具调用，用它在同一轮内共享并发上限和超时处理。
+    cancel_on_failure=True 时，任一调用失败 (含超时) 后取消仍在执行的调用，之后的调用不再执行，
+    二者都返回失败结果并记为 cancelled。
+    """
+
+    def __init__(self, registry: UnifiedToolRegistry, max_concurrency: int, cancel_on_failure: bool = False):
+        self.registry = registry
+        self.cancel_on_failure = cancel_on_failure
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._active = 0
+        self._started: Optional[float] = None  # 第一个调用开始执行的时间
+        self._running: Dict[str, asyncio.Future] = {}
+        self._failed: Optional[str] = None  # 第一个失败的调用 (cancel_on_failure 时)
+        self.max_concurrency = 0
+        self.durations: Dict[str, float] = {}
+        self.statuses: Dict[str, str] = {}
+
+    async def execute(self, call: ToolCall) -> ToolResult:
+        """在并发上限内执行，超过 call.timeout_ms 时返回失败结果"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        async with self._semaphore:
+            if self._failed is not None:
+                return self._cancelled(call.call_id)
+
+            self._active += 1
+            self.max_concurrency = max(self.max_concurrency, self._active)
+            started = time.perf_counter()
+            timeout = call.timeout_ms / 1000 if call.timeout_ms and call.timeout_ms > 0 else None
+            # 在单独的任务中执行，被本批次取消时不影响调用方
+            task = asyncio.ensure_future(asyncio.wait_for(self.registry.execute(call), timeout))
+            self._running[call.call_id] = task
+            try:
+                await asyncio.wait({task})
+                if task.cancelled():
+                    return self._cancelled(call.call_id)
+                result = task.result()
+                self.statuses[call.call_id] = _OK if result.success else _FAILED
+            except asyncio.TimeoutError:
+                result = ToolResult(
+                    call_id=call.call_id,
+                    success=False,
+                    result=None,
+                    error=f"Tool '{call.tool_name}' timed out after {call.timeout_ms} ms",
+                )
+                self.statuses[call.call_id] = _TIMED_OUT
+            finally:
+                task.cancel()
+                del self._running[call.call_id]
+                self._active -= 1
+                self.durations[call.call_id] = (time.perf_counter() - started) * 1000
+            if not result.execution_time_ms:
+                result.execution_time_ms = int(self.durations[call.call_id])
+            if not result.success and self.cancel_on_failure and self._failed is None:
+                self._failed = call.call_id
+                for running in self._running.values():
+                    running.cancel()
+            return result
+
+    def _cancelled(self, call_id: str) -> ToolResult:
+        """因同一批的调用失败而取消"""
+        self.statuses[call_id] = _CANCELLED
+        return _failed_result(call_id, f"Cancelled: tool call '{self._failed}' failed")
+
+    def mark(self, call_id: str, status: str) -> None:
+        self.statuses[call_id] = status
+
+    def stats(self, graph: ToolGraph) -> ToolGraphStats:
+        """按已记录的耗时和状态汇总"""
+        critical_ms, path = graph.critical_path(self.durations)
+        statuses = list(self.statuses.values())
+        return ToolGraphStats(
+            calls=len(graph),
+            wall_time_ms=(
+                (time.perf_counter() - self._started) * 1000 if self._started is not None else 0.0
+            ),
+            critical_path_ms=critical_ms,
+            critical_path=path,
+            total_tool_time_ms=sum(self.durations.values()),
+            max_concurrency=self.max_concurrency,
+            failed=statuses.count(_FAILED),
+            timed_out=statuses.count(_TIMED_OUT),
+            cancelled=statuses.count(_CANCELLED),
+            skipped=statuses.count(_SKIPPED),
+        )
+
+
+def _failed_result(call_id: str, error: str) -> ToolResult:
+    return ToolResult(call_id=call_id, success=False, result=None, error=error)
+
+
+class ToolGraphExecutor:
+    """
+    工具调用 DAG 执行器
+
+    - 依赖全部成功的调用立即开始执行，最多 max_concurrency 个同时进行
+    - 每个调用受 ToolCall.timeout_ms 限制，超时记为失败结果
+    - 依赖失败的调用不再执行，记为 skipped
+    - 执行器抛出异常视为致命错误：取消其余调用后重新抛出；
+      cancel_on_failure=True 时任一调用失败 (含超时) 也会取消其余调用
+    - 统计实际耗时、关键路径耗时和最大并发数
+
+    用法:
+        executor = ToolGraphExecutor(registry, max_concurrency=4)
+        outcome = await executor.run(ToolGraph.from_plan(plan, registry))
+        outcome.stats.critical_path_ms
+    """
+
+    def __init__(
+        self,
+        registry: UnifiedToolRegistry,
+        max_concurrency: int = 8,
+        cancel_on_failure: bool = False,
+    ):
+        self.registry = registry
+        self.max_concurrency = max_concurrency
+        self.cancel_on_failure = cancel_on_failure
+
+    def batch(self) -> ToolBatch:
+        """创建共享并发上限和 cancel_on_failure 的执行批次"""
+        return ToolBatch(self.registry, self.max_concurrency, self.cancel_on_failure)
+
+    async def run(self, graph: ToolGraph) -> ToolGraphResult:
+        """执行整个依赖图"""
+        order = graph.order()
+        # 失败后的取消按依赖图处理 (见 _cancel_remaining)，批次本身不取消
+        batch = ToolBatch(self.registry, self.max_concurrency)
+        results: Dict[str, ToolResult] = {}
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while len(results) < len(graph):
+                self._launch_ready(graph, order, batch, results, running)
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                failed = None
+                for task in done:
+                    call_id = running.pop(task)
+                    # 执行器异常是致命错误，finally 中取消其余调用
+                    results[call_id] = task.result()
+                    if not results[call_id].success and failed is None:
+                        failed = call_id
+                if failed is not None and self.cancel_on_failure:
+                    self._cancel_remaining(graph, batch, results, failed)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return ToolGraphResult(
+            results=[results[node.call_id] for node in graph.nodes],
+            stats=batch.stats(graph),
+        )
+
+    def _launch_ready(
+        self,
+        graph: ToolGraph,
+        order: List[str],
+        batch: ToolBatch,
+        results: Dict[str, ToolResult],
+        running: Dict[asyncio.Task, str],
+    ) -> None:
+        """启动依赖已满足的调用，跳过依赖失败的调用"""
+        in_flight = set(running.values())
+        for call_id in order:
+            if call_id in results or call_id in in_flight:
+                continue
+            deps = graph.dependencies(call_id)
+            failed = [d for d in deps if d in results and not results[d].success]
+            if failed:
+                results[call_id] = _failed_result(
+                    call_id, f"Skipped: dependency '{failed[0]}' failed"
+                )
+                batch.mark(call_id, _SKIPPED)
+            elif all(d in results for d in deps):
+                call = graph.resolve(call_id, results)
+                running[asyncio.create_task(batch.execute(call))] = call_id
+
+    @staticmethod
+    def _cancel_remaining(
+        graph: ToolGraph,
+        batch: ToolBatch,
+        results: Dict[str, ToolResult],
+        failed_call_id: str,
+    ) -> None:
+        """某个调用失败时取消其余调用 (仍在执行的任务由 run() 的 finally 取消)"""
+        for node in graph.nodes:
+            if node.call_id not in results:
+                results[node.call_id] = _failed_result(
+                    node.call_id, f"Cancelled: tool call '{failed_call_id}' failed"
+                )
+                batch.mark(node.call_id, _CANCELLED)
+
+
+__all__ = [
+    "ToolNode",
+    "ToolGraph",
+    "ToolGraphStats",
+    "ToolGraphResult",
+    "ToolBatch",
+    "ToolGraphExecutor",
+]
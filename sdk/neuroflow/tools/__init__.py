@@ -15,6 +15,11 @@ from .protocol import (
     UnifiedToolRegistry,
 )
 
+from .result_cache import (
+    canonical_arguments,
+    ToolResultCache,
+)
+
 from .executors import (
     LocalFunctionExecutor,
     MCPToolExecutor,
@@ -33,6 +38,10 @@ __all__ = [
     "ToolExecutor",
     "UnifiedToolRegistry",
     
+    # Result Cache
+    "canonical_arguments",
+    "ToolResultCache",
+    
     # Executors
     "LocalFunctionExecutor",
     "MCPToolExecutor",
@@ -130,6 +130,8 @@ class MCPToolExecutor(ToolExecutor):
                             source=ToolSource.MCP_SERVER,
                             parameters=params,
                             metadata={"server_url": url},
+                            # MCP 工具注解声明只读时，相同参数的调用结果可复用
+                            cacheable=bool((tool_data.get("annotations") or {}).get("readOnlyHint")),
                         )
                         
                         self._schemas[definition.name] = definition
@@ -11,11 +11,38 @@ NeuroFlow Python SDK - Unified Tool Protocol
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import asyncio
+import heapq
 import json
+import logging
+import math
 import uuid
 import time
 
+from ..memory.bm25 import BM25Index
+from .result_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：ASCII 约 4 字符 1 个 token，其它字符 (如中文) 约 1 字符 1 个 token"""
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """计算余弦相似度"""
+    if len(a) != len(b):
+        return 0.0
+    dot_product = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot_product / (norm_a * norm_b)
+
 
 class ToolSource(Enum):
     """工具来源类型"""
@@ -71,6 +98,8 @@ class ToolDefinition:
     execution_mode: ToolExecutionMode = ToolExecutionMode.ASYNC
     metadata: Dict[str, Any] = field(default_factory=dict)
     generated_by: Optional[str] = None
+    cacheable: bool = False  # 幂等、只读的工具，相同参数的调用结果可复用
+    cache_ttl_seconds: Optional[float] = None  # 结果缓存时间，None 表示直到被淘汰或工具重新注册
     
     def to_llm_schema(self) -> Dict[str, Any]:
         """转换为 LLM Function Calling 的 Schema (OpenAI 格式)"""
@@ -134,6 +163,7 @@ class ToolResult:
     error: Optional[str] = None
     execution_time_ms: int = 0
     tokens_used: Optional[Dict[str, int]] = None
+    cache_hit: bool = False  # 结果来自缓存或并发的相同调用，工具本身未执行
     
     def to_llm_message(self) -> Dict[str, Any]:
         """转换为 LLM 消息格式"""
@@ -176,15 +206,64 @@ class ToolExecutor(ABC):
 
 
 class UnifiedToolRegistry:
-    """统一工具注册表"""
+    """
+    统一工具注册表
+    
+    工具 Schema 和提示词片段在首次使用时生成并缓存，每轮对话直接复用:
+    - 单个工具的 Schema、描述行和嵌入向量按工具名缓存，注册/移除工具时只失效该工具
+    - 全部工具的 Schema 列表、工具描述和 JSON 文本按版本号缓存，工具集变化时重新拼接
+    
+    rank_tools() 按与用户消息的相关度排序工具，供编排器只把相关工具发送给 LLM。
+    
+    cacheable=True 的工具，execute() 按工具名 + 规范化参数复用结果 (见 ToolResultCache)，
+    重新注册或移除工具时清除其缓存结果。
     
-    def __init__(self):
+    原地修改已注册的 ToolDefinition 后需要重新 register_tool() 才会生效。
+    """
+    
+    def __init__(self, result_cache: Optional[ToolResultCache] = None):
+        """
+        Args:
+            result_cache: 可缓存工具的结果缓存，不设置时使用默认容量的缓存
+        """
         self._tools: Dict[str, ToolDefinition] = {}
         self._executors: Dict[ToolSource, ToolExecutor] = {}
+        self.result_cache = result_cache if result_cache is not None else ToolResultCache()
+    
+        # 工具集版本号，每次注册/移除工具时递增
+        self._version = 0
+        # 单个工具的缓存: 类型 -> {工具名: 值}
+        self._tool_cache: Dict[str, Dict[str, Any]] = {
+            "openai": {},
+            "anthropic": {},
+            "line": {},
+            "tokens": {},
+            "embedding": {},
+        }
+        self._embedding_fn: Optional[Callable] = None  # 生成 "embedding" 缓存所用的函数
+        # 整个工具集的渲染结果，版本变化时清空
+        self._rendered: Dict[str, Any] = {}
+        # 工具文本的 BM25 索引，没有嵌入函数时用于相关度排序
+        self._text_index = BM25Index()
+    
+    @property
+    def version(self) -> int:
+        """工具集版本号"""
+        return self._version
+    
+    def _invalidate(self, name: str) -> None:
+        """工具变化时失效相关缓存"""
+        for cache in self._tool_cache.values():
+            cache.pop(name, None)
+        self._rendered.clear()
+        self._version += 1
     
     def register_tool(self, definition: ToolDefinition) -> None:
         """注册工具"""
         self._tools[definition.name] = definition
+        self._invalidate(definition.name)
+        self.result_cache.invalidate(definition.name)
+        self._text_index.add(definition.name, self._tool_text(definition))
     
     def register_executor(self, source: ToolSource, executor: ToolExecutor) -> None:
         """注册执行器"""
@@ -198,9 +277,143 @@ class UnifiedToolRegistry:
         """列出所有工具"""
         return list(self._tools.values())
     
+    def _cached(self, kind: str, name: str) -> Any:
+        """获取单个工具的缓存值，未缓存时生成"""
+        cache = self._tool_cache[kind]
+        value = cache.get(name)
+        if value is None:
+            tool = self._tools[name]
+            if kind == "openai":
+                value = tool.to_llm_schema()
+            elif kind == "anthropic":
+                value = tool.to_anthropic_schema()
+            elif kind == "line":
+                params_desc = ", ".join([
+                    f"{p.name} ({p.parameter_type})"
+                    for p in tool.parameters
+                ])
+                value = f"- {tool.name}({params_desc}): {tool.description}"
+            else:
+                value = estimate_tokens(json.dumps(self._cached("openai", name), indent=2))
+            cache[name] = value
+        return value
+    
+    def _names(self, names: Optional[List[str]]) -> List[str]:
+        """None 表示全部工具，否则过滤掉未注册的工具名"""
+        if names is None:
+            return list(self._tools)
+        return [name for name in names if name in self._tools]
+    
+    def _schemas(self, fmt: str) -> List[Dict[str, Any]]:
+        """按格式获取缓存的全部 Schema 列表，只为未缓存的工具生成 Schema"""
+        rendered = self._rendered.get(fmt)
+        if rendered is None:
+            rendered = [self._cached(fmt, name) for name in self._tools]
+            self._rendered[fmt] = rendered
+        return rendered
+    
     def get_all_llm_schemas(self) -> List[Dict[str, Any]]:
-        """获取所有工具的 LLM Schema"""
-        return [t.to_llm_schema() for t in self._tools.values()]
+        """获取所有工具的 LLM Schema (OpenAI 格式)，返回的 Schema 字典为共享缓存，不应修改"""
+        return list(self._schemas("openai"))
+    
+    def get_all_anthropic_schemas(self) -> List[Dict[str, Any]]:
+        """获取所有工具的 Anthropic Tool Use Schema，返回的 Schema 字典为共享缓存，不应修改"""
+        return list(self._schemas("anthropic"))
+    
+    def get_llm_schemas(self, names: List[str]) -> List[Dict[str, Any]]:
+        """获取指定工具的 LLM Schema (OpenAI 格式)，忽略未注册的工具名"""
+        return [self._cached("openai", name) for name in self._names(names)]
+    
+    def get_tools_description(self, names: Optional[List[str]] = None) -> str:
+        """获取用于系统提示词的工具描述文本 (每个工具一行)，names 为 None 时包含全部工具"""
+        description = self._rendered.get("description") if names is None else None
+        if description is None:
+            lines = [self._cached("line", name) for name in self._names(names)]
+            description = "\n".join(lines) if lines else "暂无可用工具"
+            if names is None:
+                self._rendered["description"] = description
+        return description
+    
+    def get_tools_schema_json(self, names: Optional[List[str]] = None) -> str:
+        """获取用于系统提示词的工具 Schema JSON 文本，names 为 None 时包含全部工具"""
+        if names is not None:
+            return json.dumps(self.get_llm_schemas(names), indent=2)
+        schema_json = self._rendered.get("schema_json")
+        if schema_json is None:
+            schema_json = json.dumps(self._schemas("openai"), indent=2)
+            self._rendered["schema_json"] = schema_json
+        return schema_json
+    
+    def estimate_schema_tokens(self, names: Optional[List[str]] = None) -> int:
+        """估算工具 Schema 的 token 数，names 为 None 时包含全部工具"""
+        if names is not None:
+            return sum(self._cached("tokens", name) for name in self._names(names))
+        total = self._rendered.get("tokens")
+        if total is None:
+            total = self._rendered["tokens"] = sum(self._cached("tokens", name) for name in self._tools)
+        return total
+    
+    # ========== 相关工具检索 ==========
+    
+    @staticmethod
+    def _tool_text(tool: ToolDefinition) -> str:
+        """用于相关度检索的工具文本：名称、描述和参数"""
+        parts = [tool.name, tool.description]
+        for p in tool.parameters:
+            parts.append(p.name)
+            parts.append(p.description)
+        return " ".join(parts)
+    
+    async def get_tool_embeddings(self, embedding_fn: Callable) -> Dict[str, List[float]]:
+        """
+        获取所有工具的嵌入向量，只为新注册或变更的工具调用 embedding_fn
+    
+        Args:
+            embedding_fn: async (str) -> List[float]，更换函数时缓存全部重建
+        """
+        cache = self._tool_cache["embedding"]
+        if embedding_fn is not self._embedding_fn:
+            cache.clear()
+            self._embedding_fn = embedding_fn
+    
+        missing = [name for name in self._tools if name not in cache]
+        if missing:
+            vectors = await asyncio.gather(
+                *(embedding_fn(self._tool_text(self._tools[name])) for name in missing)
+            )
+            cache.update(zip(missing, vectors))
+        return {name: cache[name] for name in self._tools}
+    
+    async def rank_tools(
+        self,
+        query: str,
+        top_k: int,
+        embedding_fn: Optional[Callable] = None,
+    ) -> List[str]:
+        """
+        按与查询的相关度返回前 top_k 个工具名
+    
+        Args:
+            query: 查询文本 (通常是用户消息)
+            top_k: 返回数量
+            embedding_fn: 嵌入函数，不设置或调用失败时使用 BM25 关键词相关度
+        """
+        if top_k <= 0:
+            return []
+    
+        if embedding_fn is not None:
+            try:
+                embeddings = await self.get_tool_embeddings(embedding_fn)
+                query_embedding = await embedding_fn(query)
+                scores = {
+                    name: _cosine_similarity(query_embedding, vector)
+                    for name, vector in embeddings.items()
+                }
+                return heapq.nlargest(top_k, scores, key=scores.get)
+            except Exception as e:
+                logger.warning(f"Tool embedding failed, falling back to keyword ranking: {e}")
+    
+        return [name for name, _ in self._text_index.search(query, top_k)]
     
     async def execute(self, call: ToolCall) -> ToolResult:
         """执行工具调用"""
@@ -222,12 +435,21 @@ class UnifiedToolRegistry:
                 error=f"No executor for source '{tool.source}'",
             )
         
+        if tool.cacheable:
+            return await self.result_cache.execute(
+                call,
+                run=lambda: executor.execute(call),
+                ttl_seconds=tool.cache_ttl_seconds,
+            )
         return await executor.execute(call)
     
     async def remove_tool(self, name: str) -> bool:
         """移除工具"""
         if name in self._tools:
             del self._tools[name]
+            self._invalidate(name)
+            self.result_cache.invalidate(name)
+            self._text_index.remove(name)
             return True
         return False
     
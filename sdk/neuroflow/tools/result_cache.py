@@ -0,0 +1,189 @@
+"""
+NeuroFlow Python SDK - Tool Result Cache
+
+工具结果缓存 - 标记为 cacheable 的幂等工具 (查询、读取文件等) 按工具名 + 规范化参数缓存结果，
+并发的相同调用只执行一次 (single-flight)
+"""
+
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    """规范化参数：键排序、紧凑分隔符，参数顺序不同的相同调用得到相同的文本"""
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ToolResultCache:
+    """
+    有界的工具结果缓存
+
+    - 键为 (工具名, 规范化参数)，只缓存成功的结果
+    - 每个条目按写入时指定的 TTL 过期，超出 max_entries 时淘汰最久未使用的条目
+    - 相同键的并发调用共享同一次执行 (失败结果也共享，但不缓存)
+    - 执行期间工具的缓存被失效 (invalidate / 重新注册) 时，该次结果不再写入缓存
+    - 返回的 ToolResult 换成调用方自己的 call_id，并标记 cache_hit；
+      result 对象在各次命中间共享，不应修改
+
+    用法:
+        cache = ToolResultCache(max_entries=1024)
+        result = await cache.execute(call, ttl_seconds=60, run=lambda: executor.execute(call))
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: 最多缓存的结果数
+            clock: 计算过期时间的时钟
+        """
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        # 工具名 -> 失效次数，执行前后不一致说明结果已过时
+        self._generations: Dict[str, int] = {}
+        # 键 -> (结果, 过期时间 monotonic，None 表示不过期)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+        # 统计
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+        """缓存键"""
+        return tool_name, canonical_arguments(arguments)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        """读取未过期的结果"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: Tuple[str, str], result: Any, ttl_seconds: Optional[float] = None) -> None:
+        """写入结果，ttl_seconds 为 None 时不过期"""
+        expires_at = self._clock() + ttl_seconds if ttl_seconds is not None else None
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def execute(
+        self,
+        call: Any,
+        run: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """
+        命中缓存时直接返回，否则执行 run() (相同键的并发调用只执行一次)
+
+        Args:
+            call: ToolCall
+            run: 实际执行工具的无参协程函数，返回 ToolResult
+            ttl_seconds: 结果的缓存时间，None 表示不过期
+        """
+        key = self.make_key(call.tool_name, call.arguments)
+
+        cached = self.get(key)
+        if cached is not None:
+            self._stats["hits"] += 1
+            return self._annotate(cached, call)
+
+        # 已有相同调用在执行，等待其结果；执行者被取消时自己重新执行
+        while key in self._inflight:
+            future = self._inflight[key]
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue
+                raise
+            self._stats["shared"] += 1
+            return self._annotate(result, call)
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        # 没有等待者时也要取走异常，避免 "exception was never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        generation = self._generations.get(call.tool_name, 0)
+        try:
+            result = await run()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(result)
+        if getattr(result, "success", False) and generation == self._generations.get(call.tool_name, 0):
+            self.put(key, result, ttl_seconds)
+        return result
+
+    @staticmethod
+    def _annotate(result: Any, call: Any) -> Any:
+        """共享的结果换成本次调用的 call_id 并标记为缓存命中"""
+        return replace(result, call_id=call.call_id, cache_hit=True, execution_time_ms=0)
+
+    def invalidate(self, tool_name: Optional[str] = None) -> int:
+        """
+        失效某个工具 (None 表示全部) 的缓存结果
+
+        Returns:
+            删除的条目数
+        """
+        if tool_name is None:
+            for name in {key[0] for key in self._inflight}:
+                self._generations[name] = self._generations.get(name, 0) + 1
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+        self._generations[tool_name] = self._generations.get(tool_name, 0) + 1
+        keys = [key for key in self._entries if key[0] == tool_name]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self.invalidate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        stats["inflight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["shared"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["shared"]) / lookups if lookups else 0.0
+        return stats
+
+
+__all__ = [
+    "canonical_arguments",
+    "ToolResultCache",
+]
@@ -0,0 +1,300 @@
+"""
+NeuroFlow Python SDK - Agent Tests
+
+测试 AINativeAgent、对话历史管理和多会话
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from neuroflow.agent import (
+    AINativeAgent,
+    AINativeAgentConfig,
+    ConversationHistory,
+    HistoryConfig,
+    SessionStore,
+    count_message_tokens,
+)
+from neuroflow.agent import sessions as sessions_module
+from neuroflow.orchestrator import LLMClient, LLMConfig, LLMProvider, LLMResponse, Message
+
+
+def make_llm(content="摘要内容"):
+    """创建返回固定内容的模拟 LLM 客户端"""
+    llm = MagicMock(spec=LLMClient)
+    llm.chat = AsyncMock(return_value=LLMResponse(content=content, model="m"))
+    return llm
+
+
+class TestConversationHistory:
+    """测试对话历史压缩"""
+
+    def test_count_message_tokens(self):
+        """token 数包含内容、工具调用和固定开销"""
+        plain = count_message_tokens(Message.user("hello world"))
+        with_calls = count_message_tokens(Message.assistant(
+            "hello world",
+            tool_calls=[{"id": "1", "function": {"name": "echo", "arguments": "{}"}}],
+        ))
+
+        assert plain > count_message_tokens(Message.user(""))
+        assert with_calls > plain
+
+    @pytest.mark.asyncio
+    async def test_no_budget_keeps_everything(self):
+        """未设置预算时不压缩"""
+        history = ConversationHistory(llm=make_llm())
+        for i in range(50):
+            history.append(Message.user(f"message {i} " * 20))
+
+        assert await history.compact() == 0
+        assert len(history) == 50
+
+    @pytest.mark.asyncio
+    async def test_compaction_summarizes_old_turns(self):
+        """超出预算时旧消息合并为摘要，系统消息和最近的消息保留"""
+        llm = make_llm()
+        history = ConversationHistory(
+            HistoryConfig(max_tokens=200, keep_recent_messages=2),
+            llm=llm,
+        )
+        history.append(Message.system("你是助手"))
+        for i in range(10):
+            history.append(Message.user(f"问题 {i} " + "x" * 40))
+            history.append(Message.assistant(f"回答 {i} " + "y" * 40))
+
+        evicted = await history.compact()
+
+        assert evicted > 0
+        assert history.total_tokens <= 200
+        messages = history.messages()
+        assert messages[0].content.startswith("你是助手")
+        assert messages[0].content.endswith("摘要内容")
+        assert [m.role for m in messages].count("system") == 1
+        assert messages[-1].content.startswith("回答 9")
+
+        transcript = llm.chat.call_args.kwargs["messages"][-1].content
+        assert "问题 0" in transcript
+        assert "问题 9" not in transcript
+
+        # 再次压缩时已有摘要一并交给 LLM
+        for i in range(10, 20):
+            history.append(Message.user(f"问题 {i} " + "x" * 40))
+        await history.compact()
+        assert "[已有摘要] 摘要内容" in llm.chat.call_args.kwargs["messages"][-1].content
+        assert history.get_stats()["compactions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_summarization_failure_drops_old_turns(self):
+        """摘要失败时直接丢弃旧消息"""
+        llm = MagicMock(spec=LLMClient)
+        llm.chat = AsyncMock(side_effect=RuntimeError("rate limited"))
+        history = ConversationHistory(HistoryConfig(max_tokens=100), llm=llm)
+        for i in range(20):
+            history.append(Message.user(f"message {i} " * 5))
+
+        await history.compact()
+
+        assert history.summary is None
+        assert history.total_tokens <= 100
+
+    @pytest.mark.asyncio
+    async def test_tool_messages_pinned_with_their_call(self):
+        """工具结果和发起调用的助手消息默认固定"""
+        history = ConversationHistory(HistoryConfig(max_tokens=60, keep_recent_messages=1))
+        history.append(Message.user("查天气 " * 10))
+        history.append(Message.assistant("", tool_calls=[{"id": "c1"}]))
+        history.append(Message.tool("晴", tool_call_id="c1"))
+        for i in range(5):
+            history.append(Message.user(f"闲聊 {i} " * 10))
+
+        await history.compact()
+
+        roles = [m.role for m in history.messages()]
+        assert roles[:2] == ["assistant", "tool"]
+        assert roles.count("user") == 1
+
+    @pytest.mark.asyncio
+    async def test_window_never_starts_with_tool_result(self):
+        """不固定工具消息时，窗口从用户消息开始，不以工具结果或助手消息开头"""
+        history = ConversationHistory(HistoryConfig(
+            max_tokens=50, keep_recent_messages=2, pinned_roles=("system",),
+        ))
+        history.append(Message.user("x " * 100))
+        history.append(Message.assistant("", tool_calls=[{"id": "c1"}]))
+        history.append(Message.tool("晴" * 15, tool_call_id="c1"))
+        history.append(Message.assistant("今天晴"))
+        history.append(Message.user("谢谢"))
+
+        await history.compact()
+
+        assert [m.role for m in history.messages()] == ["user"]
+
+
+class TestAgentHistory:
+    """测试 Agent 的对话历史预算"""
+
+    @pytest.mark.asyncio
+    async def test_handle_replays_bounded_history(self):
+        """handle() 回放的历史不超过预算"""
+        agent = AINativeAgent(AINativeAgentConfig(
+            name="bounded",
+            history_config=HistoryConfig(max_tokens=120, keep_recent_messages=2),
+        ))
+        llm = make_llm("好的")
+        agent.llm.chat = llm.chat
+        agent.orchestrator.llm.chat = llm.chat
+
+        for i in range(10):
+            result = await agent.handle(f"第 {i} 个问题 " + "z" * 40)
+            assert result["success"] is True
+
+        assert agent.get_history_stats()["compactions"] > 0
+        # 预算在每次调用 LLM 前生效，之后只追加了一条回复
+        assert agent._history.total_tokens <= 120 + count_message_tokens(Message.assistant("好的"))
+        assert any(
+            "以下是更早对话的摘要" in m["content"]
+            for m in agent.get_conversation_history()
+        )
+
+    @pytest.mark.asyncio
+    async def test_compacted_history_anthropic_request(self):
+        """压缩后发给 Anthropic 的请求：system 同时包含工具说明和摘要，消息从用户开始"""
+        agent = AINativeAgent(AINativeAgentConfig(
+            name="anthropic",
+            llm_config=LLMConfig(provider=LLMProvider.ANTHROPIC, model="claude-test"),
+            history_config=HistoryConfig(max_tokens=120, keep_recent_messages=2),
+        ))
+        requests = []
+
+        async def create(**params):
+            requests.append(params)
+            return SimpleNamespace(
+                content=[SimpleNamespace(type="text", text="好的")],
+                model="claude-test",
+                usage=SimpleNamespace(input_tokens=1, output_tokens=1),
+            )
+
+        client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        agent.llm._anthropic_client = lambda: client
+
+        for i in range(10):
+            result = await agent.handle(f"第 {i} 个问题 " + "z" * 40)
+            assert result["success"] is True
+
+        assert agent.get_history_stats()["compactions"] > 0
+        params = requests[-1]
+        assert params["system"].startswith(agent.orchestrator._get_default_system_prompt())
+        assert "以下是更早对话的摘要" in params["system"]
+        assert all(m["role"] != "system" for m in params["messages"])
+        assert params["messages"][0]["role"] == "user"
+        assert params["messages"][-1]["content"].startswith("第 9 个问题")
+
+
+def make_agent(**kwargs):
+    """创建 LLM 返回固定回复的 Agent"""
+    agent = AINativeAgent(AINativeAgentConfig(name="sessions", **kwargs))
+    llm = make_llm("好的")
+    agent.llm.chat = llm.chat
+    agent.orchestrator.llm.chat = llm.chat
+    return agent
+
+
+class TestAgentSessions:
+    """测试多会话隔离"""
+
+    @pytest.mark.asyncio
+    async def test_sessions_isolated(self):
+        """不同会话的历史和记忆互不影响，工具注册表和 LLM 客户端共享"""
+        agent = make_agent()
+
+        await agent.handle("我是张三", session_id="a")
+        await agent.handle("我是李四", session_id="b")
+        await agent.handle("我是谁", session_id="a")
+        agent.store_memory("name", "张三", session_id="a")
+
+        history_a = [m["content"] for m in agent.get_conversation_history("a")]
+        history_b = [m["content"] for m in agent.get_conversation_history("b")]
+        assert history_a == ["我是张三", "好的", "我是谁", "好的"]
+        assert history_b == ["我是李四", "好的"]
+        assert agent.get_conversation_history() == []
+
+        assert agent.retrieve_memory("name", session_id="a") == "张三"
+        assert agent.retrieve_memory("name", session_id="b") is None
+        assert agent.retrieve_memory("name") is None
+
+        assert sorted(agent.list_sessions()) == ["a", "b", "default"]
+        assert agent.end_session("a") is True
+        assert agent.get_conversation_history("a") == []
+        assert sorted(agent.list_sessions()) == ["b", "default"]
+
+    @pytest.mark.asyncio
+    async def test_default_session_id(self):
+        """session_id="default" 与不传 session_id 是同一个会话，且不会被淘汰或移除"""
+        agent = make_agent(max_sessions=1)
+
+        await agent.handle("我是张三")
+        await agent.handle("我是谁", session_id="default")
+        agent.store_memory("k", 1, session_id="a")
+        agent.store_memory("k", 2, session_id="b")
+
+        history = [m["content"] for m in agent.get_conversation_history("default")]
+        assert history == ["我是张三", "好的", "我是谁", "好的"]
+        assert agent.get_conversation_history() == agent.get_conversation_history("default")
+        assert sorted(agent.list_sessions()) == ["b", "default"]
+
+        assert agent.end_session("default") is True
+        assert agent.get_conversation_history() == []
+        assert "default" in agent.list_sessions()
+
+    @pytest.mark.asyncio
+    async def test_same_session_serialized(self):
+        """同一会话的并发请求串行执行，历史不会交错"""
+        agent = make_agent()
+        started = []
+
+        async def slow_chat(*args, **kwargs):
+            started.append(len(agent.get_conversation_history("s")))
+            await asyncio.sleep(0.01)
+            return LLMResponse(content="好的", model="m")
+
+        agent.orchestrator.llm.chat = slow_chat
+
+        await asyncio.gather(*(agent.handle(f"问题 {i}", session_id="s") for i in range(3)))
+
+        assert started == [1, 3, 5]
+        roles = [m["role"] for m in agent.get_conversation_history("s")]
+        assert roles == ["user", "assistant"] * 3
+
+    def test_lru_eviction(self):
+        """超出容量时淘汰最久未活跃的会话"""
+        agent = make_agent(max_sessions=2)
+
+        agent.store_memory("k", 1, session_id="a")
+        agent.store_memory("k", 2, session_id="b")
+        agent.retrieve_memory("k", session_id="a")  # a 变为最近活跃
+        agent.store_memory("k", 3, session_id="c")
+
+        assert sorted(agent.list_sessions()) == ["a", "c", "default"]
+        stats = agent.get_session_stats()
+        assert stats["live_sessions"] == 3
+        assert stats["evicted"] == 1
+        assert stats["sessions_with_memory"] == 2
+
+    def test_idle_expiry(self, monkeypatch):
+        """空闲超时的会话在下次访问时清理"""
+        now = [1000.0]
+        monkeypatch.setattr(sessions_module.time, "time", lambda: now[0])
+        store = SessionStore(idle_ttl_seconds=60)
+        factory = lambda sid: sessions_module.AgentSession(sid, ConversationHistory())
+
+        store.get_or_create("old", factory)
+        now[0] += 30
+        store.get_or_create("new", factory)
+        now[0] += 45
+
+        assert store.get("new") is not None
+        assert "old" not in store
+        assert store.get_stats()["expired"] == 1
@@ -0,0 +1,482 @@
+"""
+NeuroFlow Python SDK - Kernel Memory Client Tests
+
+在进程内的 grpc.aio 桩服务器上测试 KernelMemoryClient
+"""
+
+import asyncio
+import uuid
+
+import grpc
+import pytest
+
+from google.protobuf import json_format, struct_pb2
+
+from neuroflow.memory import (
+    KernelClientConfig,
+    KernelMemoryClient,
+    LazyMemoryEntry,
+    MemoryReadCache,
+    StoreBatchError,
+)
+from neuroflow.memory import kernel_client as kernel_client_module
+from neuroflow.proto import memory_pb2, memory_pb2_grpc
+
+
+class StubMemoryService(memory_pb2_grpc.MemoryServiceServicer):
+    """以字典保存记忆的桩服务"""
+
+    def __init__(self):
+        self.entries = {}
+        self.calls = []
+        self.delay = 0.0
+        self.batch_sizes = []
+        self.fail_keys = set()
+        self.pages_sent = 0
+
+    async def Store(self, request, context):
+        self.calls.append("Store")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        entry = memory_pb2.MemoryEntry()
+        entry.CopyFrom(request.entry)
+        entry.id = entry.id or str(uuid.uuid4())
+        self.entries[(entry.agent_id, entry.key)] = entry
+        return memory_pb2.StoreResponse(success=True, memory_id=entry.id)
+
+    async def StoreBatch(self, request, context):
+        self.calls.append("StoreBatch")
+        self.batch_sizes.append(len(request.entries))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        memory_ids, errors = [], []
+        for entry in request.entries:
+            if entry.key in self.fail_keys:
+                memory_ids.append("")
+                errors.append(f"rejected {entry.key}")
+                continue
+            stored = memory_pb2.MemoryEntry()
+            stored.CopyFrom(entry)
+            stored.id = stored.id or str(uuid.uuid4())
+            self.entries[(stored.agent_id, stored.key)] = stored
+            memory_ids.append(stored.id)
+            errors.append("")
+        return memory_pb2.StoreBatchResponse(
+            success=not any(errors), memory_ids=memory_ids, errors=errors,
+        )
+
+    async def Retrieve(self, request, context):
+        self.calls.append("Retrieve")
+        entry = self.entries.get((request.agent_id, request.key))
+        if entry is None:
+            return memory_pb2.RetrieveResponse(found=False)
+        return memory_pb2.RetrieveResponse(found=True, entry=entry)
+
+    async def Delete(self, request, context):
+        self.calls.append("Delete")
+        removed = self.entries.pop((request.agent_id, request.key), None)
+        return memory_pb2.DeleteResponse(success=removed is not None)
+
+    async def Search(self, request, context):
+        self.calls.append("Search")
+        query = request.query
+        entries = [
+            e for (agent_id, _), e in self.entries.items()
+            if agent_id == query.agent_id and set(query.tags) <= set(e.tags)
+        ]
+        entries = entries[:query.limit or None]
+        return memory_pb2.SearchResponse(entries=entries, total_count=len(entries))
+
+    async def SearchStream(self, request, context):
+        self.calls.append("SearchStream")
+        query = request.query
+        entries = [
+            e for (agent_id, _), e in self.entries.items()
+            if agent_id == query.agent_id and set(query.tags) <= set(e.tags)
+        ]
+        entries = entries[:query.limit or None]
+        start = int(request.cursor or 0)
+        size = request.page_size or 10
+        for offset in range(start, len(entries), size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            end = offset + size
+            self.pages_sent += 1
+            yield memory_pb2.SearchPage(
+                entries=entries[offset:end],
+                next_cursor=str(end) if end < len(entries) else "",
+            )
+
+
+class StubConversationService(memory_pb2_grpc.ConversationMemoryServiceServicer):
+    """以字典保存对话的桩服务"""
+
+    def __init__(self):
+        self.conversations = {}
+
+    async def SaveConversation(self, request, context):
+        turns = self.conversations.setdefault((request.agent_id, request.conversation_id), [])
+        turns.extend(request.turns)
+        return memory_pb2.SaveConversationResponse(success=True, turns_saved=len(request.turns))
+
+    async def GetConversationHistory(self, request, context):
+        turns = self.conversations.get((request.agent_id, request.conversation_id), [])
+        if request.limit:
+            turns = turns[-request.limit:]
+        return memory_pb2.GetConversationHistoryResponse(
+            turns=turns, conversation_id=request.conversation_id,
+        )
+
+    async def GetConversationHistoryStream(self, request, context):
+        turns = self.conversations.get((request.agent_id, request.conversation_id), [])
+        turns = turns[:request.limit or None]
+        start = int(request.cursor or 0)
+        size = request.page_size or 10
+        for offset in range(start, len(turns), size):
+            end = offset + size
+            yield memory_pb2.ConversationHistoryPage(
+                turns=turns[offset:end],
+                next_cursor=str(end) if end < len(turns) else "",
+            )
+
+
+@pytest.fixture
+async def server():
+    """启动进程内桩服务器，返回 (地址, 记忆服务, 对话服务)"""
+    memory_service = StubMemoryService()
+    conversation_service = StubConversationService()
+    grpc_server = grpc.aio.server()
+    memory_pb2_grpc.add_MemoryServiceServicer_to_server(memory_service, grpc_server)
+    memory_pb2_grpc.add_ConversationMemoryServiceServicer_to_server(conversation_service, grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    await grpc_server.start()
+    yield f"127.0.0.1:{port}", memory_service, conversation_service
+    await grpc_server.stop(None)
+
+
+class TestKernelMemoryClient:
+    """测试 grpc.aio 客户端"""
+
+    @pytest.mark.asyncio
+    async def test_store_retrieve_delete(self, server):
+        """存储、读取、删除记忆，值按 protobuf Value 往返"""
+        endpoint, service, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            memory_id = await client.store(
+                "agent-1", "pref", {"theme": "dark", "langs": ["zh", "en"]},
+                tags=["preference"], importance=0.9,
+            )
+            memory = await client.retrieve("agent-1", "pref")
+
+            assert memory["id"] == memory_id
+            assert memory["value"] == {"theme": "dark", "langs": ["zh", "en"]}
+            assert memory["tags"] == ["preference"]
+            assert await client.retrieve("agent-1", "missing") is None
+
+            assert await client.delete("agent-1", "pref") is True
+            assert await client.retrieve("agent-1", "pref") is None
+
+    @pytest.mark.asyncio
+    async def test_search_and_conversation_history(self, server):
+        """搜索和对话历史"""
+        endpoint, _, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            for i in range(3):
+                await client.store("agent-1", f"k{i}", {"i": i}, tags=["t"] if i else [])
+            results = await client.search("agent-1", tags=["t"])
+            assert sorted(r["key"] for r in results) == ["k1", "k2"]
+
+            saved = await client.save_conversation("agent-1", "c1", [
+                {"role": "user", "content": "你好"},
+                {"role": "assistant", "content": "你好！", "metadata": {"model": "m"}},
+            ])
+            history = await client.get_conversation_history("agent-1", "c1")
+            assert saved == 2
+            assert [t["content"] for t in history] == ["你好", "你好！"]
+            assert history[0]["timestamp"] is None
+            assert history[1]["metadata"] == {"model": "m"}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_across_channels(self, server):
+        """多个通道轮询分配并发调用"""
+        endpoint, service, _ = server
+        service.delay = 0.01
+        client = KernelMemoryClient(endpoint, KernelClientConfig(num_channels=3))
+        try:
+            await asyncio.gather(*(client.store("a", f"k{i}", i) for i in range(30)))
+            assert len(service.entries) == 30
+            assert len(client._channels) == 3
+        finally:
+            await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_deadline(self, server):
+        """超过截止时间时抛出 DEADLINE_EXCEEDED"""
+        endpoint, service, _ = server
+        service.delay = 0.5
+        async with KernelMemoryClient(endpoint, KernelClientConfig(timeout=5.0)) as client:
+            with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+                await client.store("a", "k", 1, timeout=0.05)
+            assert exc_info.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+
+
+class TestStoreBatching:
+    """测试批量写入与写缓冲"""
+
+    @pytest.mark.asyncio
+    async def test_store_many_chunks_requests(self, server):
+        """store_many 按 max_batch_size 分批，返回的 ID 与输入按位置对应"""
+        endpoint, service, _ = server
+        async with KernelMemoryClient(endpoint, KernelClientConfig(max_batch_size=4)) as client:
+            ids = await client.store_many("a", [{"key": f"k{i}", "value": {"i": i}} for i in range(10)])
+
+            assert service.batch_sizes == [4, 4, 2]
+            assert [service.entries[("a", f"k{i}")].id for i in range(10)] == ids
+            assert (await client.retrieve("a", "k7"))["value"] == {"i": 7}
+
+    @pytest.mark.asyncio
+    async def test_store_many_partial_failure(self, server):
+        """部分失败时按位置映射错误，成功的条目仍写入"""
+        endpoint, service, _ = server
+        service.fail_keys = {"k1"}
+        async with KernelMemoryClient(endpoint) as client:
+            with pytest.raises(StoreBatchError) as exc_info:
+                await client.store_many("a", [{"key": f"k{i}", "value": i} for i in range(3)])
+
+        error = exc_info.value
+        assert error.errors == {1: "rejected k1"}
+        assert error.memory_ids[1] is None
+        assert error.memory_ids[0] == service.entries[("a", "k0")].id
+        assert ("a", "k2") in service.entries
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stores_coalesced(self, server):
+        """开启写缓冲后，并发的 store 合并为少量 StoreBatch 请求，失败只影响对应的调用方"""
+        endpoint, service, _ = server
+        service.fail_keys = {"k3"}
+        config = KernelClientConfig(batch_writes=True, max_batch_size=8, max_batch_delay_ms=20)
+        async with KernelMemoryClient(endpoint, config) as client:
+            results = await asyncio.gather(
+                *(client.store("a", f"k{i}", i) for i in range(20)), return_exceptions=True,
+            )
+
+            assert "Store" not in service.calls
+            assert service.batch_sizes == [8, 8, 4]
+            assert "rejected k3" in str(results[3])
+            assert all(results[i] == service.entries[("a", f"k{i}")].id for i in range(20) if i != 3)
+            assert client.get_stats()["failed_writes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_buffered_store_honors_timeout(self, server):
+        """写缓冲中的 store 仍遵守调用方的 timeout，批次使用最早的截止时刻"""
+        endpoint, service, _ = server
+        service.delay = 0.5
+        config = KernelClientConfig(timeout=5.0, batch_writes=True, max_batch_delay_ms=10)
+        async with KernelMemoryClient(endpoint, config) as client:
+            results = await asyncio.gather(
+                client.store("a", "slow", 1),
+                client.store("a", "k", 1, timeout=0.05),
+                return_exceptions=True,
+            )
+
+        assert service.batch_sizes == [2]
+        for result in results:
+            assert isinstance(result, grpc.aio.AioRpcError)
+            assert result.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_writes(self, server):
+        """aclose 前缓冲中的写入会被发送"""
+        endpoint, service, _ = server
+        config = KernelClientConfig(batch_writes=True, max_batch_delay_ms=10_000)
+        client = KernelMemoryClient(endpoint, config)
+        tasks = [asyncio.create_task(client.store("a", f"k{i}", i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert client.get_stats()["pending_writes"] == 3
+
+        await client.aclose()
+
+        assert service.batch_sizes == [3]
+        assert all(task.done() and not task.exception() for task in tasks)
+
+
+class TestStreaming:
+    """测试流式搜索与对话历史"""
+
+    @pytest.mark.asyncio
+    async def test_iter_search_pages_and_resume(self, server):
+        """按页流式返回，可从 next_cursor 继续"""
+        endpoint, _, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            await client.store_many("a", [{"key": f"k{i:02d}", "value": i} for i in range(25)])
+
+            keys = [m["key"] async for m in client.iter_search("a", page_size=10)]
+            assert keys == [f"k{i:02d}" for i in range(25)]
+
+            pages = client.iter_search_pages("a", page_size=10)
+            first, cursor = await pages.__anext__()
+            await pages.aclose()
+            assert len(first) == 10 and cursor == "10"
+
+            rest = [m["key"] async for m in client.iter_search("a", page_size=10, cursor=cursor, limit=15)]
+            assert rest == [f"k{i:02d}" for i in range(10, 15)]
+
+    @pytest.mark.asyncio
+    async def test_early_exit_cancels_stream(self, server):
+        """调用方提前退出时服务端停止发送"""
+        endpoint, service, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            await client.store_many("a", [{"key": f"k{i}", "value": i} for i in range(100)])
+            service.delay = 0.02
+
+            async for memory in client.iter_search("a", page_size=5):
+                break
+            await asyncio.sleep(0.1)
+            assert service.pages_sent < 20
+
+    @pytest.mark.asyncio
+    async def test_iter_conversation_history(self, server):
+        """流式对话历史从最早的轮次开始"""
+        endpoint, _, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            await client.save_conversation("a", "c1", [
+                {"role": "user", "content": f"m{i}"} for i in range(7)
+            ])
+            contents = [
+                t["content"] async for t in client.iter_conversation_history("a", "c1", page_size=3)
+            ]
+            assert contents == [f"m{i}" for i in range(7)]
+
+            limited = [
+                t["content"] async for t in client.iter_conversation_history("a", "c1", limit=4, page_size=3)
+            ]
+            assert limited == ["m0", "m1", "m2", "m3"]
+
+
+class TestValueDecoding:
+    """测试投影、惰性解码与二进制值编码"""
+
+    def test_value_conversion_matches_json_format(self):
+        """手写的 Value 转换与 json_format 结果一致"""
+        for value in [{"a": 7, "b": [1, 2.5, None, True, "x"], "c": {}, "d": []}, 3, "s", None, []]:
+            message = kernel_client_module._to_value(value)
+            assert message == json_format.ParseDict(value, struct_pb2.Value())
+            assert kernel_client_module._from_value(message) == json_format.MessageToDict(message)
+
+    @pytest.mark.asyncio
+    async def test_projection_and_lazy_entries(self, server):
+        """投影只返回指定字段；惰性条目在访问 value 时才解码"""
+        endpoint, _, _ = server
+        async with KernelMemoryClient(endpoint) as client:
+            await client.store_many("a", [
+                {"key": f"k{i}", "value": {"i": i}, "tags": ["t"]} for i in range(3)
+            ])
+
+            projected = await client.search("a", fields=["key", "tags"])
+            assert [sorted(m) for m in projected] == [["key", "tags"]] * 3
+
+            lazy = await client.search("a", lazy=True)
+            assert all(isinstance(m, LazyMemoryEntry) and not m.decoded for m in lazy)
+            assert lazy[0]["key"] == "k0" and not lazy[0].decoded
+            assert lazy[0]["value"] == {"i": 0} and lazy[0].decoded
+            assert lazy[1].to_dict() == (await client.search("a"))[1]
+
+            with pytest.raises(ValueError):
+                await client.search("a", fields=["nope"])
+
+    @pytest.mark.asyncio
+    async def test_binary_value_encoding(self, server):
+        """值以 encoded_value 传输并在读取时解码"""
+        endpoint, service, _ = server
+        config = KernelClientConfig(value_encoding="protobuf")
+        async with KernelMemoryClient(endpoint, config) as client:
+            await client.store("a", "k", {"theme": "dark", "n": [1, 2]})
+            stored = service.entries[("a", "k")]
+            assert stored.value_encoding == memory_pb2.ValueEncoding.VALUE_ENCODING_PROTOBUF
+            # 服务端尚未确认支持编码，value 仍然填写
+            assert stored.HasField("value")
+
+            assert (await client.retrieve("a", "k"))["value"] == {"theme": "dark", "n": [1, 2]}
+            assert (await client.search("a", lazy=True))[0]["value"]["theme"] == "dark"
+
+            # 读取结果以 protobuf 编码返回后，写入只发送 encoded_value
+            await client.store("a", "k2", {"theme": "light"})
+            stored = service.entries[("a", "k2")]
+            assert stored.encoded_value and not stored.HasField("value")
+            assert (await client.retrieve("a", "k2"))["value"] == {"theme": "light"}
+
+            if kernel_client_module.msgpack is None:
+                with pytest.raises(ImportError):
+                    await client.store("a", "m", {"x": 1}, value_encoding="msgpack")
+            else:
+                await client.store("a", "m", {"x": 1}, value_encoding="msgpack")
+                assert (await client.retrieve("a", "m"))["value"] == {"x": 1}
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemoryReadCache:
+    """测试读缓存"""
+
+    def test_ttl_lru_and_namespaces(self):
+        """条目按 TTL 过期、按 LRU 淘汰，可按 agent_id 整体失效"""
+        clock = FakeClock()
+        cache = MemoryReadCache(max_entries=3, ttl_seconds=10, negative_ttl_seconds=1, clock=clock)
+        cache.put("a", "k1", {"value": 1})
+        cache.put("a", "k2", {"value": 2})
+        cache.fill("a", "gone", None, cache.generation)
+        assert cache.lookup("a", "gone") == (True, None)
+
+        clock.now = 2
+        assert cache.lookup("a", "gone") == (False, None)
+        assert cache.lookup("a", "k1") == (True, {"value": 1})
+        cache.put("b", "k1", {"value": 3})
+        cache.put("b", "k2", {"value": 4})
+        assert cache.lookup("a", "k2") == (False, None)
+        assert cache.get_stats()["evictions"] == 1
+
+        assert cache.invalidate("b") == 2
+        assert len(cache) == 1
+        clock.now = 13
+        assert cache.lookup("a", "k1") == (False, None)
+
+    def test_stale_fill_discarded(self):
+        """读取期间发生写入时，读到的旧值不回填"""
+        cache = MemoryReadCache()
+        generation = cache.generation
+        cache.put("a", "k", {"value": "new"})
+        cache.fill("a", "k", {"value": "old"}, generation)
+        assert cache.lookup("a", "k") == (True, {"value": "new"})
+
+    @pytest.mark.asyncio
+    async def test_client_read_through(self, server):
+        """命中缓存时不访问 Kernel，store / delete 写穿缓存，不存在的键也被缓存"""
+        endpoint, service, _ = server
+        cache = MemoryReadCache(ttl_seconds=60)
+        async with KernelMemoryClient(endpoint, read_cache=cache) as client:
+            await client.store("a", "pref", {"theme": "dark"})
+            first = await client.retrieve("a", "pref")
+            first["value"]["theme"] = "mutated"
+            second = await client.retrieve("a", "pref")
+            assert second["value"] == {"theme": "dark"}
+            assert "Retrieve" not in service.calls
+
+            assert await client.retrieve("a", "missing") is None
+            assert await client.retrieve("a", "missing") is None
+            assert service.calls.count("Retrieve") == 1
+
+            await client.delete("a", "pref")
+            assert await client.retrieve("a", "pref") is None
+            assert service.calls.count("Retrieve") == 1
+
+            stats = client.get_stats()["read_cache"]
+            assert stats["hits"] == 2
+            assert stats["negative_hits"] == 2
@@ -0,0 +1,820 @@
+"""
+NeuroFlow Python SDK - Memory Tests
+
+测试向量记忆存储
+"""
+
+from array import array
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+import pytest
+
+from neuroflow.memory import (
+    MemoryEntry,
+    MemoryType,
+    VectorMemoryStore,
+    FlatVectorIndex,
+    IVFFlatIndex,
+    EmbeddingBatcher,
+    EmbeddingCache,
+    PersistentMemoryBackend,
+)
+from neuroflow.memory.bm25 import BM25Index, tokenize
+from neuroflow.memory.eviction import EvictionQueue
+from neuroflow.memory.expiry import TimingWheel
+from neuroflow.context import MemoryManager
+
+
+VOCAB = ["apple", "banana", "cherry", "dog", "cat", "bird"]
+
+
+async def fake_embedding(text: str):
+    """基于词频的简单嵌入"""
+    words = text.lower().split()
+    return [float(words.count(w)) for w in VOCAB]
+
+
+class TestFlatVectorIndex:
+    """测试扁平向量索引"""
+
+    def test_search_returns_top_k_sorted(self):
+        """检索结果按相似度降序"""
+        index = FlatVectorIndex()
+        index.add("a", [1.0, 0.0, 0.0])
+        index.add("b", [0.7, 0.7, 0.0])
+        index.add("c", [0.0, 0.0, 1.0])
+
+        hits = index.search([1.0, 0.0, 0.0], top_k=2)
+
+        assert [h[0] for h in hits] == ["a", "b"]
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-6)
+
+    def test_remove_keeps_mapping_consistent(self):
+        """删除后行号映射保持一致"""
+        index = FlatVectorIndex(initial_capacity=1)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("c", [1.0, 1.0])
+
+        assert index.remove("a")
+        assert not index.remove("a")
+        assert len(index) == 2
+
+        hits = index.search([1.0, 1.0], top_k=1)
+        assert hits[0][0] == "c"
+
+        hits = index.search([0.0, 1.0], top_k=1)
+        assert hits[0][0] == "b"
+
+    def test_dimension_mismatch_rejected(self):
+        """维度不匹配的向量被拒绝"""
+        index = FlatVectorIndex()
+        assert index.add("a", [1.0, 0.0])
+        assert not index.add("b", [1.0, 0.0, 0.0])
+        assert "b" not in index
+
+
+class TestIVFFlatIndex:
+    """测试 IVF-Flat 近似索引"""
+
+    def _random_vectors(self, count, dim=8, seed=1):
+        rng = random.Random(seed)
+        return {
+            f"v{i}": [rng.gauss(0, 1) for _ in range(dim)]
+            for i in range(count)
+        }
+
+    def test_full_probe_matches_flat(self):
+        """nprobe 覆盖所有列表时与精确检索一致"""
+        vectors = self._random_vectors(200)
+        flat = FlatVectorIndex()
+        ivf = IVFFlatIndex(nlist=8, nprobe=8, train_threshold=64)
+        for entry_id, vector in vectors.items():
+            flat.add(entry_id, vector)
+            ivf.add(entry_id, vector)
+
+        assert ivf.is_trained
+        query = vectors["v3"]
+        assert [h[0] for h in ivf.search(query, top_k=10)] == [
+            h[0] for h in flat.search(query, top_k=10)
+        ]
+
+    def test_remove_and_reassign(self):
+        """删除与更新保持索引同步"""
+        vectors = self._random_vectors(100)
+        ivf = IVFFlatIndex(nlist=4, nprobe=4, train_threshold=50)
+        for entry_id, vector in vectors.items():
+            ivf.add(entry_id, vector)
+
+        assert ivf.remove("v0")
+        assert "v0" not in ivf
+        assert len(ivf) == 99
+        assert all(h[0] != "v0" for h in ivf.search(vectors["v0"], top_k=99))
+
+        ivf.add("v1", vectors["v2"])
+        assert len(ivf) == 99
+        assert ivf.search(vectors["v2"], top_k=2)[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_store_with_ivf_index(self):
+        """VectorMemoryStore 使用 IVF 索引"""
+        store = VectorMemoryStore(
+            embedding_fn=fake_embedding,
+            vector_index=IVFFlatIndex(nlist=2, nprobe=2, train_threshold=4),
+        )
+        for i, text in enumerate(["apple", "dog cat", "banana apple", "bird", "cherry"]):
+            await store.store(key=f"k{i}", value=text)
+
+        results = await store.semantic_search("apple", top_k=2)
+        assert results[0][0].key == "k0"
+
+
+class TestVectorMemoryStore:
+    """测试向量记忆存储"""
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_matches_python_path(self):
+        """矩阵检索与纯 Python 检索结果一致"""
+        indexed = VectorMemoryStore(embedding_fn=fake_embedding)
+        plain = VectorMemoryStore(embedding_fn=fake_embedding, use_vector_index=False)
+
+        texts = {
+            "fruit": "apple banana cherry",
+            "pets": "dog cat",
+            "mixed": "apple dog",
+            "bird": "bird bird cat",
+        }
+        for store in (indexed, plain):
+            for key, text in texts.items():
+                await store.store(key=key, value=text)
+
+        expected = await plain.semantic_search("apple cherry", top_k=3, min_similarity=0.1)
+        actual = await indexed.semantic_search("apple cherry", top_k=3, min_similarity=0.1)
+
+        assert [e.key for e, _ in actual] == [e.key for e, _ in expected]
+        for (_, a), (_, b) in zip(actual, expected):
+            assert a == pytest.approx(b, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_deleted_memory_not_returned(self):
+        """删除的记忆不再被检索到"""
+        store = VectorMemoryStore(embedding_fn=fake_embedding)
+        await store.store(key="pets", value="dog cat")
+        await store.store(key="fruit", value="apple banana")
+
+        await store.delete("pets")
+        results = await store.semantic_search("dog", top_k=5, min_similarity=0.0)
+
+        assert [e.key for e, _ in results] == ["fruit"]
+
+    @pytest.mark.asyncio
+    async def test_eviction_syncs_vector_index(self):
+        """容量淘汰同步更新向量索引"""
+        store = VectorMemoryStore(max_memories=10, embedding_fn=fake_embedding)
+        for i in range(15):
+            await store.store(key=f"k{i}", value="apple", memory_type=MemoryType.WORKING)
+
+        assert len(store._vector_index) == len(store._memories)
+        results = await store.semantic_search("apple", top_k=100)
+        assert all(e.id in store._memories for e, _ in results)
+
+
+class TestMemoryFilter:
+    """测试语义检索的预过滤"""
+
+    async def _populate(self, store):
+        for i in range(20):
+            await store.store(
+                key=f"k{i}",
+                value="apple" if i < 18 else "apple dog",
+                tags=["even"] if i % 2 == 0 else ["odd"],
+                memory_type=MemoryType.LONG_TERM if i >= 18 else MemoryType.SHORT_TERM,
+                importance=i / 20,
+                metadata={"source": "chat" if i % 3 == 0 else "doc"},
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_vector_index", [True, False])
+    async def test_filters_applied_before_top_k(self, use_vector_index):
+        """过滤发生在 top_k 截断之前，结果不会丢失"""
+        store = VectorMemoryStore(embedding_fn=fake_embedding, use_vector_index=use_vector_index)
+        await self._populate(store)
+
+        results = await store.semantic_search(
+            "apple", top_k=2, min_similarity=0.0, memory_type=MemoryType.LONG_TERM
+        )
+        assert sorted(e.key for e, _ in results) == ["k18", "k19"]
+
+        results = await store.semantic_search(
+            "apple",
+            top_k=20,
+            min_similarity=0.0,
+            tags=["even"],
+            min_importance=0.3,
+            metadata={"source": "chat"},
+        )
+        assert sorted(e.key for e, _ in results) == ["k12", "k18", "k6"]
+
+        assert await store.semantic_search("apple", tags=["missing"]) == []
+
+    @pytest.mark.asyncio
+    async def test_filters_with_ivf_and_keyword_search(self):
+        """IVF 索引与关键词检索同样支持过滤"""
+        ivf = VectorMemoryStore(
+            embedding_fn=fake_embedding,
+            vector_index=IVFFlatIndex(nlist=4, nprobe=1, train_threshold=8),
+        )
+        keyword = VectorMemoryStore()
+        for store in (ivf, keyword):
+            await self._populate(store)
+            results = await store.semantic_search(
+                "dog", top_k=5, min_similarity=0.0, tags=["odd"], created_after=0
+            )
+            assert "k19" in [e.key for e, _ in results]
+            assert all("odd" in e.tags for e, _ in results)
+
+    @pytest.mark.asyncio
+    async def test_filters_with_persistent_backend(self, tmp_path):
+        """持久化后端在 SQLite 中求候选行"""
+        store = VectorMemoryStore(
+            max_memories=5,
+            embedding_fn=fake_embedding,
+            backend=PersistentMemoryBackend(str(tmp_path)),
+        )
+        await self._populate(store)
+
+        results = await store.semantic_search(
+            "apple",
+            top_k=20,
+            min_similarity=0.0,
+            tags=["even"],
+            max_importance=0.5,
+            metadata={"source": "doc"},
+        )
+        assert sorted(e.key for e, _ in results) == ["k10", "k2", "k4", "k8"]
+
+
+class TestBM25:
+    """测试 BM25 关键词检索"""
+
+    def test_tokenize_cjk(self):
+        """中文切分为单字和双字，英文按单词切分"""
+        assert tokenize("喜欢 Python") == ["喜", "欢", "喜欢", "python"]
+
+    def test_index_incremental_updates(self):
+        """增删文档后倒排索引保持一致"""
+        index = BM25Index()
+        index.add("a", "用户喜欢简洁的回答")
+        index.add("b", "今天天气很好")
+        index.add("c", "回答要详细")
+
+        assert [h[0] for h in index.search("简洁回答")] == ["a", "c"]
+
+        index.remove("a")
+        index.add("c", "天气")
+        assert index.search("回答") == []
+        assert len(index) == 2
+
+    @pytest.mark.asyncio
+    async def test_keyword_search_tracks_store(self):
+        """关键词检索随存储、更新、删除同步"""
+        store = VectorMemoryStore()
+        await store.store(key="user_preference", value="喜欢简洁的回答")
+        await store.store(key="weather", value="今天天气很好", tags=["天气"])
+
+        results = await store.semantic_search("简洁")
+        assert [e.key for e, _ in results] == ["user_preference"]
+
+        await store.store(key="user_preference", value="喜欢详细的回答")
+        assert await store.semantic_search("简洁") == []
+
+        await store.delete("weather")
+        assert await store.semantic_search("天气") == []
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_fuses_rankings(self):
+        """混合检索融合向量与关键词结果"""
+        store = VectorMemoryStore(embedding_fn=fake_embedding)
+        await store.store(key="fruit", value="apple banana")
+        await store.store(key="zoo", value="dog cat bird")
+        await store.store(key="note", value="apple pie recipe")
+
+        vector = await store.semantic_search("apple recipe", top_k=3, min_similarity=0.0)
+        hybrid = await store.semantic_search("apple recipe", top_k=3, min_similarity=0.0, hybrid=True)
+
+        assert [e.key for e, _ in hybrid][0] == "note"
+        assert {e.key for e, _ in hybrid} <= {e.key for e, _ in vector}
+        assert hybrid[0][1] <= 2.0 / (store.rrf_k + 1)
+
+
+class TestEmbeddingBatching:
+    """测试嵌入批处理"""
+
+    @pytest.fixture
+    def batch_calls(self):
+        return []
+
+    @pytest.fixture
+    def batch_embedding_fn(self, batch_calls):
+        async def embed_batch(texts):
+            batch_calls.append(list(texts))
+            return [await fake_embedding(t) for t in texts]
+        return embed_batch
+
+    @pytest.mark.asyncio
+    async def test_concurrent_embeds_coalesced(self, batch_embedding_fn, batch_calls):
+        """并发请求被合并为一次批量调用"""
+        batcher = EmbeddingBatcher(batch_embedding_fn, max_batch_size=10, max_wait_ms=20)
+
+        results = await asyncio.gather(*(batcher.embed(t) for t in ["apple", "dog", "apple"]))
+
+        assert batch_calls == [["apple", "dog"]]
+        assert results[0] == results[2] == await fake_embedding("apple")
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_triggers_flush(self, batch_embedding_fn, batch_calls):
+        """达到批次上限时立即发送"""
+        batcher = EmbeddingBatcher(batch_embedding_fn, max_batch_size=2, max_wait_ms=10000)
+
+        await asyncio.wait_for(
+            asyncio.gather(batcher.embed("apple"), batcher.embed("dog")),
+            timeout=1,
+        )
+
+        assert batch_calls == [["apple", "dog"]]
+
+    @pytest.mark.asyncio
+    async def test_batch_error_propagates(self):
+        """批量调用失败时所有等待方收到异常"""
+        async def failing(texts):
+            raise RuntimeError("embedding service down")
+
+        batcher = EmbeddingBatcher(failing, max_wait_ms=1)
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_store_many_single_batch(self, batch_embedding_fn, batch_calls):
+        """store_many 一次批量生成所有嵌入"""
+        store = VectorMemoryStore(batch_embedding_fn=batch_embedding_fn)
+
+        entries = await store.store_many([
+            {"key": "fruit", "value": "apple banana"},
+            {"key": "pets", "value": "dog cat", "tags": ["animal"]},
+            {"key": "fruit", "value": "cherry"},
+        ])
+
+        assert len(batch_calls) == 1
+        assert entries[0] is entries[2]
+        assert entries[0].value == "cherry"
+        assert (await store.search_by_tags(["animal"]))[0].key == "pets"
+
+        results = await store.semantic_search("dog", top_k=1)
+        assert results[0][0].key == "pets"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_store_uses_batcher(self, batch_embedding_fn, batch_calls):
+        """并发 store 调用被合并"""
+        store = VectorMemoryStore(batch_embedding_fn=batch_embedding_fn)
+
+        await asyncio.gather(*(
+            store.store(key=f"k{i}", value=text)
+            for i, text in enumerate(["apple", "dog", "cat", "bird"])
+        ))
+
+        assert len(batch_calls) == 1
+        stats = await store.get_stats()
+        assert stats["embedding_batcher"]["batches"] == 1
+
+
+class TestEmbeddingCache:
+    """测试嵌入缓存"""
+
+    def test_lru_eviction(self):
+        """超过容量时淘汰最久未使用的条目"""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == array("f", [1.0])
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_persistence(self, tmp_path):
+        """缓存可保存并重新加载"""
+        path = str(tmp_path / "cache.json")
+        cache = EmbeddingCache(persist_path=path)
+        cache.put("hello", [0.1, 0.2])
+        cache.save()
+
+        reloaded = EmbeddingCache(persist_path=path)
+        assert reloaded.get("hello") == array("f", [0.1, 0.2])
+
+    @pytest.mark.asyncio
+    async def test_shared_between_store_and_search(self):
+        """store 与 semantic_search 共享缓存"""
+        calls = []
+
+        async def embed(text):
+            calls.append(text)
+            return await fake_embedding(text)
+
+        store = VectorMemoryStore(embedding_fn=embed, embedding_cache=EmbeddingCache())
+        await store.store(key="a", value="apple")
+        await store.store(key="b", value="apple")
+        await store.semantic_search("apple")
+        await store.store_many([{"key": "c", "value": "apple"}, {"key": "d", "value": "dog"}])
+
+        assert calls == ["apple", "dog"]
+        stats = (await store.get_stats())["embedding_cache"]
+        assert stats["hits"] == 3
+        assert stats["misses"] == 2
+
+
+class TestMemoryEntry:
+    """测试紧凑记忆条目"""
+
+    def test_compact_representation(self):
+        """嵌入保存为 float32 数组，标签被驻留，不产生 __dict__"""
+        entry = MemoryEntry(key="k", tags=["user" + str(1)], embedding=[1.0, 2.0])
+        other = MemoryEntry(key="j", tags=["user" + str(1)])
+
+        assert not hasattr(entry, "__dict__")
+        assert entry.embedding.typecode == "f"
+        assert list(entry.embedding) == [1.0, 2.0]
+        assert entry.tags[0] is other.tags[0]
+
+    def test_to_dict_unchanged(self):
+        """to_dict() 输出与原 dataclass 一致"""
+        entry = MemoryEntry(
+            id="m1",
+            key="k",
+            value={"a": 1},
+            memory_type=MemoryType.LONG_TERM,
+            tags=["x"],
+            embedding=[0.5],
+            created_at=1.0,
+            accessed_at=2.0,
+        )
+
+        assert entry.to_dict() == {
+            "id": "m1",
+            "key": "k",
+            "value": {"a": 1},
+            "memory_type": "long_term",
+            "tags": ["x"],
+            "importance": 0.5,
+            "created_at": 1.0,
+            "accessed_at": 2.0,
+            "access_count": 0,
+            "ttl_seconds": None,
+            "metadata": {},
+        }
+
+
+class TestEviction:
+    """测试记忆淘汰"""
+
+    def test_queue_lazy_invalidation(self):
+        """更新与删除后弹出顺序正确"""
+        queue = EvictionQueue()
+        queue.push("a", 0.5)
+        queue.push("b", 0.1)
+        queue.push("c", 0.3)
+        queue.push("b", 0.9)
+        queue.remove("c")
+
+        assert queue.pop() == "a"
+        assert queue.pop() == "b"
+        assert queue.pop() is None
+
+    def test_queue_compaction(self):
+        """频繁更新不会让堆无限增长"""
+        queue = EvictionQueue()
+        for i in range(1000):
+            queue.push("a", float(i))
+
+        assert len(queue) == 1
+        assert len(queue._heap) < 100
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_important(self):
+        """优先淘汰重要性最低的记忆"""
+        store = VectorMemoryStore(max_memories=10)
+        for i in range(10):
+            await store.store(key=f"k{i}", value=i, importance=0.9)
+        await store.store(key="low", value="x", importance=0.0)
+
+        assert await store.retrieve("low") is None
+        assert len(store._memories) == 10
+
+    @pytest.mark.asyncio
+    async def test_tag_update_reindexes(self):
+        """更新标签时同步标签索引"""
+        store = VectorMemoryStore()
+        await store.store(key="k", value="v", tags=["old"])
+        await store.store(key="k", value="v2", tags=["new"])
+
+        assert await store.search_by_tags(["old"]) == []
+        assert [e.key for e in await store.search_by_tags(["new"])] == ["k"]
+
+        await store.delete("k")
+        assert (await store.get_stats())["by_tag"] == {}
+
+
+class TestExpiry:
+    """测试过期清理"""
+
+    def test_timing_wheel_advance(self):
+        """只返回已到期的键"""
+        wheel = TimingWheel(tick_seconds=1.0, num_slots=8, start_time=1000.0)
+        wheel.schedule("a", 1002.0)
+        wheel.schedule("b", 1005.5)
+        wheel.schedule("c", 1020.0)  # 超过一圈
+
+        assert wheel.advance(1001.0) == []
+        assert wheel.advance(1003.0) == ["a"]
+        assert wheel.advance(1006.0) == ["b"]
+        assert wheel.advance(1019.0) == []
+        assert wheel.advance(1025.0) == ["c"]
+        assert len(wheel) == 0
+
+    def test_timing_wheel_cancel_and_reschedule(self):
+        """取消与重新调度"""
+        wheel = TimingWheel(tick_seconds=1.0, num_slots=8, start_time=0.0)
+        wheel.schedule("a", 2.0)
+        wheel.schedule("a", 50.0)
+        wheel.schedule("b", 3.0)
+        assert wheel.cancel("b")
+
+        assert wheel.advance(10.0) == []
+        assert wheel.count_due(60.0) == 1
+
+    def test_timing_wheel_count_due_checks_elapsed_slots(self):
+        """count_due 只检查上次推进以来经过的槽位"""
+        wheel = TimingWheel(tick_seconds=1.0, num_slots=64, start_time=0.0)
+        for i in range(10):
+            wheel.schedule(f"due-{i}", 1.5)
+        wheel.schedule("later", 30.0)
+        wheel._slots[40]["unvisited"] = 0.0  # 不在经过的槽位中，不应被计入
+
+        assert wheel.count_due(2.0) == 10
+        assert wheel.count_due(0.5) == 0
+        assert len(wheel.advance(2.0)) == 10
+        assert wheel.count_due(2.0) == 0
+        assert wheel.count_due(31.0) == 1
+
+    @pytest.mark.asyncio
+    async def test_store_sweep_reclaims_expired(self):
+        """后台清理回收过期记忆"""
+        store = VectorMemoryStore(expiry_tick_seconds=0.01)
+        await store.store(key="temp", value="x", ttl_seconds=0)
+        await store.store(key="keep", value="y", ttl_seconds=3600)
+        await store.store(key="forever", value="z")
+
+        entry = store._memories[store._key_index["temp"]]
+        entry.created_at -= 1
+
+        assert (await store.get_stats())["expired"] == 1
+        assert await store.sweep_expired() == 1
+        assert "temp" not in store._key_index
+
+        stats = await store.get_stats()
+        assert stats["total_memories"] == 2
+        assert stats["expiry"]["reclaimed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_store_sweeper_lifecycle(self):
+        """start/stop 控制后台任务"""
+        store = VectorMemoryStore(expiry_tick_seconds=0.01, sweep_interval=0.01)
+        await store.store(key="temp", value="x", ttl_seconds=0)
+        store._memories[store._key_index["temp"]].created_at -= 1
+
+        await store.start()
+        assert (await store.get_stats())["expiry"]["running"]
+        for _ in range(50):
+            if "temp" not in store._key_index:
+                break
+            await asyncio.sleep(0.01)
+        await store.stop()
+
+        assert "temp" not in store._key_index
+        assert not (await store.get_stats())["expiry"]["running"]
+
+    @pytest.mark.asyncio
+    async def test_memory_manager_sweeper(self):
+        """MemoryManager 使用同一套过期清理"""
+        manager = MemoryManager()
+        manager.store("temp", "x", ttl_seconds=0)
+        manager.store("keep", "y")
+
+        assert await manager._sweeper.sweep_once(now=time.time() + 1) == 1
+        assert manager.retrieve("temp") is None
+        assert manager.retrieve("keep") == "y"
+        assert manager.get_expiry_stats()["reclaimed"] == 1
+
+    def test_context_import_without_grpc(self):
+        """context 只依赖本地过期清理，未安装 grpc 时也能导入"""
+        code = (
+            "import sys\n"
+            "sys.modules['grpc'] = None\n"
+            "from neuroflow.context import MemoryManager\n"
+            "assert 'neuroflow.memory.kernel_client' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+class TestPersistentBackend:
+    """测试持久化后端"""
+
+    @pytest.mark.asyncio
+    async def test_reopen_restores_memories(self, tmp_path):
+        """重新打开后可检索和语义搜索"""
+        store = VectorMemoryStore(
+            embedding_fn=fake_embedding,
+            backend=PersistentMemoryBackend(str(tmp_path)),
+        )
+        await store.store(key="fruit", value="apple banana", tags=["food"])
+        await store.store(key="pet", value="dog cat", memory_type=MemoryType.LONG_TERM)
+        store.backend.close()
+
+        reopened = VectorMemoryStore(
+            embedding_fn=fake_embedding,
+            backend=PersistentMemoryBackend(str(tmp_path)),
+        )
+        assert (await reopened.get_stats())["total_memories"] == 0
+        assert (await reopened.get_stats())["persisted"] == 2
+
+        results = await reopened.semantic_search("apple", top_k=1)
+        assert results[0][0].key == "fruit"
+        assert [e.key for e in await reopened.search_by_tags(["food"])] == ["fruit"]
+        assert [e.key for e in await reopened.search_by_type(MemoryType.LONG_TERM)] == ["pet"]
+
+        assert await reopened.retrieve("pet") == "dog cat"
+        assert "pet" in reopened._key_index
+
+    @pytest.mark.asyncio
+    async def test_eviction_unloads_instead_of_deleting(self, tmp_path):
+        """超出工作集的记忆被卸载但仍可访问"""
+        store = VectorMemoryStore(
+            max_memories=10,
+            embedding_fn=fake_embedding,
+            backend=PersistentMemoryBackend(str(tmp_path)),
+        )
+        for i in range(30):
+            await store.store(key=f"k{i}", value=f"apple {i}")
+
+        assert len(store._memories) <= 10
+        assert (await store.get_stats())["persisted"] == 30
+        assert await store.retrieve("k0") == "apple 0"
+
+        assert await store.delete("k1")
+        assert await store.retrieve("k1") is None
+        assert (await store.get_stats())["persisted"] == 29
+
+    @pytest.mark.asyncio
+    async def test_keyword_search_covers_persisted_entries(self, tmp_path):
+        """关键词检索覆盖工作集之外和重新打开后的持久化条目"""
+        store = VectorMemoryStore(max_memories=5, backend=PersistentMemoryBackend(str(tmp_path)))
+        for i in range(20):
+            await store.store(key=f"k{i}", value=f"苹果 {i}", tags=["odd" if i % 2 else "even"])
+        await store.store(key="k0", value="香蕉")
+        await store.delete("k1")
+
+        assert len(store._memories) <= 5
+        hits = await store.semantic_search("苹果", top_k=50)
+        assert sorted(e.key for e, _ in hits) == sorted(f"k{i}" for i in range(2, 20))
+        store.backend.close()
+
+        reopened = VectorMemoryStore(backend=PersistentMemoryBackend(str(tmp_path)))
+        hits = await reopened.semantic_search("苹果", top_k=50, tags=["odd"])
+        assert sorted(e.key for e, _ in hits) == sorted(f"k{i}" for i in range(3, 20, 2))
+        assert [e.key for e, _ in await reopened.semantic_search("香蕉")] == ["k0"]
+        assert reopened.backend.get_stats()["text_indexed"] == 19
+
+    @pytest.mark.asyncio
+    async def test_text_index_rebuilt_for_old_stores(self, tmp_path):
+        """没有全文索引的存储在首次打开时补建"""
+        backend = PersistentMemoryBackend(str(tmp_path))
+        for i in range(3):
+            backend.put(MemoryEntry(id=f"id{i}", key=f"k{i}", value=f"苹果 {i}"))
+        backend._conn.execute("DELETE FROM meta WHERE name = 'text_index'")
+        backend.close()
+
+        store = VectorMemoryStore(backend=PersistentMemoryBackend(str(tmp_path)))
+        assert store.backend.text_indexed
+        assert len(await store.semantic_search("苹果")) == 3
+
+    @pytest.mark.asyncio
+    async def test_sweep_reclaims_unloaded_expired(self, tmp_path):
+        """清理未加载的过期记忆"""
+        backend = PersistentMemoryBackend(str(tmp_path))
+        store = VectorMemoryStore(backend=backend)
+        entry = await store.store(key="temp", value="x", ttl_seconds=1)
+        entry.created_at -= 10
+        backend.put(entry, write_embedding=False)
+        store._unload(entry)
+
+        assert await store.sweep_expired() == 1
+        assert len(backend) == 0
+
+    def test_compact_reclaims_dead_rows(self, tmp_path):
+        """压缩后向量与检索结果不变"""
+        backend = PersistentMemoryBackend(str(tmp_path))
+        store = VectorMemoryStore(embedding_fn=fake_embedding, backend=backend)
+
+        async def fill():
+            for i, word in enumerate(VOCAB):
+                await store.store(key=word, value=word)
+            await store.delete("dog")
+            await store.delete("cat")
+        asyncio.run(fill())
+
+        assert backend.get_stats()["dead_rows"] == 2
+        with pytest.raises(RuntimeError):
+            with backend.batch():
+                backend.compact()
+        assert backend.compact() == 4
+        assert backend.get_stats()["dead_rows"] == 0
+        assert backend.generation == 1
+        assert not (tmp_path / "embeddings.0.f32").exists()
+
+        hits = backend.search(asyncio.run(fake_embedding("bird")), top_k=1)
+        assert backend.get(hits[0][0]).key == "bird"
+        assert list(backend.get_by_key("cherry").embedding) == [0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+
+    def test_search_mask_tracks_writes(self, tmp_path):
+        """检索用的有效行掩码和向量范数随写入、更新、删除增量维护"""
+        backend = PersistentMemoryBackend(str(tmp_path))
+        for word in VOCAB:
+            backend.put(MemoryEntry(id=word, key=word, value=word, embedding=asyncio.run(fake_embedding(word))))
+        assert backend.search(asyncio.run(fake_embedding("dog")), top_k=1)[0][0] == "dog"
+
+        backend.delete("dog")
+        backend.put(MemoryEntry(id="cat", key="cat", value="cat", embedding=asyncio.run(fake_embedding("dog"))))
+        for i in range(20):
+            backend.put(MemoryEntry(id=f"x{i}", key=f"x{i}", value=i, embedding=[0.0, 0.0, 0.0, 0.0, 3.0, 4.0]))
+
+        # 追加的行只计算自身的范数，不会让下次检索重新扫描整个文件
+        assert backend._norms is not None
+        assert backend._norms[backend._row_count - 1] == pytest.approx(5.0)
+
+        hits = backend.search(asyncio.run(fake_embedding("dog")), top_k=3)
+        assert [entry_id for entry_id, _ in hits][0] == "cat"
+        assert "dog" not in {entry_id for entry_id, _ in hits}
+        assert backend._live[:backend._row_count].tolist() == [
+            entry_id is not None for entry_id in backend._row_ids
+        ]
+
+    def test_len_tracks_writes(self, tmp_path):
+        """len() 只在首次调用时查询 SQLite，之后随写入、删除和回滚更新"""
+        backend = PersistentMemoryBackend(str(tmp_path))
+        backend.put(MemoryEntry(id="a", key="a", value=1))
+        assert len(backend) == 1
+
+        statements = []
+        backend._conn.set_trace_callback(statements.append)
+        backend.put(MemoryEntry(id="b", key="b", value=2))
+        backend.put(MemoryEntry(id="b", key="b", value=3))
+        backend.put(MemoryEntry(id="b2", key="b", value=4))  # 同一个键的新条目替换旧条目
+        assert len(backend) == 2
+        backend.delete("a")
+        backend.delete("missing")
+        assert len(backend) == 1
+        assert not any("COUNT(*)" in sql for sql in statements)
+
+        with pytest.raises(RuntimeError):
+            with backend.batch():
+                backend.put(MemoryEntry(id="c", key="c", value=5))
+                raise RuntimeError("abort")
+        assert len(backend) == 1
+        backend.clear()
+        assert len(backend) == 0
+
+    def test_sync_once_per_commit(self, tmp_path, monkeypatch):
+        """默认在提交前 fsync 向量文件，批量写入只 fsync 一次"""
+        from neuroflow.memory import persistent_store
+
+        calls = []
+        monkeypatch.setattr(persistent_store.os, "fsync", lambda fd: calls.append(fd))
+        backend = PersistentMemoryBackend(str(tmp_path))
+        assert backend.sync is True
+
+        backend.put(MemoryEntry(id="a", key="a", value=1, embedding=[1.0, 0.0]))
+        assert len(calls) == 1
+        with backend.batch():
+            for i in range(5):
+                backend.put(MemoryEntry(id=f"b{i}", key=f"b{i}", value=i, embedding=[0.0, 1.0]))
+        assert len(calls) == 2
+        backend.put(MemoryEntry(id="a", key="a", value=2), write_embedding=False)
+        assert len(calls) == 2
+        backend.close()
@@ -6,14 +6,32 @@ NeuroFlow Python SDK - Orchestrator Tests
 
 import pytest
 import asyncio
+import json
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from neuroflow.orchestrator import (
     LLMConfig,
     LLMClient,
+    LLMProvider,
+    LLMResponse,
     Message,
     LLMOrchestrator,
     OrchestratorConfig,
+    ResponseCache,
+    DiskResponseCacheBackend,
+    LLMScheduler,
+    SchedulerConfig,
+    ProviderLimits,
+    LLMStreamChunk,
+    StreamedFunction,
+    StreamedToolCall,
+    ToolGraph,
+    ToolGraphExecutor,
+)
+from neuroflow.orchestrator.llm_client import (
+    _assemble_anthropic_stream,
+    _assemble_openai_stream,
 )
 from neuroflow.tools import (
     UnifiedToolRegistry,
@@ -21,6 +39,7 @@ from neuroflow.tools import (
     ToolParameter,
     ToolSource,
     LocalFunctionExecutor,
+    ToolCall,
 )
 
 
@@ -54,6 +73,42 @@ class TestLLMClient:
         
         assert d["role"] == "assistant"
         assert d["content"] == "Hi there!"
+    
+    @pytest.mark.asyncio
+    async def test_ollama_session_reused(self):
+        """多次调用复用同一个连接池，aclose() 后释放"""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        
+        peers = set()
+        
+        async def chat(request):
+            peers.add(request.transport.get_extra_info("peername"))
+            return web.json_response({"message": {"role": "assistant", "content": "pong"}})
+        
+        app = web.Application()
+        app.router.add_post("/api/chat", chat)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            client = LLMClient(LLMConfig(
+                provider=LLMProvider.OLLAMA,
+                model="llama3",
+                base_url=str(server.make_url("/api/chat")),
+            ))
+            for _ in range(3):
+                response = await client.chat([Message.user("ping")])
+                assert response.content == "pong"
+            
+            session = client._session
+            assert session is not None and not session.closed
+            assert len(peers) == 1  # 同一条长连接
+            
+            await client.aclose()
+            assert session.closed
+            assert client._session is None
+        finally:
+            await server.close()
 
 
 class TestLLMOrchestrator:
@@ -147,7 +202,29 @@ class TestLLMOrchestrator:
         assert len(messages) >= 2  # 系统消息 + 用户消息
         assert messages[-1].role == "user"
         assert messages[-1].content == "Hello"
-    
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_tracks_registry(self, mock_llm_client, tool_registry):
+        """默认系统提示词在工具集变化后重新渲染"""
+        orchestrator = LLMOrchestrator(
+            llm_client=mock_llm_client,
+            tool_registry=tool_registry,
+        )
+
+        first = orchestrator._build_messages("Hello", None, None)[0].content
+        assert orchestrator._build_messages("Hi", None, None)[0].content is first
+
+        tool_registry.register_tool(ToolDefinition(
+            id="test-echo",
+            name="echo",
+            description="回显输入",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+        ))
+        second = orchestrator._build_messages("Hello", None, None)[0].content
+        assert "回显输入" in second
+        assert "回显输入" not in first
+
     @pytest.mark.asyncio
     async def test_execute_no_tool_calls(
         self, 
@@ -177,6 +254,926 @@ class TestLLMOrchestrator:
         assert result.turns_taken == 1
 
 
+class TestToolSelection:
+    """测试相关工具筛选"""
+    
+    @pytest.fixture
+    def catalogue(self):
+        """创建包含多个工具的注册表"""
+        registry = UnifiedToolRegistry()
+        descriptions = {
+            "get_weather": "查询城市天气预报",
+            "send_email": "发送电子邮件",
+            "calculator": "数学计算器",
+            "translate": "翻译文本到其它语言",
+            "search_web": "搜索网页",
+            "read_file": "读取本地文件",
+        }
+        for name, description in descriptions.items():
+            registry.register_tool(ToolDefinition(
+                id=name,
+                name=name,
+                description=description,
+                source=ToolSource.LOCAL_FUNCTION,
+                parameters=[ToolParameter("query", "string", "输入", required=True)],
+            ))
+        return registry
+    
+    @pytest.mark.asyncio
+    async def test_keyword_selection_with_pinned(self, catalogue):
+        """没有嵌入函数时按关键词筛选，固定工具始终发送"""
+        from neuroflow.orchestrator import LLMResponse
+        
+        client = MagicMock(spec=LLMClient)
+        client.chat = AsyncMock(return_value=LLMResponse(content="ok", model="m"))
+        orchestrator = LLMOrchestrator(
+            llm_client=client,
+            tool_registry=catalogue,
+            config=OrchestratorConfig(tool_selection_top_k=1, pinned_tools=["search_web"]),
+        )
+        
+        await orchestrator.execute("明天北京的天气怎么样")
+        
+        tools = client.chat.call_args.kwargs["tools"]
+        assert [t["function"]["name"] for t in tools] == ["search_web", "get_weather"]
+        system_prompt = client.chat.call_args.kwargs["messages"][0].content
+        assert "get_weather" in system_prompt
+        assert "send_email" not in system_prompt
+        
+        stats = orchestrator.get_tool_selection_stats()
+        assert stats["selections"] == 1
+        assert stats["avg_tools_offered"] == 2
+        assert stats["schema_tokens_saved"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_embedding_selection_cached(self, catalogue):
+        """嵌入函数只为每个工具调用一次，工具变化后只重新嵌入变化的工具"""
+        embedded = []
+        
+        async def embed(text):
+            embedded.append(text)
+            return [1.0 if "邮件" in text else 0.0, 1.0 if "文件" in text else 0.0, 0.1]
+        
+        assert (await catalogue.rank_tools("帮我发邮件", 1, embed)) == ["send_email"]
+        assert (await catalogue.rank_tools("打开文件", 1, embed)) == ["read_file"]
+        assert len(embedded) == 6 + 2
+        
+        catalogue.register_tool(ToolDefinition(
+            id="archive",
+            name="archive",
+            description="压缩文件",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+        ))
+        await catalogue.rank_tools("文件", 2, embed)
+        assert len(embedded) == 8 + 2
+    
+    @pytest.mark.asyncio
+    async def test_small_catalogue_sends_all(self, catalogue):
+        """工具数量不超过上限时不筛选"""
+        orchestrator = LLMOrchestrator(
+            llm_client=MagicMock(spec=LLMClient),
+            tool_registry=catalogue,
+            config=OrchestratorConfig(tool_selection_top_k=10),
+        )
+        
+        assert await orchestrator._select_tools("天气") is None
+
+
+class TestStreaming:
+    """测试流式执行"""
+    
+    @staticmethod
+    def make_registry(func):
+        """注册单个本地工具 echo"""
+        registry = UnifiedToolRegistry()
+        tool = ToolDefinition(
+            id="echo",
+            name="echo",
+            description="回显输入",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[ToolParameter("text", "string", "文本", required=True)],
+        )
+        registry.register_tool(tool)
+        executor = LocalFunctionExecutor()
+        executor.register_function(func, tool)
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        return registry
+    
+    @staticmethod
+    def tool_chunk(call_id, text):
+        return LLMStreamChunk(type="tool_call", tool_call=StreamedToolCall(
+            id=call_id,
+            function=StreamedFunction(name="echo", arguments=json.dumps({"text": text})),
+        ))
+    
+    @pytest.mark.asyncio
+    async def test_tool_dispatched_before_stream_ends(self):
+        """工具调用参数完整后立即执行，不等待整条消息结束"""
+        started = asyncio.Event()
+        
+        async def echo(text):
+            started.set()
+            return text
+        
+        turns = []
+        
+        async def chat_stream(messages, tools=None, tool_choice="auto", **kwargs):
+            turns.append(messages)
+            if len(turns) == 1:
+                yield LLMStreamChunk(type="content", delta="查询中")
+                yield self.tool_chunk("call-1", "hi")
+                # 流尚未结束时工具已开始执行
+                await asyncio.wait_for(started.wait(), timeout=1)
+                yield LLMStreamChunk(type="done")
+            else:
+                yield LLMStreamChunk(type="content", delta="结果是 ")
+                yield LLMStreamChunk(type="content", delta="hi")
+                yield LLMStreamChunk(type="done")
+        
+        client = MagicMock(spec=LLMClient)
+        client.chat_stream = chat_stream
+        orchestrator = LLMOrchestrator(llm_client=client, tool_registry=self.make_registry(echo))
+        
+        events = [event async for event in orchestrator.execute_stream("回显 hi")]
+        
+        assert [e.type for e in events] == [
+            "token", "tool_call", "tool_result", "token", "token", "done",
+        ]
+        result = events[-1].result
+        assert result.final_response == "结果是 hi"
+        assert result.turns_taken == 2
+        assert result.tool_results[0].result == "hi"
+        
+        assistant, tool_message = turns[1][-2:]
+        assert assistant.tool_calls[0]["function"]["name"] == "echo"
+        assert tool_message.tool_call_id == "call-1"
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_call_id_in_stream(self):
+        """流式路径中重复的调用 ID 不执行，记为失败结果"""
+        executed = []
+        
+        async def echo(text):
+            executed.append(text)
+            return text
+        
+        async def chat_stream(messages, tools=None, tool_choice="auto", **kwargs):
+            if len(messages) <= 2:
+                yield self.tool_chunk("call-1", "{{call-1}}")
+                yield self.tool_chunk("call-1", "again")
+            else:
+                yield LLMStreamChunk(type="content", delta="完成")
+            yield LLMStreamChunk(type="done")
+        
+        client = MagicMock(spec=LLMClient)
+        client.chat_stream = chat_stream
+        orchestrator = LLMOrchestrator(llm_client=client, tool_registry=self.make_registry(echo))
+        
+        events = [event async for event in orchestrator.execute_stream("回显")]
+        
+        first, duplicate = events[-1].result.tool_results
+        assert first.result == "{{call-1}}"
+        assert duplicate.success is False and "Duplicate" in duplicate.error
+        assert executed == ["{{call-1}}"]
+        assert events[-1].result.final_response == "完成"
+    
+    @pytest.mark.asyncio
+    async def test_closing_stream_cancels_tools(self):
+        """调用方提前停止迭代时取消仍在执行的工具"""
+        cancelled = asyncio.Event()
+        
+        async def echo(text):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        async def chat_stream(messages, tools=None, tool_choice="auto", **kwargs):
+            yield self.tool_chunk("call-1", "hi")
+            yield LLMStreamChunk(type="done")
+        
+        client = MagicMock(spec=LLMClient)
+        client.chat_stream = chat_stream
+        orchestrator = LLMOrchestrator(llm_client=client, tool_registry=self.make_registry(echo))
+        
+        stream = orchestrator.execute_stream("回显 hi")
+        assert (await stream.__anext__()).type == "tool_call"
+        await asyncio.sleep(0)
+        await stream.aclose()
+        
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+    
+    @pytest.mark.asyncio
+    async def test_cancel_on_tool_failure(self):
+        """cancel_on_tool_failure 时一个工具失败即取消同一批仍在执行的工具"""
+        cancelled = asyncio.Event()
+        
+        async def echo(text):
+            if text == "bad":
+                raise ValueError("bad input")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        turns = []
+        
+        async def chat_stream(messages, tools=None, tool_choice="auto", **kwargs):
+            turns.append(messages)
+            if len(turns) == 1:
+                yield self.tool_chunk("call-1", "slow")
+                yield self.tool_chunk("call-2", "bad")
+            else:
+                yield LLMStreamChunk(type="content", delta="完成")
+            yield LLMStreamChunk(type="done")
+        
+        client = MagicMock(spec=LLMClient)
+        client.chat_stream = chat_stream
+        orchestrator = LLMOrchestrator(
+            llm_client=client,
+            tool_registry=self.make_registry(echo),
+            config=OrchestratorConfig(cancel_on_tool_failure=True),
+        )
+        
+        events = await asyncio.wait_for(
+            self.collect(orchestrator.execute_stream("回显")), timeout=2
+        )
+        
+        assert cancelled.is_set()
+        result = events[-1].result
+        slow, bad = result.tool_results
+        assert bad.success is False
+        assert slow.success is False and "Cancelled" in slow.error
+        assert result.tool_stats[0].cancelled == 1
+    
+    @staticmethod
+    async def collect(stream):
+        return [event async for event in stream]
+    
+    @pytest.mark.asyncio
+    async def test_agent_handle_stream(self):
+        """AINativeAgent.handle_stream 产出文本增量并记录对话历史"""
+        from neuroflow import AINativeAgent, AINativeAgentConfig
+        
+        async def chat_stream(messages, tools=None, tool_choice="auto", **kwargs):
+            for delta in ("你", "好"):
+                yield LLMStreamChunk(type="content", delta=delta)
+            yield LLMStreamChunk(type="done")
+        
+        agent = AINativeAgent(AINativeAgentConfig(name="stream"))
+        agent.orchestrator.llm = MagicMock(spec=LLMClient)
+        agent.orchestrator.llm.chat_stream = chat_stream
+        
+        events = [event async for event in agent.handle_stream("hello")]
+        
+        assert [e["content"] for e in events if e["type"] == "token"] == ["你", "好"]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["response"] == "你好"
+        assert events[-1]["success"] is True
+        assert agent.get_conversation_history()[-1]["content"] == "你好"
+
+
+class TestStreamAssembly:
+    """测试提供商流式片段的组装"""
+    
+    @staticmethod
+    async def replay(items):
+        for item in items:
+            yield item
+    
+    @pytest.mark.asyncio
+    async def test_openai_tool_call_yielded_when_next_starts(self):
+        """OpenAI 工具调用参数分片拼接，下一个调用开始时上一个即产出"""
+        def chunk(content=None, tool_calls=None, finish_reason=None):
+            return SimpleNamespace(
+                model="gpt-test",
+                usage=None,
+                choices=[SimpleNamespace(
+                    delta=SimpleNamespace(content=content, tool_calls=tool_calls),
+                    finish_reason=finish_reason,
+                )],
+            )
+        
+        def tc(index, id=None, name=None, arguments=None):
+            return SimpleNamespace(
+                index=index, id=id,
+                function=SimpleNamespace(name=name, arguments=arguments),
+            )
+        
+        raw = [
+            chunk(content="好的"),
+            chunk(tool_calls=[tc(0, "a", "echo", '{"te')]),
+            chunk(tool_calls=[tc(0, arguments='xt": 1}')]),
+            chunk(tool_calls=[tc(1, "b", "echo", '{}')]),
+            chunk(finish_reason="tool_calls"),
+        ]
+        
+        chunks = [c async for c in _assemble_openai_stream(self.replay(raw), "gpt")]
+        
+        assert [c.type for c in chunks] == ["content", "tool_call", "tool_call", "done"]
+        assert chunks[1].tool_call.function.arguments == '{"text": 1}'
+        assert chunks[2].tool_call.id == "b"
+        done = chunks[-1].response
+        assert done.content == "好的"
+        assert done.model == "gpt-test"
+        assert done.finish_reason == "tool_calls"
+        assert len(done.tool_calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_anthropic_tool_use_yielded_on_block_stop(self):
+        """Anthropic tool_use 块结束时产出完整调用"""
+        events = [
+            SimpleNamespace(type="content_block_start", index=0,
+                            content_block=SimpleNamespace(type="text")),
+            SimpleNamespace(type="content_block_delta", index=0,
+                            delta=SimpleNamespace(type="text_delta", text="稍等")),
+            SimpleNamespace(type="content_block_stop", index=0),
+            SimpleNamespace(type="content_block_start", index=1,
+                            content_block=SimpleNamespace(type="tool_use", id="tu-1", name="echo")),
+            SimpleNamespace(type="content_block_delta", index=1,
+                            delta=SimpleNamespace(type="input_json_delta", partial_json='{"text"')),
+            SimpleNamespace(type="content_block_delta", index=1,
+                            delta=SimpleNamespace(type="input_json_delta", partial_json=': "x"}')),
+            SimpleNamespace(type="content_block_stop", index=1),
+            SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="tool_use"),
+                            usage=SimpleNamespace(output_tokens=12)),
+        ]
+        
+        chunks = [c async for c in _assemble_anthropic_stream(self.replay(events), "claude")]
+        
+        assert [c.type for c in chunks] == ["content", "tool_call", "done"]
+        assert chunks[1].tool_call.id == "tu-1"
+        assert json.loads(chunks[1].tool_call.function.arguments) == {"text": "x"}
+        assert chunks[-1].response.finish_reason == "tool_use"
+        assert chunks[-1].response.usage == {"output_tokens": 12}
+
+
+class TestResponseCache:
+    """测试 LLM 响应缓存"""
+    
+    @staticmethod
+    def make_client(cache, temperature=0.0, tool_calls=True):
+        client = LLMClient(
+            LLMConfig(provider=LLMProvider.OPENAI, model="gpt-test", temperature=temperature),
+            response_cache=cache,
+        )
+        client._call_openai = AsyncMock(side_effect=lambda *args, **kwargs: LLMResponse(
+            content=f"answer {client._call_openai.await_count}",
+            model="gpt-test",
+            tool_calls=[StreamedToolCall(
+                id="call-1", function=StreamedFunction(name="echo", arguments="{}"),
+            )] if tool_calls else None,
+        ))
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_exact_hit(self):
+        """相同请求只调用一次提供商"""
+        cache = ResponseCache()
+        client = self.make_client(cache)
+        messages = [Message.system("你是助手"), Message.user("你好")]
+        
+        first = await client.chat(messages)
+        second = await client.chat(messages)
+        third = await client.chat(messages, tools=[{"type": "function"}])
+        
+        assert client._call_openai.await_count == 2
+        assert second.content == first.content
+        assert second.tool_calls[0].function.name == "echo"
+        assert third.content != first.content
+        stats = cache.get_stats()
+        assert stats["exact_hits"] == 1
+        assert stats["misses"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_bypassed_when_temperature_positive(self):
+        """temperature > 0 默认不缓存，force=True 时缓存"""
+        cache = ResponseCache()
+        client = self.make_client(cache, temperature=0.7)
+        messages = [Message.user("你好")]
+        
+        await client.chat(messages)
+        await client.chat(messages)
+        assert client._call_openai.await_count == 2
+        assert cache.get_stats()["bypassed"] == 2
+        
+        cache.force = True
+        await client.chat(messages)
+        await client.chat(messages)
+        assert client._call_openai.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_semantic_hit_within_same_prefix(self):
+        """只有最后一条用户消息近似时语义命中，系统提示词不同则不命中"""
+        async def embed(text):
+            return [1.0, 0.05 if "吗" in text else 0.0]
+        
+        cache = ResponseCache(embedding_fn=embed, similarity_threshold=0.99)
+        client = self.make_client(cache, tool_calls=False)
+        
+        first = await client.chat([Message.system("A"), Message.user("今天天气好")])
+        similar = await client.chat([Message.system("A"), Message.user("今天天气好吗")])
+        other_prompt = await client.chat([Message.system("B"), Message.user("今天天气好吗")])
+        
+        assert similar.content == first.content
+        assert other_prompt.content != first.content
+        assert cache.get_stats()["semantic_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_tool_call_responses_exact_only(self):
+        """带 tool_calls 的响应不参与语义匹配"""
+        async def embed(text):
+            return [1.0, 0.0]
+        
+        cache = ResponseCache(embedding_fn=embed)
+        client = self.make_client(cache)
+        
+        first = await client.chat([Message.user("查北京天气")])
+        exact = await client.chat([Message.user("查北京天气")])
+        similar = await client.chat([Message.user("查上海天气")])
+        
+        assert exact.content == first.content
+        assert similar.content != first.content
+        stats = cache.get_stats()
+        assert stats["exact_hits"] == 1
+        assert stats["semantic_hits"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_cached_tool_call_response_next_turn(self):
+        """缓存命中的工具调用响应进入下一轮请求时是可序列化的字典"""
+        runs = []
+        
+        async def echo(text):
+            runs.append(text)
+            return f"{text} #{len(runs)}"
+        
+        requests = []
+        
+        async def call_openai(messages, *args, **kwargs):
+            requests.append(messages)
+            if messages[-1].role == "tool":
+                return LLMResponse(content="完成", model="gpt-test")
+            return LLMResponse(
+                content="",
+                model="gpt-test",
+                tool_calls=[SimpleNamespace(
+                    id="call-1",
+                    type="function",
+                    function=SimpleNamespace(name="echo", arguments=json.dumps({"text": "hi"})),
+                )],
+            )
+        
+        client = LLMClient(
+            LLMConfig(provider=LLMProvider.OPENAI, model="gpt-test", temperature=0.0),
+            response_cache=ResponseCache(),
+        )
+        client._call_openai = call_openai
+        orchestrator = LLMOrchestrator(
+            llm_client=client, tool_registry=TestStreaming.make_registry(echo),
+        )
+        
+        for _ in range(2):
+            result = await orchestrator.execute("回显 hi")
+            assert result.final_response == "完成"
+        
+        # 第二次执行时第一轮响应来自缓存，只有第二轮请求到达提供商
+        assert len(requests) == 3
+        for messages in (requests[1], requests[2]):
+            assistant = messages[-2]
+            assert assistant.tool_calls == [{
+                "id": "call-1",
+                "type": "function",
+                "function": {"name": "echo", "arguments": json.dumps({"text": "hi"})},
+            }]
+            json.dumps([m.to_dict() for m in messages])
+        assert requests[2][-1].content != requests[1][-1].content
+    
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru_eviction(self, monkeypatch):
+        """过期条目不再命中，超出容量时淘汰最久未使用的条目"""
+        from neuroflow.orchestrator import response_cache
+        
+        now = [1000.0]
+        monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+        
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+        client = self.make_client(cache)
+        a, b, c = ([Message.user(text)] for text in "abc")
+        
+        await client.chat(a)
+        await client.chat(b)
+        await client.chat(a)      # a 变为最近使用
+        await client.chat(c)      # 淘汰 b
+        assert cache.get_stats()["evictions"] == 1
+        await client.chat(a)
+        assert client._call_openai.await_count == 3
+        
+        now[0] += 61
+        await client.chat(a)
+        assert client._call_openai.await_count == 4
+        assert cache.get_stats()["expirations"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_disk_backend_persists(self, tmp_path):
+        """磁盘后端在重新打开后仍然命中，并恢复语义索引"""
+        async def embed(text):
+            return [1.0, 0.0]
+        
+        path = str(tmp_path / "cache.db")
+        cache = ResponseCache(backend=DiskResponseCacheBackend(path), embedding_fn=embed)
+        await self.make_client(cache, tool_calls=False).chat([Message.user("你好")])
+        cache.close()
+        
+        cache = ResponseCache(backend=DiskResponseCacheBackend(path), embedding_fn=embed)
+        client = self.make_client(cache, tool_calls=False)
+        exact = await client.chat([Message.user("你好")])
+        semantic = await client.chat([Message.user("您好")])
+        
+        assert client._call_openai.await_count == 0
+        assert exact.content == semantic.content == "answer 1"
+        assert len(cache) == 1
+        cache.close()
+    
+    def test_disk_backend_count(self, tmp_path):
+        """磁盘后端维护的条目数与表中一致"""
+        backend = DiskResponseCacheBackend(str(tmp_path / "cache.db"), max_entries=3)
+        for key in "abcd":
+            backend.put(key, {"response": {}})
+        backend.put("d", {"response": {"content": "new"}})
+        assert len(backend) == 3
+        backend.delete("d")
+        backend.delete("missing")
+        assert len(backend) == 2
+        backend.close()
+        
+        reopened = DiskResponseCacheBackend(str(tmp_path / "cache.db"), max_entries=3)
+        assert len(reopened) == 2
+        reopened.clear()
+        assert len(reopened) == 0
+        reopened.close()
+
+
+class TestScheduler:
+    """测试 LLM 请求调度器"""
+    
+    class HTTPError(Exception):
+        def __init__(self, status_code, retry_after=None):
+            super().__init__(f"HTTP {status_code}")
+            self.status_code = status_code
+            self.headers = {"retry-after": retry_after} if retry_after else {}
+    
+    @pytest.mark.asyncio
+    async def test_priority_and_concurrency(self):
+        """并发受限时按优先级派发"""
+        scheduler = LLMScheduler(SchedulerConfig(max_concurrency=1))
+        release = asyncio.Event()
+        order = []
+        
+        async def blocker():
+            await release.wait()
+            order.append("blocker")
+        
+        def request(name):
+            async def run():
+                order.append(name)
+            return run
+        
+        first = asyncio.create_task(scheduler.submit("openai", blocker))
+        await asyncio.sleep(0)
+        low = asyncio.create_task(scheduler.submit("openai", request("low"), priority=5))
+        high = asyncio.create_task(scheduler.submit("openai", request("high"), priority=0))
+        await asyncio.sleep(0)
+        
+        stats = scheduler.get_stats()
+        assert stats["active"] == 1
+        assert stats["queue_depth"] == 2
+        
+        release.set()
+        await asyncio.gather(first, low, high)
+        assert order == ["blocker", "high", "low"]
+        assert scheduler.get_stats()["completed"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_retry_on_429_and_5xx(self):
+        """429/5xx 退避重试，其它错误直接抛出"""
+        scheduler = LLMScheduler(SchedulerConfig(base_backoff_seconds=0.001))
+        errors = [self.HTTPError(429, retry_after="0.01"), self.HTTPError(503)]
+        
+        async def flaky():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+        
+        assert await scheduler.submit("openai", flaky) == "ok"
+        stats = scheduler.get_stats()
+        assert stats["retries"] == 2
+        assert stats["rate_limited"] == 1
+        
+        async def bad_request():
+            raise self.HTTPError(400)
+        
+        with pytest.raises(self.HTTPError):
+            await scheduler.submit("openai", bad_request)
+        assert scheduler.get_stats()["failed"] == 1
+        assert scheduler.get_stats()["active"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_token_rate_limit_delays_request(self):
+        """token 额度耗尽后等待补充，实际用量按 usage 补扣"""
+        from neuroflow.orchestrator import LLMResponse
+        
+        scheduler = LLMScheduler(SchedulerConfig(
+            provider_limits={"openai": ProviderLimits(tokens_per_minute=6000)},
+        ))
+        
+        async def respond():
+            return LLMResponse(content="", model="m", usage={"total_tokens": 5900})
+        
+        # 预估 100，实际 5900：额度被补扣到几乎耗尽
+        await scheduler.submit("openai", respond, estimated_tokens=100)
+        await scheduler.submit("openai", respond, estimated_tokens=50)
+        
+        # 5000 多 token 的缺口按 100 token/秒补充需要数秒，这里只验证确实在等待
+        waiter = asyncio.create_task(scheduler.submit("openai", respond, estimated_tokens=5))
+        await asyncio.sleep(0.01)
+        assert scheduler.get_stats()["queue_depth"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.get_stats()["queue_depth"] == 0
+        
+        # 其它提供商不受影响
+        assert (await scheduler.submit("anthropic", respond)).model == "m"
+    
+    @pytest.mark.asyncio
+    async def test_client_uses_scheduler(self):
+        """LLMClient 经调度器发送请求，priority 不传给提供商"""
+        scheduler = LLMScheduler()
+        client = LLMClient(
+            LLMConfig(provider=LLMProvider.OPENAI, model="gpt-test"),
+            scheduler=scheduler,
+        )
+        client._call_openai = AsyncMock(return_value=LLMResponse(content="hi", model="gpt-test"))
+        
+        response = await client.chat([Message.user("你好")], priority=1)
+        
+        assert response.content == "hi"
+        assert "priority" not in client._call_openai.call_args.kwargs
+        assert scheduler.get_stats()["submitted"] == 1
+
+    
+    @pytest.mark.asyncio
+    async def test_retry_releases_slot_and_is_recharged(self):
+        """退避期间归还槽位，重试重新排队并再次计入请求数限速"""
+        scheduler = LLMScheduler(SchedulerConfig(
+            max_concurrency=1,
+            base_backoff_seconds=0.05,
+            provider_limits={"openai": ProviderLimits(requests_per_minute=60)},
+        ))
+        order = []
+        errors = [self.HTTPError(503)]
+        
+        async def flaky():
+            if errors:
+                raise errors.pop(0)
+            order.append("flaky")
+        
+        async def other():
+            order.append("other")
+        
+        flaky_task = asyncio.create_task(scheduler.submit("openai", flaky))
+        await asyncio.sleep(0.01)
+        assert scheduler.get_stats()["backing_off"] == 1
+        assert scheduler.get_stats()["active"] == 0
+        
+        await scheduler.submit("openai", other)
+        await flaky_task
+        
+        assert order == ["other", "flaky"]
+        assert scheduler.get_stats()["backing_off"] == 0
+        # 两次 flaky 派发 + 一次 other，各扣一个请求额度
+        assert scheduler._providers["openai"].requests.available < 58
+    
+    @pytest.mark.asyncio
+    async def test_stream_uses_scheduler(self):
+        """chat_stream 经调度器派发，开始产出前的 429 会重试"""
+        scheduler = LLMScheduler(SchedulerConfig(base_backoff_seconds=0.001))
+        client = LLMClient(
+            LLMConfig(provider=LLMProvider.OPENAI, model="gpt-test"),
+            scheduler=scheduler,
+        )
+        attempts = []
+        
+        async def stream_openai(messages, tools, tool_choice, **kwargs):
+            attempts.append(kwargs)
+            if len(attempts) == 1:
+                raise self.HTTPError(429, retry_after="0.01")
+            yield LLMStreamChunk(type="content", delta="hi")
+            yield LLMStreamChunk(type="done", response=LLMResponse(content="hi", model="gpt-test"))
+        
+        client._stream_openai = stream_openai
+        chunks = [c async for c in client.chat_stream([Message.user("你好")], priority=2)]
+        
+        assert [c.type for c in chunks] == ["content", "done"]
+        assert all("priority" not in kwargs for kwargs in attempts)
+        stats = scheduler.get_stats()
+        assert stats["retries"] == 1 and stats["rate_limited"] == 1
+        assert stats["completed"] == 1 and stats["active"] == 0
+
+
+class TestToolGraph:
+    """测试工具调用 DAG 执行"""
+    
+    @pytest.fixture
+    def registry(self):
+        """注册 sleep/echo/fail 三个工具，记录并发数"""
+        registry = UnifiedToolRegistry()
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        registry.active = 0
+        registry.peak = 0
+        
+        async def sleep(ms: int, value=None):
+            registry.active += 1
+            registry.peak = max(registry.peak, registry.active)
+            try:
+                await asyncio.sleep(ms / 1000)
+            finally:
+                registry.active -= 1
+            return value if value is not None else ms
+        
+        async def fail():
+            raise RuntimeError("boom")
+        
+        for name, func in [("sleep", sleep), ("echo", lambda text: text), ("fail", fail)]:
+            tool = ToolDefinition(
+                id=f"local:{name}", name=name, description=name,
+                source=ToolSource.LOCAL_FUNCTION, parameters=[],
+            )
+            registry.register_tool(tool)
+            executor.register_function(func, tool)
+        return registry
+    
+    @staticmethod
+    def call(call_id, name, timeout_ms=30000, **arguments):
+        return ToolCall(
+            tool_id=f"local:{name}", tool_name=name, arguments=arguments,
+            call_id=call_id, timeout_ms=timeout_ms,
+        )
+    
+    @pytest.mark.asyncio
+    async def test_independent_calls_bounded(self, registry):
+        """互不依赖的调用并行执行，但不超过并发上限"""
+        graph = ToolGraph.from_calls([self.call(f"c{i}", "sleep", ms=30) for i in range(6)])
+        
+        outcome = await ToolGraphExecutor(registry, max_concurrency=2).run(graph)
+        
+        assert [r.result for r in outcome.results] == [30] * 6
+        assert registry.peak == 2
+        assert outcome.stats.max_concurrency == 2
+        assert outcome.stats.wall_time_ms >= 85
+        assert outcome.stats.critical_path_ms < 60
+    
+    @pytest.mark.asyncio
+    async def test_plan_dependencies_and_references(self, registry):
+        """plan 的 depends_on 和 {{id}} 引用决定执行顺序，结果替换进参数"""
+        plan = {"tool_calls": [
+            {"id": "greet", "name": "echo", "arguments": {"text": "你好 {{who.name}}"}},
+            {"id": "who", "name": "sleep", "arguments": {"ms": 20, "value": {"name": "张三"}}},
+            {"id": "slow", "name": "sleep", "arguments": {"ms": 40}},
+            {"id": "last", "name": "echo", "arguments": {"text": "{{slow}}"}, "depends_on": ["greet"]},
+        ]}
+        graph = ToolGraph.from_plan(plan, registry)
+        
+        assert graph.dependencies("greet") == ["who"]
+        assert graph.order().index("who") < graph.order().index("greet")
+        
+        outcome = await ToolGraphExecutor(registry).run(graph)
+        
+        results = {r.call_id: r for r in outcome.results}
+        assert results["greet"].result == "你好 张三"
+        assert results["last"].result == 40
+        assert outcome.stats.critical_path == ["slow", "last"]
+        assert outcome.stats.critical_path_ms >= 40
+    
+    def test_invalid_plans_rejected(self, registry):
+        """依赖不存在或存在环时报错"""
+        with pytest.raises(ValueError, match="unknown"):
+            ToolGraph.from_plan({"tool_calls": [
+                {"id": "a", "name": "echo", "depends_on": ["missing"]},
+            ]})
+        with pytest.raises(ValueError, match="cycle"):
+            ToolGraph.from_plan({"tool_calls": [
+                {"id": "a", "name": "echo", "arguments": {"text": "{{b}}"}},
+                {"id": "b", "name": "echo", "arguments": {"text": "{{a}}"}},
+            ]})
+    
+    @pytest.mark.asyncio
+    async def test_timeout_and_skipped_dependents(self, registry):
+        """超时的调用记为失败，依赖它的调用不执行"""
+        graph = ToolGraph()
+        graph.add(self.call("slow", "sleep", timeout_ms=20, ms=1000))
+        graph.add(self.call("after", "echo", text="{{slow}}"))
+        graph.add(self.call("other", "echo", text="ok"))
+        
+        outcome = await ToolGraphExecutor(registry).run(graph)
+        
+        slow, after, other = outcome.results
+        assert slow.success is False and "timed out" in slow.error
+        assert after.success is False and "Skipped" in after.error
+        assert other.result == "ok"
+        assert outcome.stats.timed_out == 1
+        assert outcome.stats.skipped == 1
+        assert outcome.stats.wall_time_ms < 500
+    
+    @pytest.mark.asyncio
+    async def test_cancel_on_failure(self, registry):
+        """cancel_on_failure 时一个调用失败即取消其余调用"""
+        graph = ToolGraph.from_calls([
+            self.call("bad", "fail"),
+            self.call("slow", "sleep", ms=1000),
+        ])
+        
+        outcome = await ToolGraphExecutor(registry, cancel_on_failure=True).run(graph)
+        
+        bad, slow = outcome.results
+        assert bad.success is False
+        assert slow.success is False and "Cancelled" in slow.error
+        assert outcome.stats.cancelled == 1
+        assert outcome.stats.wall_time_ms < 500
+        assert registry.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_executor_exception_cancels_siblings(self, registry):
+        """执行器抛出异常时取消其余调用并向上抛出"""
+        registry.execute = AsyncMock(side_effect=RuntimeError("executor crashed"))
+        graph = ToolGraph.from_calls([self.call("a", "echo", text="x")])
+        
+        with pytest.raises(RuntimeError, match="executor crashed"):
+            await ToolGraphExecutor(registry).run(graph)
+    
+    @pytest.mark.asyncio
+    async def test_execute_reports_tool_stats(self, registry):
+        """execute() 每轮记录工具执行统计"""
+        llm = MagicMock(spec=LLMClient)
+        tool_calls = [
+            SimpleNamespace(id=f"c{i}", function=SimpleNamespace(name="sleep", arguments='{"ms": 20}'))
+            for i in range(3)
+        ]
+        llm.chat = AsyncMock(side_effect=[
+            LLMResponse(content="", model="m", tool_calls=tool_calls),
+            LLMResponse(content="完成", model="m"),
+        ])
+        orchestrator = LLMOrchestrator(llm, registry)
+        
+        result = await orchestrator.execute("并行睡眠")
+        
+        assert result.final_response == "完成"
+        assert len(result.tool_stats) == 1
+        assert result.tool_stats[0].calls == 3
+        assert registry.peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_execute_turn_calls_verbatim(self, registry):
+        """LLM 单轮的调用不解析占位符，重复的调用 ID 记为该调用的失败结果，其余照常执行"""
+        llm = MagicMock(spec=LLMClient)
+        tool_calls = [
+            SimpleNamespace(id=call_id, function=SimpleNamespace(
+                name="echo", arguments=json.dumps({"text": text}),
+            ))
+            for call_id, text in [("a", "{{b}}"), ("b", "x"), ("b", "y")]
+        ]
+        llm.chat = AsyncMock(side_effect=[
+            LLMResponse(content="", model="m", tool_calls=tool_calls),
+            LLMResponse(content="完成", model="m"),
+        ])
+        orchestrator = LLMOrchestrator(llm, registry)
+        
+        result = await orchestrator.execute("回显")
+        
+        first, second, duplicate = result.tool_results
+        assert first.result == "{{b}}"
+        assert second.result == "x"
+        assert duplicate.success is False and "Duplicate" in duplicate.error
+        assert result.final_response == "完成"
+        assert result.tool_stats[0].calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_execute_plan(self, registry):
+        """execute_plan() 执行 plan() 的输出"""
+        orchestrator = LLMOrchestrator(MagicMock(spec=LLMClient), registry)
+        
+        outcome = await orchestrator.execute_plan({"tool_calls": [
+            {"name": "echo", "arguments": {"text": "a"}},
+            {"name": "echo", "arguments": {"text": "{{step1}}b"}},
+        ]})
+        
+        assert [r.result for r in outcome.results] == ["a", "ab"]
+
+
 class TestToolIntegration:
     """测试工具集成"""
     
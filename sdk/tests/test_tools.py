@@ -6,6 +6,8 @@ NeuroFlow Python SDK - Tool Protocol Tests
 
 import pytest
 import asyncio
+import subprocess
+import sys
 from neuroflow.tools import (
     ToolSource,
     ToolExecutionMode,
@@ -15,6 +17,7 @@ from neuroflow.tools import (
     ToolResult,
     UnifiedToolRegistry,
     LocalFunctionExecutor,
+    ToolResultCache,
 )
 
 
@@ -189,6 +192,226 @@ class TestUnifiedToolRegistry:
         assert len(schemas) == 1
         assert schemas[0]["function"]["name"] == "test"
 
+    @pytest.mark.asyncio
+    async def test_schema_cache_invalidation(self):
+        """Schema 缓存只在注册/移除工具时失效"""
+        registry = UnifiedToolRegistry()
+
+        def make_tool(name, description):
+            return ToolDefinition(
+                id=name,
+                name=name,
+                description=description,
+                source=ToolSource.LOCAL_FUNCTION,
+                parameters=[],
+            )
+
+        registry.register_tool(make_tool("a", "工具 A"))
+        registry.register_tool(make_tool("b", "工具 B"))
+        first = registry.get_all_llm_schemas()
+        schema_json = registry.get_tools_schema_json()
+        version = registry.version
+
+        assert registry.get_all_llm_schemas()[0] is first[0]
+        assert registry.get_tools_schema_json() is schema_json
+
+        registry.register_tool(make_tool("b", "新的工具 B"))
+        second = registry.get_all_llm_schemas()
+        assert registry.version > version
+        assert second[0] is first[0]
+        assert second[1]["function"]["description"] == "新的工具 B"
+        assert "新的工具 B" in registry.get_tools_description()
+
+        await registry.remove_tool("a")
+        assert [s["name"] for s in registry.get_all_anthropic_schemas()] == ["b"]
+        assert '"a"' not in registry.get_tools_schema_json()
+
+    def test_protocol_import_without_grpc(self):
+        """工具协议层只依赖本地 BM25 索引，未安装 grpc 时也能导入"""
+        code = (
+            "import sys\n"
+            "sys.modules['grpc'] = None\n"
+            "import neuroflow.tools.protocol\n"
+            "assert 'neuroflow.memory.kernel_client' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+class TestToolResultCache:
+    """测试可缓存工具的结果复用"""
+    
+    @pytest.mark.asyncio
+    async def test_repeated_call_hits_cache(self):
+        """参数相同 (顺序无关) 的调用复用结果，命中结果带有本次的 call_id"""
+        registry = UnifiedToolRegistry()
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        calls = []
+        
+        def lookup(key: str, limit: int = 10) -> dict:
+            calls.append(key)
+            return {"key": key, "limit": limit}
+        
+        tool = ToolDefinition(
+            id="test-lookup",
+            name="lookup",
+            description="查询",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+            cacheable=True,
+        )
+        registry.register_tool(tool)
+        executor.register_function(lookup, tool)
+        
+        first = await registry.execute(ToolCall(
+            tool_id="test-lookup", tool_name="lookup", arguments={"key": "a", "limit": 5},
+        ))
+        second_call = ToolCall(
+            tool_id="test-lookup", tool_name="lookup", arguments={"limit": 5, "key": "a"},
+        )
+        second = await registry.execute(second_call)
+        other = await registry.execute(ToolCall(
+            tool_id="test-lookup", tool_name="lookup", arguments={"key": "b", "limit": 5},
+        ))
+        
+        assert calls == ["a", "b"]
+        assert first.cache_hit is False
+        assert second.cache_hit is True
+        assert second.call_id == second_call.call_id
+        assert second.result == {"key": "a", "limit": 5}
+        assert other.cache_hit is False
+        assert registry.result_cache.get_stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_single_flight(self):
+        """并发的相同调用只执行一次"""
+        registry = UnifiedToolRegistry()
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        calls = []
+        
+        async def read_file(path: str) -> str:
+            calls.append(path)
+            await asyncio.sleep(0.01)
+            return "content"
+        
+        tool = ToolDefinition(
+            id="test-read",
+            name="read_file",
+            description="读取文件",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+            cacheable=True,
+        )
+        registry.register_tool(tool)
+        executor.register_function(read_file, tool)
+        
+        results = await asyncio.gather(*(
+            registry.execute(ToolCall(
+                tool_id="test-read", tool_name="read_file", arguments={"path": "a.txt"},
+            ))
+            for _ in range(5)
+        ))
+        
+        assert calls == ["a.txt"]
+        assert sum(r.cache_hit for r in results) == 4
+        assert len({r.call_id for r in results}) == 5
+        assert registry.result_cache.get_stats()["shared"] == 4
+    
+    @pytest.mark.asyncio
+    async def test_failures_not_cached(self):
+        """失败结果不缓存"""
+        registry = UnifiedToolRegistry()
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        calls = []
+        
+        def lookup(key: str) -> dict:
+            calls.append(key)
+            raise RuntimeError("lookup failed")
+        
+        tool = ToolDefinition(
+            id="test-lookup",
+            name="lookup",
+            description="查询",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+            cacheable=True,
+        )
+        registry.register_tool(tool)
+        executor.register_function(lookup, tool)
+        
+        call = ToolCall(tool_id="test-lookup", tool_name="lookup", arguments={"key": "a"})
+        assert (await registry.execute(call)).success is False
+        assert (await registry.execute(call)).success is False
+        assert calls == ["a", "a"]
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """TTL 过期后重新执行"""
+        now = [100.0]
+        registry = UnifiedToolRegistry(result_cache=ToolResultCache(clock=lambda: now[0]))
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        
+        tool = ToolDefinition(
+            id="test-lookup",
+            name="lookup",
+            description="查询",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+            cacheable=True,
+            cache_ttl_seconds=30,
+        )
+        registry.register_tool(tool)
+        executor.register_function(lambda key: key.upper(), tool)
+        
+        call = ToolCall(tool_id="test-lookup", tool_name="lookup", arguments={"key": "a"})
+        assert (await registry.execute(call)).cache_hit is False
+        now[0] += 10
+        assert (await registry.execute(call)).cache_hit is True
+        now[0] += 30
+        assert (await registry.execute(call)).cache_hit is False
+    
+    @pytest.mark.asyncio
+    async def test_reregistration_during_call_discards_result(self):
+        """执行期间重新注册工具时，旧结果不写入缓存"""
+        registry = UnifiedToolRegistry()
+        executor = LocalFunctionExecutor()
+        registry.register_executor(ToolSource.LOCAL_FUNCTION, executor)
+        
+        tool = ToolDefinition(
+            id="test-read",
+            name="read_file",
+            description="读取文件",
+            source=ToolSource.LOCAL_FUNCTION,
+            parameters=[],
+            cacheable=True,
+        )
+        
+        async def read_file(path: str) -> str:
+            registry.register_tool(tool)
+            return "old"
+        
+        registry.register_tool(tool)
+        executor.register_function(read_file, tool)
+        
+        call = ToolCall(tool_id="test-read", tool_name="read_file", arguments={"path": "a.txt"})
+        assert (await registry.execute(call)).result == "old"
+        assert len(registry.result_cache) == 0
+    
+    def test_bounded_lru(self):
+        """超出容量时淘汰最久未使用的条目"""
+        cache = ToolResultCache(max_entries=2)
+        cache.put(("t", "1"), "one")
+        cache.put(("t", "2"), "two")
+        cache.get(("t", "1"))
+        cache.put(("t", "3"), "three")
+        
+        assert cache.get(("t", "2")) is None
+        assert cache.get(("t", "1")) == "one"
+        assert cache.get_stats()["evictions"] == 1
+
 
 class TestLocalFunctionExecutor:
     """测试本地函数执行器"""